@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Tune the CPU runtime of this host on recorded frames and save a per-host profile.
+
+Sweeps torch intra-op threads, OpenCV threads, inference size and backend
+(torch and ONNX Runtime, both through the direct engine), replaying the same
+frames through ``YoloV8Detector.infer`` for every combination, and measures
+throughput and p50/p99 latency. The chosen combination is the largest input
+size that still reaches ``--target-fps`` (and ``--max-p99-ms``), fastest
+first among equals; if nothing reaches the target, the fastest overall.
+
+The result is written to ``<autotune.profile_dir>/<hostname>.yaml``; its
+``settings`` are merged over config.yaml by ``src/main.py`` at startup, so a
+fleet of identical nodes can share one profile by copying it under each
+hostname.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.replay_camera import ReplayCamera  # noqa: E402
+from detector.yolo_detector import YoloV8Detector  # noqa: E402
+from utils.tuning import apply_thread_settings, host_name, profile_path  # noqa: E402
+
+
+def default_threads() -> list:
+    cpus = os.cpu_count() or 1
+    counts = {cpus}
+    t = 1
+    while t < cpus:
+        counts.add(t)
+        t *= 2
+    return sorted(counts)
+
+
+def load_frames(path: str, count: int) -> list:
+    camera = ReplayCamera(path, pacing="fast")
+    camera.start()
+    frames = []
+    for frame in camera.frames():
+        frames.append(np.array(frame.color))
+        if len(frames) >= count:
+            break
+    camera.stop()
+    if not frames:
+        raise SystemExit("Replay source has no frames")
+    return frames
+
+
+def measure(detector: YoloV8Detector, frames: list, warmup: int) -> dict:
+    for frame in frames[:warmup]:
+        detector.infer(frame)
+    latencies = np.empty(len(frames))
+    t0 = time.perf_counter()
+    for i, frame in enumerate(frames):
+        t = time.perf_counter()
+        detector.infer(frame)
+        latencies[i] = time.perf_counter() - t
+    elapsed = time.perf_counter() - t0
+    return {
+        "fps": round(len(frames) / elapsed, 2),
+        "p50_ms": round(1000.0 * float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(1000.0 * float(np.percentile(latencies, 99)), 2),
+    }
+
+
+def choose(results: list, target_fps: float, max_p99_ms: float) -> tuple:
+    ok = [r for r in results if r["fps"] >= target_fps and (max_p99_ms <= 0 or r["p99_ms"] <= max_p99_ms)]
+    if ok:
+        return max(ok, key=lambda r: (r["imgsz"], r["fps"])), True
+    return max(results, key=lambda r: r["fps"]), False
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default=str(root / "config" / "config.yaml"))
+    parser.add_argument("--replay", required=True, help="recorded session/replay path to tune on")
+    parser.add_argument("--frames", type=int, default=100, help="timed frames per combination")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnxruntime"], choices=["torch", "onnxruntime"])
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640, 512, 416, 320])
+    parser.add_argument("--threads", type=int, nargs="+", default=default_threads(), help="torch / ORT intra-op threads")
+    parser.add_argument("--opencv-threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--target-fps", type=float, help="required throughput (default: runtime.max_fps)")
+    parser.add_argument("--max-p99-ms", type=float, default=0.0, help="required p99 latency (0: no limit)")
+    parser.add_argument("--host", help="profile name (default: this hostname)")
+    parser.add_argument("--dry-run", action="store_true", help="print the profile instead of writing it")
+    args = parser.parse_args()
+
+    config = yaml.safe_load(open(args.config))
+    det_cfg = config["model"]
+    target_fps = args.target_fps if args.target_fps is not None else float(config["runtime"].get("max_fps", 30))
+    frames = load_frames(args.replay, args.frames)
+    base = dict(
+        model_path=det_cfg["path"],
+        device="cpu",
+        half=False,
+        conf_threshold=det_cfg.get("conf_threshold", 0.25),
+        iou_threshold=det_cfg.get("iou_threshold", 0.45),
+        classes=det_cfg.get("classes") or None,
+        engine="direct",
+        max_batch=1,
+        max_det=int(det_cfg.get("max_det", 300)),
+        artifact_cache=det_cfg.get("artifact_cache") or None,
+    )
+    ort_cfg = det_cfg.get("onnxruntime", {})
+
+    results = []
+    print(f"{'backend':>11} {'imgsz':>5} {'threads':>7} {'cv2':>4} {'fps':>7} {'p50 ms':>7} {'p99 ms':>7}")
+    for backend in args.backends:
+        for imgsz in args.imgsz:
+            # torch threads change in place; ONNX Runtime fixes them per session
+            torch_detector = None
+            for threads in args.threads:
+                if backend == "torch":
+                    if torch_detector is None:
+                        torch_detector = YoloV8Detector(**base, imgsz=imgsz, backend="torch")
+                        torch_detector.load()
+                    detector = torch_detector
+                else:
+                    options = {**ort_cfg, "intra_op_threads": threads}
+                    detector = YoloV8Detector(**base, imgsz=imgsz, backend="onnxruntime", onnx_options=options)
+                    detector.load()
+                for cv_threads in args.opencv_threads:
+                    apply_thread_settings(torch_threads=threads, opencv_threads=cv_threads)
+                    row = {"backend": backend, "imgsz": imgsz, "threads": threads, "opencv_threads": cv_threads}
+                    row.update(measure(detector, frames, args.warmup))
+                    results.append(row)
+                    print(
+                        f"{backend:>11} {imgsz:>5} {threads:>7} {cv_threads:>4} "
+                        f"{row['fps']:>7.1f} {row['p50_ms']:>7.1f} {row['p99_ms']:>7.1f}"
+                    )
+
+    best, met = choose(results, target_fps, args.max_p99_ms)
+    if not met:
+        print(f"No combination reaches {target_fps:.1f} fps; using the fastest one")
+    settings = {
+        "runtime": {"torch_threads": best["threads"], "opencv_threads": best["opencv_threads"], "device": "cpu"},
+        "model": {"engine": "direct", "backend": best["backend"], "imgsz": best["imgsz"]},
+    }
+    if best["backend"] == "onnxruntime":
+        settings["model"]["onnxruntime"] = {"intra_op_threads": best["threads"]}
+    profile = {
+        "host": args.host or host_name(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cpu_count": os.cpu_count(),
+        "replay": str(args.replay),
+        "target_fps": target_fps,
+        "max_p99_ms": args.max_p99_ms,
+        "best": best,
+        "settings": settings,
+        "results": results,
+    }
+    print(f"best: {best}")
+
+    text = yaml.safe_dump(profile, sort_keys=False)
+    if args.dry_run:
+        print(text)
+        return
+    profile_dir = config.get("autotune", {}).get("profile_dir") or str(root / "config" / "tuned")
+    path = profile_path(profile_dir, args.host)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    print(f"Tuned profile written to {path}")
+
+
+if __name__ == "__main__":
+    main()
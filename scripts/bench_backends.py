@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""CPU benchmark of the torch and ONNX Runtime detector backends.
+
+Both run through the direct engine (same letterbox, NMS and frames), so the
+difference is the forward pass. Also reports how many boxes agree between
+the two (same class, IoU >= 0.9) as a sanity check of the export.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.replay_camera import ReplayCamera  # noqa: E402
+from detector.yolo_detector import YoloV8Detector  # noqa: E402
+
+
+def load_frames(args) -> list:
+    if not args.replay:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.frames)]
+    camera = ReplayCamera(args.replay, pacing="fast")
+    camera.start()
+    frames = []
+    for frame in camera.frames():
+        frames.append(np.array(frame.color))
+        if len(frames) >= args.frames:
+            break
+    camera.stop()
+    if not frames:
+        raise SystemExit("Replay source has no frames")
+    return frames
+
+
+def box_agreement(a, b, iou_min: float = 0.9) -> tuple:
+    if len(a) == 0 or len(b) == 0:
+        return 0, max(len(a), len(b))
+    ba = a.boxes.astype(np.float64)
+    bb = b.boxes.astype(np.float64)
+    lt = np.maximum(ba[:, None, :2], bb[None, :, :2])
+    rb = np.minimum(ba[:, None, 2:], bb[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=-1)
+    area_a = np.prod(ba[:, 2:] - ba[:, :2], axis=1)
+    area_b = np.prod(bb[:, 2:] - bb[:, :2], axis=1)
+    iou = inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+    same = (iou >= iou_min) & (a.class_ids[:, None] == b.class_ids[None, :])
+    return int(same.any(axis=1).sum()), max(len(a), len(b))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=str(Path(__file__).resolve().parents[1] / "models" / "yolov8n.pt"))
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = auto)")
+    parser.add_argument("--graph-optimization", default="all")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--replay", help="replay directory/container/session (default: random frames)")
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    results = {}
+    for backend in ("torch", "onnxruntime"):
+        detector = YoloV8Detector(
+            model_path=args.model,
+            device="cpu",
+            half=False,
+            engine="direct",
+            imgsz=args.imgsz,
+            max_batch=1,
+            backend=backend,
+            onnx_options={"intra_op_threads": args.threads, "graph_optimization": args.graph_optimization},
+        )
+        detector.load()
+        t0 = time.perf_counter()
+        results[backend] = [detector.infer(frame) for frame in frames]
+        elapsed = time.perf_counter() - t0
+        print(f"{backend:>12}: {elapsed * 1000.0 / len(frames):7.1f} ms/frame  {len(frames) / elapsed:6.1f} FPS")
+
+    agree = total = 0
+    for a, b in zip(results["torch"], results["onnxruntime"]):
+        n, m = box_agreement(a, b)
+        agree += n
+        total += m
+    print(f"box agreement: {agree}/{total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Detector throughput (images/sec) versus batch size.
+
+Runs ``YoloV8Detector.infer_batch`` on random or replayed color frames for
+each requested batch size and prints images/sec and ms per batch. Defaults
+to CPU so it runs without a GPU.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.replay_camera import ReplayCamera  # noqa: E402
+from detector.yolo_detector import YoloV8Detector  # noqa: E402
+
+
+def load_images(args) -> list:
+    if not args.replay:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(max(args.batch_sizes))]
+    camera = ReplayCamera(args.replay, pacing="fast")
+    camera.start()
+    images = []
+    for frame in camera.frames():
+        images.append(np.array(frame.color))
+        if len(images) >= max(args.batch_sizes):
+            break
+    camera.stop()
+    if not images:
+        raise SystemExit("Replay source has no frames")
+    while len(images) < max(args.batch_sizes):
+        images.extend(images[: max(args.batch_sizes) - len(images)])
+    return images
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=str(Path(__file__).resolve().parents[1] / "models" / "yolov8n.pt"))
+    parser.add_argument("--device", default="cpu", help='"cpu", "auto" or CUDA index')
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--iters", type=int, default=10, help="timed batches per batch size")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--replay", help="replay directory/container/session (default: random frames)")
+    args = parser.parse_args()
+
+    detector = YoloV8Detector(model_path=args.model, device=args.device, half=False)
+    detector.load()
+    images = load_images(args)
+
+    print(f"{'batch':>5} {'ms/batch':>10} {'images/s':>10}")
+    for batch_size in args.batch_sizes:
+        batch = images[:batch_size]
+        for _ in range(args.warmup):
+            detector.infer_batch(batch)
+        t0 = time.perf_counter()
+        for _ in range(args.iters):
+            detector.infer_batch(batch)
+        elapsed = time.perf_counter() - t0
+        print(f"{batch_size:>5} {elapsed * 1000.0 / args.iters:>10.1f} {batch_size * args.iters / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
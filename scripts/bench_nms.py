@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the vectorized NMS against the old per-box loop.
+
+For each box count, random clustered boxes (crowded bins) are suppressed by
+``detector.nms.nms``/``batched_nms`` and by the loop-based reference that
+the torchvision stub used to ship. Results must match exactly and the
+vectorized path must not be slower than the loop at any count; timings are
+printed per call.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from detector.nms import batched_nms, nms  # noqa: E402
+
+
+def reference_nms(boxes: torch.Tensor, scores: torch.Tensor, iou_threshold: float) -> torch.Tensor:
+    if boxes.numel() == 0:
+        return torch.empty((0,), dtype=torch.int64, device=boxes.device)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clamp(min=0) * (y2 - y1).clamp(min=0)
+    order = scores.argsort(descending=True)
+    keep = []
+    while order.numel() > 0:
+        i = order[0]
+        keep.append(i)
+        if order.numel() == 1:
+            break
+        xx1 = torch.maximum(x1[i], x1[order[1:]])
+        yy1 = torch.maximum(y1[i], y1[order[1:]])
+        xx2 = torch.minimum(x2[i], x2[order[1:]])
+        yy2 = torch.minimum(y2[i], y2[order[1:]])
+        inter = (xx2 - xx1).clamp(min=0) * (yy2 - yy1).clamp(min=0)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
+        order = order[(iou <= iou_threshold).nonzero(as_tuple=False).squeeze(1) + 1]
+    return torch.stack(keep)
+
+
+def reference_batched_nms(boxes, scores, idxs, iou_threshold):
+    offsets = idxs.to(boxes.dtype) * (boxes.max() + 1)
+    return reference_nms(boxes + offsets[:, None], scores, iou_threshold)
+
+
+def random_boxes(n: int, num_classes: int, seed: int = 0):
+    g = torch.Generator().manual_seed(seed)
+    # Boxes jittered around a few dozen object centers, like a crowded bin
+    centers = torch.rand((max(n // 20, 1), 2), generator=g) * 600 + 20
+    pick = torch.randint(0, centers.shape[0], (n,), generator=g)
+    xy = centers[pick] + torch.randn((n, 2), generator=g) * 6
+    wh = torch.rand((n, 2), generator=g) * 40 + 20
+    boxes = torch.cat((xy - wh / 2, xy + wh / 2), dim=1)
+    scores = torch.rand(n, generator=g)
+    classes = torch.randint(0, num_classes, (n,), generator=g)
+    return boxes, scores, classes
+
+
+def timed(fn, repeat: int) -> tuple:
+    out = fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return out, (time.perf_counter() - t0) * 1000.0 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 3000, 10000])
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'boxes':>6} {'kept':>6} {'loop ms':>9} {'vec ms':>8} {'batched loop':>13} {'batched vec':>12}  match")
+    ok = True
+    slower = []
+    for n in args.counts:
+        boxes, scores, classes = random_boxes(n, args.classes)
+        ref, ref_ms = timed(lambda: reference_nms(boxes, scores, args.iou), args.repeat)
+        out, vec_ms = timed(lambda: nms(boxes, scores, args.iou), args.repeat)
+        bref, bref_ms = timed(lambda: reference_batched_nms(boxes, scores, classes, args.iou), args.repeat)
+        bout, bvec_ms = timed(lambda: batched_nms(boxes, scores, classes, args.iou), args.repeat)
+        capped = nms(boxes, scores, args.iou, max_det=10)
+        match = torch.equal(ref, out) and torch.equal(bref, bout) and torch.equal(capped, ref[:10])
+        ok &= match
+        if vec_ms > ref_ms or bvec_ms > bref_ms:
+            slower.append(n)
+        print(f"{n:>6} {ref.numel():>6} {ref_ms:>9.2f} {vec_ms:>8.2f} {bref_ms:>13.2f} {bvec_ms:>12.2f}  {'yes' if match else 'NO'}")
+    if not ok:
+        raise SystemExit("Vectorized NMS does not match the reference")
+    if slower:
+        raise SystemExit(f"Vectorized NMS is slower than the loop for {', '.join(map(str, slower))} boxes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark per-detection point cloud extraction against the 30 Hz frame budget.
+
+Depth is synthesized (a tilted belt plane with raised boxes, noise and
+holes) or read from a replay source (``--replay``, which must carry depth
+intrinsics). Boxes are random; every frame runs
+``PointCloudExtractor.extract`` for all of them at once.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.point_cloud import PointCloudExtractor  # noqa: E402
+from camera.replay_camera import ReplayCamera  # noqa: E402
+from utils.geometry import RigidTransform  # noqa: E402
+
+
+def synthetic_frames(n: int, width: int, height: int, boxes: np.ndarray, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    belt = 800.0 + 0.3 * xx + 0.2 * yy
+    for x1, y1, x2, y2 in boxes:
+        belt[y1:y2, x1:x2] -= 40.0
+    for _ in range(n):
+        depth = belt + rng.normal(0.0, 2.0, belt.shape)
+        depth[rng.random(belt.shape) < 0.05] = 0
+        yield depth.astype(np.uint16)
+
+
+def random_boxes(count: int, width: int, height: int, size: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x0 = rng.integers(0, max(width - size, 1), count)
+    y0 = rng.integers(0, max(height - size, 1), count)
+    return np.stack([x0, y0, x0 + size, y0 + size], axis=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replay", help="replay directory/container/session (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--boxes", type=int, default=20, help="detections per frame")
+    parser.add_argument("--box-size", type=int, default=80, help="box side in pixels")
+    parser.add_argument("--voxel-size", type=float, default=0.005)
+    parser.add_argument("--stride", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--budget-ms", type=float, default=1000.0 / 30.0)
+    args = parser.parse_args()
+
+    intrinsics = {
+        "fx": 600.0, "fy": 600.0, "ppx": args.width / 2.0, "ppy": args.height / 2.0,
+        "width": args.width, "height": args.height, "depth_scale": 0.001,
+    }
+    boxes = random_boxes(args.boxes, args.width, args.height, args.box_size)
+    if args.replay:
+        camera = ReplayCamera(args.replay, pacing="fast")
+        camera.start()
+        depths = []
+        for frame in camera.frames():
+            if frame.depth is not None:
+                depths.append(np.array(frame.depth, dtype=np.uint16))
+                intrinsics = frame.intrinsics or intrinsics
+            if len(depths) >= args.frames:
+                break
+        camera.stop()
+        if not depths:
+            raise SystemExit("Replay source has no depth frames")
+        height, width = depths[0].shape[:2]
+        boxes = random_boxes(args.boxes, width, height, args.box_size)
+    else:
+        depths = list(synthetic_frames(args.frames, args.width, args.height, boxes))
+    transform = RigidTransform([[0, -1, 0, 0.5], [-1, 0, 0, 0.0], [0, 0, -1, 1.2], [0, 0, 0, 1]])
+    ref_z = np.full(len(boxes), np.nan)
+
+    print(f"{args.boxes} x {args.box_size}px boxes, voxel {args.voxel_size * 1000:.1f} mm")
+    print(f"{'stride':>6} {'p50 ms':>7} {'p99 ms':>7} {'voxels':>7}  budget {args.budget_ms:.1f} ms")
+    for stride in args.stride:
+        extractor = PointCloudExtractor(voxel_size=args.voxel_size, stride=stride)
+        extractor.extract(depths[0], boxes, intrinsics, transform, ref_z)
+        latencies = np.empty(len(depths))
+        voxels = 0
+        for i, depth in enumerate(depths):
+            t0 = time.perf_counter()
+            clouds = extractor.extract(depth, boxes, intrinsics, transform, ref_z)
+            latencies[i] = (time.perf_counter() - t0) * 1000.0
+            voxels += len(clouds.points)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        verdict = "ok" if p99 <= args.budget_ms else "over budget"
+        print(f"{stride:>6} {p50:>7.2f} {p99:>7.2f} {voxels // len(depths):>7}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Throughput scaling of the multi-process detector pool with the worker count K.
+
+For each K, starts ``ProcessPoolDetector`` with K workers (CPU threads split
+evenly unless ``--threads`` is given), keeps K + 1 frames in flight the way
+``runtime.pipeline`` does, and prints frames/sec, mean latency and the
+speedup over the in-process detector.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.replay_camera import ReplayCamera  # noqa: E402
+from detector.worker_pool import ProcessPoolDetector  # noqa: E402
+from detector.yolo_detector import YoloV8Detector  # noqa: E402
+
+
+def load_frames(args) -> list:
+    if not args.replay:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    camera = ReplayCamera(args.replay, pacing="fast")
+    camera.start()
+    frames = []
+    for frame in camera.frames():
+        frames.append(np.array(frame.color))
+        if len(frames) >= 32:
+            break
+    camera.stop()
+    if not frames:
+        raise SystemExit("Replay source has no frames")
+    return frames
+
+
+def run_pool(detector, frames: list, count: int, in_flight: int) -> tuple:
+    pending = deque()
+    latencies = []
+    t0 = time.perf_counter()
+    for i in range(count):
+        pending.append((detector.begin([frames[i % len(frames)]]), time.perf_counter()))
+        if len(pending) >= in_flight:
+            job, t_submit = pending.popleft()
+            detector.finish(detector.forward(job))
+            latencies.append(time.perf_counter() - t_submit)
+    while pending:
+        job, t_submit = pending.popleft()
+        detector.finish(detector.forward(job))
+        latencies.append(time.perf_counter() - t_submit)
+    elapsed = time.perf_counter() - t0
+    return count / elapsed, 1000.0 * float(np.mean(latencies))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=str(Path(__file__).resolve().parents[1] / "models" / "yolov8n.pt"))
+    parser.add_argument("--engine", default="direct", choices=["ultralytics", "direct"])
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnxruntime"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=0, help="threads per worker (0: CPU count / K)")
+    parser.add_argument("--frames", type=int, default=200, help="timed frames per K")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--replay", help="replay directory/container/session (default: random frames)")
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    kwargs = dict(model_path=args.model, device="cpu", half=False, engine=args.engine, backend=args.backend, max_batch=1)
+
+    baseline = YoloV8Detector(**kwargs)
+    baseline.load()
+    run_pool(baseline, frames, args.warmup, 1)
+    base_fps, base_ms = run_pool(baseline, frames, args.frames, 1)
+    print(f"{'workers':>7} {'frames/s':>10} {'latency ms':>11} {'speedup':>8}")
+    print(f"{'local':>7} {base_fps:>10.1f} {base_ms:>11.1f} {1.0:>8.2f}")
+
+    for k in args.workers:
+        pool = ProcessPoolDetector(kwargs, workers=k, threads=args.threads or None)
+        pool.load()
+        try:
+            run_pool(pool, frames, args.warmup, k + 1)
+            fps, ms = run_pool(pool, frames, args.frames, k + 1)
+        finally:
+            pool.close()
+        print(f"{k:>7} {fps:>10.1f} {ms:>11.1f} {fps / base_fps:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
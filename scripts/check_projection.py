@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Check that projection and deprojection invert each other for every distortion model.
+
+For each model, pixels are deprojected through the ray table and projected
+back with ``project_points``; the round trip must land within
+``--max-error-px``. Then ``RoiDepthAligner`` is run with identical depth and
+color intrinsics: with identity extrinsics aligned depth must equal the
+input inside the ROI, and with a stereo baseline a near part in front of a
+far background must keep its own depth (nearer surfaces win the z-buffer).
+Exits non-zero on any failure.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.deprojection import get_ray_table, project_points  # noqa: E402
+from camera.roi_align import RoiDepthAligner  # noqa: E402
+
+# D4xx-like color lens distortion (k1, k2, p1, p2, k3)
+COEFFS = [0.12, -0.25, 0.001, -0.0008, 0.1]
+MODELS = ["none", "brown_conrady", "modified_brown_conrady", "inverse_brown_conrady"]
+
+
+def intrinsics(model: str, width: int, height: int) -> dict:
+    return {
+        "fx": 615.0, "fy": 615.0, "ppx": width / 2.0 - 3.5, "ppy": height / 2.0 + 2.0,
+        "width": width, "height": height, "depth_scale": 0.001,
+        "model": model, "coeffs": COEFFS if model != "none" else [0.0] * 5,
+    }
+
+
+def round_trip_error(intr: dict, count: int, rng: np.random.Generator) -> float:
+    u = rng.integers(0, intr["width"], count)
+    v = rng.integers(0, intr["height"], count)
+    z = rng.uniform(0.3, 3.0, count).astype(np.float32)
+    xyz = get_ray_table(intr).deproject(u, v, z).astype(np.float64)
+    pu, pv = project_points(xyz[:, 0], xyz[:, 1], xyz[:, 2], intr)
+    return float(np.max(np.hypot(pu - u, pv - v)))
+
+
+def aligner_mismatch(intr: dict) -> float:
+    h, w = intr["height"], intr["width"]
+    # A ramp, so a footprint landing one pixel off changes the value
+    yy, xx = np.mgrid[0:h, 0:w]
+    depth = (2000 - xx - yy).astype(np.uint16)
+    identity = {"rotation": [1, 0, 0, 0, 1, 0, 0, 0, 1], "translation": [0, 0, 0]}
+    aligner = RoiDepthAligner(intr, intr, identity)
+    box = (w // 4, h // 4, 3 * w // 4, 3 * h // 4)
+    aligned = aligner.align_rois(depth, [box])
+    # Border pixels may be overdrawn by footprints from just outside the ROI
+    x0, y0, x1, y1 = box[0] + 2, box[1] + 2, box[2] - 2, box[3] - 2
+    return float(np.mean(aligned[y0:y1, x0:x1] != depth[y0:y1, x0:x1]))
+
+
+def occlusion_mismatch(intr: dict, baseline_m: float = 0.015) -> float:
+    """Fraction of a near part's color pixels that do not carry its depth behind a 15 mm baseline."""
+    h, w = intr["height"], intr["width"]
+    near, far = 500, 3000
+    depth = np.full((h, w), far, dtype=np.uint16)
+    px0, py0, px1, py1 = w // 2 - 40, h // 2 - 40, w // 2 + 40, h // 2 + 40
+    depth[py0:py1, px0:px1] = near
+    extr = {"rotation": [1, 0, 0, 0, 1, 0, 0, 0, 1], "translation": [baseline_m, 0, 0]}
+    aligned = RoiDepthAligner(intr, intr, extr).align_rois(depth, [(w // 4, h // 4, 3 * w // 4, 3 * h // 4)])
+    # The part shifts by fx * baseline / z in color; skip a 1 px margin for lens distortion
+    shift = int(round(intr["fx"] * baseline_m * 1000.0 / near))
+    part = aligned[py0 + 1:py1 - 1, px0 + shift + 1:px1 + shift - 1]
+    return float(np.mean(part != near))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--max-error-px", type=float, default=0.01)
+    parser.add_argument("--max-mismatch", type=float, default=0.01, help="allowed fraction of misaligned ROI pixels")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    failed = False
+    print(f"{'model':>22} {'round trip px':>13} {'ROI mismatch':>12} {'occlusion':>10}")
+    for model in MODELS:
+        intr = intrinsics(model, args.width, args.height)
+        err = round_trip_error(intr, args.points, rng)
+        mismatch = aligner_mismatch(intr)
+        occluded = occlusion_mismatch(intr)
+        bad = err > args.max_error_px or mismatch > args.max_mismatch or occluded > args.max_mismatch
+        failed |= bad
+        print(f"{model:>22} {err:>13.5f} {mismatch:>12.2%} {occluded:>10.2%}{'  FAIL' if bad else ''}")
+    if failed:
+        raise SystemExit("projection/alignment check failed")
+
+
+if __name__ == "__main__":
+    main()
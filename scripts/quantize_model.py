@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Build an INT8 ONNX model from the .pt weights and check it against FP32.
+
+1. Exports the FP32 ONNX model (same path the detector uses) if missing.
+2. Quantizes it: ``static`` calibrates activations on recorded frames,
+   ``dynamic`` only quantizes weights.
+3. Runs FP32 and INT8 on held-out frames and reports mAP@0.5, mAP@0.5:0.95
+   and box agreement (FP32 detections as ground truth) plus CPU latency.
+
+Deploy with ``model.backend: onnxruntime`` and ``model.onnxruntime.int8``.
+Everything runs on the CPU.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from camera.replay_camera import ReplayCamera  # noqa: E402
+from detector.direct_engine import DirectYoloEngine  # noqa: E402
+from detector.onnx_backend import OnnxRuntimeBackend, resolve_onnx_path  # noqa: E402
+from detector.quantization import FrameCalibrationReader, compare_detections, int8_path, quantize_onnx  # noqa: E402
+from detector.yolo_detector import YoloV8Detector  # noqa: E402
+
+
+def collect_frames(path: str, count: int, step: int) -> list:
+    camera = ReplayCamera(path, pacing="fast")
+    camera.start()
+    frames = []
+    for i, frame in enumerate(camera.frames()):
+        if i % step == 0:
+            frames.append(np.array(frame.color))
+        if len(frames) >= count:
+            break
+    camera.stop()
+    return frames
+
+
+def run(engine: DirectYoloEngine, frames: list) -> tuple:
+    engine.warmup([1])
+    t0 = time.perf_counter()
+    detections = [engine.infer([frame])[0] for frame in frames]
+    return detections, (time.perf_counter() - t0) * 1000.0 / max(len(frames), 1)
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default=str(root / "config" / "config.yaml"))
+    parser.add_argument("--calib", required=True, help="recorded session/replay path with calibration frames")
+    parser.add_argument("--eval", help="separate replay path for evaluation (default: frames after the calibration set)")
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--calib-frames", type=int, default=100)
+    parser.add_argument("--eval-frames", type=int, default=100)
+    parser.add_argument("--step", type=int, default=5, help="use every n-th recorded frame")
+    parser.add_argument("--no-exclude-head", action="store_true", help="also quantize the detection head")
+    parser.add_argument("--min-map50", type=float, default=0.0, help="exit with status 1 below this mAP@0.5, or when FP32 finds no reference detections")
+    args = parser.parse_args()
+
+    cfg = yaml.safe_load(open(args.config))["model"]
+    ort_cfg = cfg.get("onnxruntime", {})
+    imgsz = int(cfg.get("imgsz", 640))
+    conf = float(cfg.get("conf_threshold", 0.25))
+    iou = float(cfg.get("iou_threshold", 0.45))
+    cache_dir = cfg.get("artifact_cache") or None
+
+    # Make sure the FP32 export exists (the detector exports it on first load)
+    YoloV8Detector(
+        model_path=cfg["path"],
+        device="cpu",
+        engine="direct",
+        backend="onnxruntime",
+        imgsz=imgsz,
+        max_batch=1,
+        artifact_cache=cache_dir,
+        onnx_path=cfg.get("onnx_path") or None,
+    ).load()
+    fp32_path = str(resolve_onnx_path(cfg["path"], cfg.get("onnx_path") or None, cache_dir, imgsz))
+    out_path = str(int8_path(fp32_path, args.mode))
+
+    frames = collect_frames(args.calib, args.calib_frames + (0 if args.eval else args.eval_frames), args.step)
+    calib_frames = frames[: args.calib_frames]
+    eval_frames = collect_frames(args.eval, args.eval_frames, args.step) if args.eval else frames[args.calib_frames:]
+    if not calib_frames or not eval_frames:
+        raise SystemExit("Not enough recorded frames for calibration and evaluation")
+
+    threads = {
+        "intra_op_threads": int(ort_cfg.get("intra_op_threads", 0)),
+        "inter_op_threads": int(ort_cfg.get("inter_op_threads", 0)),
+        "graph_optimization": str(ort_cfg.get("graph_optimization", "all")),
+    }
+    fp32_backend = OnnxRuntimeBackend(fp32_path, **threads)
+    engine_args = dict(imgsz=imgsz, max_batch=1, conf_threshold=conf, iou_threshold=iou, names=fp32_backend.names)
+    fp32 = DirectYoloEngine(fp32_backend, **engine_args)
+
+    calibration = FrameCalibrationReader(fp32_backend.session.get_inputs()[0].name, [fp32.prepare([f]) for f in calib_frames])
+    t0 = time.perf_counter()
+    quantize_onnx(fp32_path, out_path, mode=args.mode, calibration=calibration, exclude_head=not args.no_exclude_head)
+    print(f"INT8 ({args.mode}) model written to {out_path} in {time.perf_counter() - t0:.1f} s")
+
+    int8 = DirectYoloEngine(OnnxRuntimeBackend(out_path, **threads), **engine_args)
+    ref, fp32_ms = run(fp32, eval_frames)
+    cand, int8_ms = run(int8, eval_frames)
+    report = compare_detections(ref, cand)
+
+    print(f"evaluation frames: {len(eval_frames)}  FP32 boxes: {int(report['reference_boxes'])}")
+    print(f"FP32 {fp32_ms:.1f} ms/frame  INT8 {int8_ms:.1f} ms/frame  speedup {fp32_ms / max(int8_ms, 1e-9):.2f}x")
+    print(f"mAP@0.5 {report['map50']:.3f}  mAP@0.5:0.95 {report['map50_95']:.3f}  box agreement {report['agreement']:.3f}")
+    if not report["map50"] >= args.min_map50:  # NaN fails too
+        if report["map50"] != report["map50"]:
+            print("FP32 model found no reference detections on the evaluation frames; mAP cannot be checked, do not deploy")
+        else:
+            print(f"mAP@0.5 below --min-map50 {args.min_map50}; do not deploy")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
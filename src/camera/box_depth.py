@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+METHODS = ("center", "median", "percentile", "trimmed_mean", "histogram_mode")
+# Histogram span cap (bins above the nearest valid sample), e.g. 10 m at 1 cm bins
+_MAX_BINS = 1024
+
+
+def _sample_grid(depth: np.ndarray, boxes: np.ndarray, samples: int, shrink: float) -> np.ndarray:
+    """Gather an S x S grid of raw depth samples from the inner ``shrink`` part of every box -> (N, S*S)."""
+    h, w = depth.shape[:2]
+    b = boxes.astype(np.float32)
+    c = (b[:, :2] + b[:, 2:]) / 2.0
+    half = (b[:, 2:] - b[:, :2]) * (shrink / 2.0)
+    lo = c - half
+    t = (np.arange(samples, dtype=np.float32) + 0.5) / samples
+    xs = np.clip(lo[:, :1] + t[None, :] * (2.0 * half[:, :1]), 0, w - 1).astype(np.intp)
+    ys = np.clip(lo[:, 1:] + t[None, :] * (2.0 * half[:, 1:]), 0, h - 1).astype(np.intp)
+    return depth[ys[:, :, None], xs[:, None, :]].reshape(len(boxes), -1).astype(np.float32)
+
+
+def _take(a: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    return np.take_along_axis(a, idx[:, None], axis=1)[:, 0]
+
+
+def _partitioned(a: np.ndarray, kth: np.ndarray) -> np.ndarray:
+    # One partition puts every row's needed ranks in place at once
+    kth = np.unique(kth)
+    return np.partition(a, kth, axis=1) if kth.size else a
+
+
+class BoxDepthEstimator:
+    """Per-detection depth from the pixels inside each box, for all boxes at once.
+
+    ``center`` reads the single center pixel (the original behaviour). The
+    other methods sample an S x S grid (``samples`` per side) over the inner
+    ``shrink`` fraction of each box, ignore zero depth, and reduce every row
+    with vectorized NumPy: ``median``/``percentile`` and ``trimmed_mean`` use
+    one ``np.partition`` over the union of the ranks each row needs,
+    ``histogram_mode`` averages the samples of the most populated
+    ``bin_size`` bin (ties go to the nearer bin). Returns raw depth per box
+    (0 when fewer than ``min_valid`` of the samples have depth) and the
+    valid-sample ratio as a confidence.
+    """
+
+    def __init__(
+        self,
+        method: str = "center",
+        samples: int = 16,
+        shrink: float = 0.5,
+        percentile: float = 50.0,
+        trim: float = 0.2,
+        bin_size: float = 10.0,
+        min_valid: float = 0.1,
+    ) -> None:
+        if method not in METHODS:
+            raise ValueError(f"Unknown depth estimator: {method} (expected one of {', '.join(METHODS)})")
+        if not 0.0 <= trim < 0.5:
+            raise ValueError("trim must be in [0, 0.5)")
+        self.method = method
+        self.samples = max(1, int(samples))
+        self.shrink = float(np.clip(shrink, 0.05, 1.0))
+        self.percentile = float(np.clip(percentile, 0.0, 100.0)) if method == "percentile" else 50.0
+        self.trim = float(trim)
+        self.bin_size = max(float(bin_size), 1e-6)
+        self.min_valid = float(min_valid)
+
+    def estimate(self, depth: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw depth (N,) float32 and valid-sample ratio (N,) float32 for (N, 4) xyxy ``boxes``."""
+        n = len(boxes)
+        if n == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        if self.method == "center":
+            h, w = depth.shape[:2]
+            cx, cy = ((boxes[:, :2] + boxes[:, 2:]) // 2).T
+            inside = (cx >= 0) & (cx < w) & (cy >= 0) & (cy < h)
+            z = np.zeros(n, dtype=np.float32)
+            z[inside] = depth[cy[inside], cx[inside]]
+            return z, (z > 0).astype(np.float32)
+
+        raw = _sample_grid(depth, boxes, self.samples, self.shrink)
+        valid = raw > 0
+        k = valid.sum(axis=1)
+        has = k > 0
+        # Invalid samples sort last, so ranks 0..k-1 of a row are its valid samples
+        a = np.where(valid, raw, np.inf)
+        with np.errstate(invalid="ignore"):
+            if self.method in ("median", "percentile"):
+                z = self._percentile(a, k, has)
+            elif self.method == "trimmed_mean":
+                z = self._trimmed_mean(a, k, has)
+            else:
+                z = self._histogram_mode(raw, a, valid)
+        ratio = (k / raw.shape[1]).astype(np.float32)
+        z = np.where(has & (ratio >= self.min_valid), z, 0.0).astype(np.float32)
+        return z, ratio
+
+    def _percentile(self, a: np.ndarray, k: np.ndarray, has: np.ndarray) -> np.ndarray:
+        pos = (self.percentile / 100.0) * np.maximum(k - 1, 0)
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.ceil(pos).astype(np.intp)
+        part = _partitioned(a, np.concatenate([lo[has], hi[has]]))
+        vlo, vhi = _take(part, lo), _take(part, hi)
+        return vlo + (vhi - vlo) * (pos - lo)
+
+    def _trimmed_mean(self, a: np.ndarray, k: np.ndarray, has: np.ndarray) -> np.ndarray:
+        lo = np.floor(self.trim * k).astype(np.intp)
+        hi = k - lo  # exclusive; hi > lo whenever k > 0 because trim < 0.5
+        part = _partitioned(a, np.concatenate([lo[has], np.maximum(hi - 1, 0)[has]]))
+        # Positions lo..hi-1 hold exactly the ranks lo..hi-1 after the partition
+        pos = np.arange(a.shape[1])
+        keep = (pos >= lo[:, None]) & (pos < hi[:, None])
+        return np.where(keep, part, 0.0).sum(axis=1) / np.maximum(hi - lo, 1)
+
+    def _histogram_mode(self, raw: np.ndarray, a: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        n = raw.shape[0]
+        row_min = a.min(axis=1, keepdims=True)
+        bins = np.where(valid, (raw - np.where(np.isfinite(row_min), row_min, 0.0)) // self.bin_size, -1).astype(np.intp)
+        num_bins = int(min(bins.max() + 1, _MAX_BINS)) if valid.any() else 1
+        counted = valid & (bins < num_bins)
+        rows = np.broadcast_to(np.arange(n)[:, None], bins.shape)
+        counts = np.bincount((rows * num_bins + bins)[counted], minlength=n * num_bins).reshape(n, num_bins)
+        mode = counts.argmax(axis=1)
+        in_mode = counted & (bins == mode[:, None])
+        return np.where(in_mode, raw, 0.0).sum(axis=1) / np.maximum(in_mode.sum(axis=1), 1)
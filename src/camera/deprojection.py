@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# Models that RealSense reports for D4xx color/depth streams. Anything else is
+# treated as an ideal pinhole.
+_BROWN_CONRADY = "brown_conrady"
+_MODIFIED_BROWN_CONRADY = "modified_brown_conrady"
+_INVERSE_BROWN_CONRADY = "inverse_brown_conrady"
+_UNDISTORT_ITERATIONS = 10
+
+
+def intrinsics_to_dict(intr, depth_scale: float) -> dict:
+    """Convert a ``pyrealsense2.intrinsics`` into the dict used across the app."""
+    model = str(intr.model).split(".")[-1].lower()
+    return {
+        "fx": float(intr.fx),
+        "fy": float(intr.fy),
+        "ppx": float(intr.ppx),
+        "ppy": float(intr.ppy),
+        "width": int(intr.width),
+        "height": int(intr.height),
+        "depth_scale": float(depth_scale),
+        "model": model,
+        "coeffs": [float(c) for c in intr.coeffs],
+    }
+
+
+def _undistort(x: np.ndarray, y: np.ndarray, model: str, c: Tuple[float, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    # Fixed-point iteration, mirrors rs2_deproject_pixel_to_point
+    xo, yo = x, y
+    for _ in range(_UNDISTORT_ITERATIONS):
+        r2 = x * x + y * y
+        icdist = 1.0 / (1.0 + ((c[4] * r2 + c[1]) * r2 + c[0]) * r2)
+        if model in (_MODIFIED_BROWN_CONRADY, _INVERSE_BROWN_CONRADY):
+            xq = x / icdist
+            yq = y / icdist
+        else:
+            xq, yq = x, y
+        delta_x = 2 * c[2] * xq * yq + c[3] * (r2 + 2 * xq * xq)
+        delta_y = 2 * c[3] * xq * yq + c[2] * (r2 + 2 * yq * yq)
+        x = (xo - delta_x) * icdist
+        y = (yo - delta_y) * icdist
+    return x, y
+
+
+def _distort(x: np.ndarray, y: np.ndarray, model: str, c: Tuple[float, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    # Mirrors rs2_project_point_to_pixel; the inverse of _undistort
+    r2 = x * x + y * y
+    f = 1 + c[0] * r2 + c[1] * r2 * r2 + c[4] * r2 * r2 * r2
+    if model in (_MODIFIED_BROWN_CONRADY, _INVERSE_BROWN_CONRADY):
+        # Tangential terms on the radially distorted coordinates
+        x = x * f
+        y = y * f
+        return x + 2 * c[2] * x * y + c[3] * (r2 + 2 * x * x), y + 2 * c[3] * x * y + c[2] * (r2 + 2 * y * y)
+    if model == _BROWN_CONRADY:
+        # Tangential terms on the undistorted coordinates
+        return (
+            x * f + 2 * c[2] * x * y + c[3] * (r2 + 2 * x * x),
+            y * f + 2 * c[3] * x * y + c[2] * (r2 + 2 * y * y),
+        )
+    return x, y
+
+
+def project_points(px: np.ndarray, py: np.ndarray, pz: np.ndarray, intrinsics: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Project camera-frame points to (sub)pixel coordinates (u, v), applying the stream's lens distortion."""
+    x = px / pz
+    y = py / pz
+    coeffs = tuple(float(c) for c in intrinsics.get("coeffs") or ()) + (0.0,) * 5
+    if any(coeffs):
+        x, y = _distort(x, y, str(intrinsics.get("model", "none")), coeffs[:5])
+    return x * intrinsics["fx"] + intrinsics["ppx"], y * intrinsics["fy"] + intrinsics["ppy"]
+
+
+class RayTable:
+    """Per-pixel normalized rays (x/z, y/z) for one stream profile.
+
+    Built once (H x W x 2 float32, distortion already removed) so that
+    deprojecting any set of pixels is a gather plus a multiply by depth.
+    """
+
+    def __init__(self, width: int, height: int, fx: float, fy: float, ppx: float, ppy: float,
+                 model: str = "none", coeffs: Tuple[float, ...] = (0.0, 0.0, 0.0, 0.0, 0.0)) -> None:
+        self.width = int(width)
+        self.height = int(height)
+        self.model = model
+
+        u = np.arange(self.width, dtype=np.float64)
+        v = np.arange(self.height, dtype=np.float64)
+        x = np.broadcast_to((u - ppx) / fx, (self.height, self.width))
+        y = np.broadcast_to(((v - ppy) / fy)[:, None], (self.height, self.width))
+        if model in (_BROWN_CONRADY, _MODIFIED_BROWN_CONRADY, _INVERSE_BROWN_CONRADY) and any(coeffs):
+            x, y = _undistort(x, y, model, tuple(float(c) for c in coeffs))
+
+        rays = np.empty((self.height, self.width, 2), dtype=np.float32)
+        rays[..., 0] = x
+        rays[..., 1] = y
+        self.rays = rays
+
+    def deproject(self, u: np.ndarray, v: np.ndarray, z_m: np.ndarray) -> np.ndarray:
+        """Deproject pixel coordinates with metric depth ``z_m`` into N x 3 camera XYZ."""
+        u = np.clip(np.asarray(u, dtype=np.intp), 0, self.width - 1)
+        v = np.clip(np.asarray(v, dtype=np.intp), 0, self.height - 1)
+        z = np.asarray(z_m, dtype=np.float32)
+        out = np.empty(u.shape + (3,), dtype=np.float32)
+        out[..., :2] = self.rays[v, u] * z[..., None]
+        out[..., 2] = z
+        return out
+
+
+@lru_cache(maxsize=8)
+def _cached_table(key: tuple) -> RayTable:
+    width, height, fx, fy, ppx, ppy, model, coeffs = key
+    return RayTable(width, height, fx, fy, ppx, ppy, model, coeffs)
+
+
+def get_ray_table(intrinsics: dict, shape: Optional[Tuple[int, int]] = None) -> RayTable:
+    """Return the cached :class:`RayTable` for an intrinsics dict.
+
+    ``shape`` (H, W) is only used when the dict lacks ``width``/``height``
+    (e.g. hand-written replay metadata).
+    """
+    width = intrinsics.get("width", shape[1] if shape else None)
+    height = intrinsics.get("height", shape[0] if shape else None)
+    if width is None or height is None:
+        raise ValueError("intrinsics need width/height to build a ray table")
+    coeffs = tuple(float(c) for c in intrinsics.get("coeffs", ())) + (0.0,) * 5
+    key = (
+        int(width),
+        int(height),
+        float(intrinsics["fx"]),
+        float(intrinsics["fy"]),
+        float(intrinsics["ppx"]),
+        float(intrinsics["ppy"]),
+        str(intrinsics.get("model", "none")),
+        coeffs[:5],
+    )
+    return _cached_table(key)
+
+
+def deproject_pixels(
+    depth: np.ndarray,
+    u: np.ndarray,
+    v: np.ndarray,
+    intrinsics: dict,
+    raw_depth: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Gather raw depth at integer pixels (u, v) and deproject to N x 3 meters.
+
+    Pixels outside the image get depth 0 (and thus XYZ 0), matching the
+    behaviour of the original per-detection loop. ``raw_depth`` (same shape
+    as ``u``, z16 units) replaces the gather with depths estimated elsewhere,
+    e.g. by :class:`camera.box_depth.BoxDepthEstimator`.
+    """
+    u = np.asarray(u, dtype=np.intp)
+    v = np.asarray(v, dtype=np.intp)
+    if raw_depth is None:
+        inside = (u >= 0) & (u < depth.shape[1]) & (v >= 0) & (v < depth.shape[0])
+        raw = np.zeros(u.shape, dtype=np.float32)
+        raw[inside] = depth[v[inside], u[inside]]
+    else:
+        raw = np.asarray(raw_depth, dtype=np.float32).reshape(u.shape)
+    z = raw * np.float32(intrinsics.get("depth_scale", 0.001))
+    return get_ray_table(intrinsics, depth.shape[:2]).deproject(u, v, z)
+
+
+def deproject_and_transform(
+    depth: np.ndarray,
+    u: np.ndarray,
+    v: np.ndarray,
+    intrinsics: dict,
+    transform=None,
+    raw_depth: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Camera- and robot-frame XYZ for all pixels (u, v) at once.
+
+    ``u``/``v`` may be box centers (N,) or several sample points per box
+    (N, K); outputs have shape ``u.shape + (3,)``. One depth gather, one
+    ray-table deprojection and one matrix product against ``transform`` (a
+    :class:`utils.geometry.RigidTransform`, validated once at startup). The
+    robot-frame result is NaN when no transform is given. ``raw_depth`` is
+    passed through to :func:`deproject_pixels`.
+    """
+    xyz = deproject_pixels(depth, u, v, intrinsics, raw_depth).astype(np.float64)
+    if transform is None:
+        return xyz, np.full_like(xyz, np.nan)
+    return xyz, transform.apply(xyz)
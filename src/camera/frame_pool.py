@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from functools import partial
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .realsense_camera import FrameData
+
+
+class FramePool:
+    """Fixed set of preallocated color/depth buffers recycled by explicit release.
+
+    ``acquire()`` hands out a free slot as a :class:`FrameData` whose arrays
+    are owned by the pool; the borrower calls ``frame.release()`` once it is
+    done with them. When every slot is borrowed, ``acquire()`` blocks, so a
+    slow consumer applies backpressure instead of growing memory. Buffers are
+    allocated on the first acquire (or when the stream shape changes), after
+    which steady-state allocation is zero.
+    """
+
+    def __init__(self, size: int = 4) -> None:
+        if size < 1:
+            raise ValueError("FramePool needs at least 1 slot")
+        self.size = int(size)
+        self._colors: List[np.ndarray] = []
+        self._depths: List[Optional[np.ndarray]] = []
+        self._free: List[int] = []
+        self._cond = threading.Condition()
+        self._layout: Optional[tuple] = None
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self.size - len(self._free) if self._layout is not None else 0
+
+    def _allocate(self, layout: tuple) -> None:
+        color_shape, color_dtype, depth_shape, depth_dtype = layout
+        self._colors = [np.empty(color_shape, dtype=color_dtype) for _ in range(self.size)]
+        self._depths = [
+            None if depth_shape is None else np.empty(depth_shape, dtype=depth_dtype) for _ in range(self.size)
+        ]
+        self._free = list(range(self.size))
+        self._layout = layout
+
+    def acquire(
+        self,
+        color_shape: Tuple[int, ...],
+        color_dtype=np.uint8,
+        depth_shape: Optional[Tuple[int, ...]] = None,
+        depth_dtype=np.uint16,
+        timeout: Optional[float] = None,
+    ) -> FrameData:
+        """Borrow a free slot, waiting up to ``timeout`` seconds for one.
+
+        Raises ``TimeoutError`` when no slot was released in time.
+        """
+        layout = (tuple(color_shape), np.dtype(color_dtype), None if depth_shape is None else tuple(depth_shape), np.dtype(depth_dtype))
+        with self._cond:
+            if self._layout != layout:
+                # Reallocate only once every borrowed slot has come back
+                if self._layout is not None and not self._cond.wait_for(lambda: len(self._free) == self.size, timeout=timeout):
+                    raise TimeoutError("FramePool slots still borrowed while the stream layout changed")
+                self._allocate(layout)
+            if not self._cond.wait_for(lambda: bool(self._free), timeout=timeout):
+                raise TimeoutError(f"FramePool exhausted ({self.size} slots borrowed); frames must be release()d")
+            idx = self._free.pop()
+        return FrameData(
+            color=self._colors[idx],
+            depth=self._depths[idx],
+            intrinsics=None,
+            release_fn=partial(self._release, idx, self._colors[idx]),
+        )
+
+    def _release(self, idx: int, color: np.ndarray) -> None:
+        with self._cond:
+            # Ignore stale releases for buffers from before a reallocation
+            if idx < len(self._colors) and self._colors[idx] is color and idx not in self._free:
+                self._free.append(idx)
+                self._cond.notify_all()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+from .realsense_camera import FrameData
+
+
+class FrameRing:
+    """Bounded ring of preallocated FrameData slots with a drop-oldest policy.
+
+    The producer copies each incoming frame into the oldest slot that is not
+    currently borrowed by the consumer, so a slow consumer never blocks capture
+    and memory use stays fixed. The consumer always gets the freshest frame.
+    Ring slots own their arrays, so ``release()`` on them is a no-op.
+    """
+
+    def __init__(self, size: int = 4) -> None:
+        if size < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self.size = int(size)
+        self._slots: List[FrameData] = []
+        self._seq = [-1] * self.size
+        self._cond = threading.Condition()
+        self._next_seq = 0
+        self._borrowed = -1
+        self._taken = -1
+        self.dropped = 0
+
+    def _allocate(self, frame: FrameData) -> None:
+        for _ in range(self.size):
+            depth = None if frame.depth is None else np.empty_like(frame.depth)
+            self._slots.append(FrameData(color=np.empty_like(frame.color), depth=depth, intrinsics=None))
+
+    def push(self, frame: FrameData) -> None:
+        with self._cond:
+            if not self._slots:
+                self._allocate(frame)
+            # oldest slot that the consumer is not holding
+            idx = min(
+                (i for i in range(self.size) if i != self._borrowed),
+                key=lambda i: self._seq[i],
+            )
+            slot = self._slots[idx]
+            if self._seq[idx] > self._taken:
+                self.dropped += 1
+            # Mark the slot invalid while it is being rewritten
+            self._seq[idx] = -1
+
+        np.copyto(slot.color, frame.color)
+        if frame.depth is not None and slot.depth is not None and slot.depth.shape == frame.depth.shape:
+            np.copyto(slot.depth, frame.depth)
+        else:
+            slot.depth = None if frame.depth is None else frame.depth.copy()
+        slot.intrinsics = frame.intrinsics
+        slot.timestamp_ms = frame.timestamp_ms
+        slot.frame_number = frame.frame_number
+        slot.aligner = frame.aligner
+
+        with self._cond:
+            self._seq[idx] = self._next_seq
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    def latest(self, newer_than: int = -1, timeout: Optional[float] = None) -> Optional[tuple[int, FrameData]]:
+        """Borrow the freshest frame with a sequence number above ``newer_than``.
+
+        The returned slot stays pinned until the next call, so it is safe to
+        read while the producer keeps writing into the other slots.
+        """
+        with self._cond:
+            def _ready() -> bool:
+                return max(self._seq) > newer_than
+
+            if not self._cond.wait_for(_ready, timeout=timeout):
+                return None
+            idx = max(range(self.size), key=lambda i: self._seq[i])
+            self._borrowed = idx
+            self._taken = self._seq[idx]
+            return self._seq[idx], self._slots[idx]
+
+    def release(self) -> None:
+        with self._cond:
+            self._borrowed = -1
+
+
+class ThreadedCamera:
+    """Runs a camera source's ``frames()`` generator on a background thread.
+
+    Capture (and alignment) then overlaps with inference in the main loop,
+    which always receives the most recent frame from a :class:`FrameRing`.
+    ``on_frame`` is called on the capture thread with every captured frame
+    before it enters the ring, so consumers that need each frame (recording)
+    see the ones the ring later drops.
+    """
+
+    def __init__(
+        self,
+        source,
+        ring_size: int = 4,
+        logger=None,
+        poll_timeout_s: float = 1.0,
+        on_frame: Optional[Callable[[FrameData], None]] = None,
+    ) -> None:
+        self.source = source
+        self.logger = logger
+        self.poll_timeout_s = poll_timeout_s
+        self.on_frame = on_frame
+        self._ring = FrameRing(ring_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._done = False
+        self._last_seq = -1
+
+    @property
+    def dropped(self) -> int:
+        return self._ring.dropped
+
+    def start(self) -> None:
+        self.source.start()
+        self._stop.clear()
+        self._error = None
+        self._done = False
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self._thread.start()
+        if self.logger:
+            self.logger.info(f"Threaded capture started (ring_size={self._ring.size})")
+
+    def _run(self) -> None:
+        try:
+            for frame in self.source.frames():
+                if self._stop.is_set():
+                    break
+                if self.on_frame is not None:
+                    self.on_frame(frame)
+                self._ring.push(frame)
+                frame.release()
+        except BaseException as e:  # surfaced to the consumer in frames()
+            if not self._stop.is_set():
+                self._error = e
+        finally:
+            self._done = True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.source.stop()
+        if self.logger and self._ring.dropped:
+            self.logger.info(f"Threaded capture dropped {self._ring.dropped} stale frames")
+
+    def latest(self) -> Optional[FrameData]:
+        """Non-blocking accessor for the freshest captured frame (or None).
+
+        Like ``frames()``, the returned slot is borrowed until the next call;
+        the ring assumes a single consumer.
+        """
+        item = self._ring.latest(newer_than=-1, timeout=0)
+        if item is None:
+            return None
+        self._last_seq = max(self._last_seq, item[0])
+        return item[1]
+
+    def next_frame(self) -> Optional[FrameData]:
+        """Block until a frame newer than the last one handed out is available.
+
+        Returns None once the source is exhausted; capture errors are re-raised.
+        """
+        if self._thread is None:
+            raise RuntimeError("Camera not started")
+
+        while True:
+            item = self._ring.latest(newer_than=self._last_seq, timeout=self.poll_timeout_s)
+            if item is None:
+                if self._error is not None:
+                    raise self._error
+                if self._done:
+                    # One last look: the final push may have landed after the wait
+                    item = self._ring.latest(newer_than=self._last_seq, timeout=0)
+                    if item is None:
+                        return None
+                else:
+                    continue
+            self._last_seq, frame = item
+            return frame
+
+    def frames(self) -> Iterator[FrameData]:
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Optional
+
+from .frame_ring import ThreadedCamera
+from .realsense_camera import FrameData
+
+
+class MultiCameraRig:
+    """Captures several cameras in parallel and yields timestamp-matched sets.
+
+    Every camera runs on its own capture thread (:class:`ThreadedCamera`).
+    ``frames()`` yields one ``FrameData`` per camera, in configuration order,
+    whose timestamps lie within ``sync_tolerance_ms`` of each other. When the
+    set is out of sync, the camera holding the oldest frame is advanced.
+    For cross-device matching the RealSense global timestamp (host-clock
+    domain, the librealsense default) should be left enabled.
+    """
+
+    def __init__(self, cameras: List, sync_tolerance_ms: float = 20.0, ring_size: int = 4, logger=None) -> None:
+        if not cameras:
+            raise ValueError("MultiCameraRig needs at least one camera")
+        self.cameras = [
+            cam if isinstance(cam, ThreadedCamera) else ThreadedCamera(cam, ring_size=ring_size, logger=logger)
+            for cam in cameras
+        ]
+        self.sync_tolerance_ms = float(sync_tolerance_ms)
+        self.logger = logger
+        self.resyncs = 0
+
+    def __len__(self) -> int:
+        return len(self.cameras)
+
+    def start(self) -> None:
+        started = []
+        try:
+            for cam in self.cameras:
+                cam.start()
+                started.append(cam)
+        except Exception:
+            for cam in started:
+                cam.stop()
+            raise
+        if self.logger:
+            self.logger.info(f"Multi-camera rig started ({len(self.cameras)} cameras, tolerance={self.sync_tolerance_ms} ms)")
+
+    def stop(self) -> None:
+        for cam in self.cameras:
+            try:
+                cam.stop()
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Camera stop failed: {e}")
+
+    def frames(self) -> Iterator[List[FrameData]]:
+        current: List[Optional[FrameData]] = [cam.next_frame() for cam in self.cameras]
+        while all(f is not None for f in current):
+            stamps = [f.timestamp_ms for f in current]  # type: ignore[union-attr]
+            if any(ts is None for ts in stamps) or max(stamps) - min(stamps) <= self.sync_tolerance_ms:
+                yield list(current)  # type: ignore[arg-type]
+                current = [cam.next_frame() for cam in self.cameras]
+                continue
+            # Advance the camera that is furthest behind
+            lag = min(range(len(stamps)), key=lambda i: stamps[i])
+            current[lag] = self.cameras[lag].next_frame()
+            self.resyncs += 1
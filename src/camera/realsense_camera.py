@@ -1,17 +1,33 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
-from typing import Iterator, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional, Tuple
 
 import numpy as np
 
+from .deprojection import get_ray_table, intrinsics_to_dict
+from .roi_align import RoiDepthAligner, extrinsics_to_dict
+
 
 @dataclass
 class FrameData:
     color: np.ndarray
     depth: Optional[np.ndarray]
     intrinsics: Optional[dict]
+    timestamp_ms: Optional[float] = None
+    frame_number: Optional[int] = None
+    # Set when ``depth`` is still in depth-sensor geometry (align_mode="roi");
+    # call ``aligner.align_rois()``/``align_full()`` to get color-aligned depth.
+    aligner: Optional[Any] = None
+    # Set on frames borrowed from a ``FramePool``; see ``release()``.
+    release_fn: Optional[Callable[[], None]] = field(default=None, repr=False, compare=False)
+
+    def release(self) -> None:
+        """Return pooled buffers to their pool; a no-op for frames that own their arrays."""
+        fn, self.release_fn = self.release_fn, None
+        if fn is not None:
+            fn()
 
 
 class RealSenseCamera:
@@ -25,6 +41,9 @@ class RealSenseCamera:
         depth_height: int,
         depth_fps: int,
         align_to_color: bool = True,
+        align_mode: str = "full",
+        pool_size: int = 4,
+        pool_timeout_s: float = 5.0,
         logger=None,
     ) -> None:
         self.serial = serial or ""
@@ -35,6 +54,11 @@ class RealSenseCamera:
         self.depth_height = depth_height
         self.depth_fps = depth_fps
         self.align_to_color = align_to_color
+        self.align_mode = align_mode.strip().lower()
+        if self.align_mode not in {"full", "roi"}:
+            raise ValueError(f"Unknown align_mode: {align_mode}")
+        self.pool_size = int(pool_size)
+        self.pool_timeout_s = float(pool_timeout_s)
         self.logger = logger
 
         self._pipeline = None
@@ -42,9 +66,13 @@ class RealSenseCamera:
         self._colorizer = None
         self._depth_scale = None
         self._profile = None
+        self._intrinsics: Optional[dict] = None
+        self._roi_aligner: Optional[RoiDepthAligner] = None
+        self._pool = None
 
     def start(self) -> None:
         rs = self._import_pyrealsense2()
+        from .frame_pool import FramePool  # frame_pool imports FrameData from this module
 
         pipeline = rs.pipeline()
         config = rs.config()
@@ -58,12 +86,26 @@ class RealSenseCamera:
         self._depth_scale = float(depth_sensor.get_depth_scale())
 
         self._pipeline = pipeline
-        if self.align_to_color:
+        self._pool = FramePool(self.pool_size)
+
+        # Intrinsics are fixed for the lifetime of the stream profile
+        color_profile = self._profile.get_stream(rs.stream.color).as_video_stream_profile()
+        self._intrinsics = intrinsics_to_dict(color_profile.get_intrinsics(), self._depth_scale)
+        get_ray_table(self._intrinsics)
+
+        if self.align_to_color and self.align_mode == "roi":
+            depth_profile = self._profile.get_stream(rs.stream.depth).as_video_stream_profile()
+            self._roi_aligner = RoiDepthAligner(
+                depth_intrinsics=intrinsics_to_dict(depth_profile.get_intrinsics(), self._depth_scale),
+                color_intrinsics=self._intrinsics,
+                depth_to_color=extrinsics_to_dict(depth_profile.get_extrinsics_to(color_profile)),
+            )
+        elif self.align_to_color:
             self._align = rs.align(rs.stream.color)
 
         if self.logger:
             self.logger.info(
-                f"RealSense started (serial={self.serial or 'auto'}) color={self.color_width}x{self.color_height}@{self.color_fps} depth={self.depth_width}x{self.depth_height}@{self.depth_fps} scale={self._depth_scale}"
+                f"RealSense started (serial={self.serial or 'auto'}) color={self.color_width}x{self.color_height}@{self.color_fps} depth={self.depth_width}x{self.depth_height}@{self.depth_fps} scale={self._depth_scale} align={self.align_mode if self.align_to_color else 'off'}"
             )
 
     @staticmethod
@@ -103,10 +145,11 @@ class RealSenseCamera:
         if self._pipeline is not None:
             self._pipeline.stop()
             self._pipeline = None
+        self._intrinsics = None
+        self._roi_aligner = None
+        self._pool = None
 
     def frames(self) -> Iterator[FrameData]:
-        import pyrealsense2 as rs
-
         if self._pipeline is None:
             raise RuntimeError("Camera not started")
 
@@ -123,18 +166,17 @@ class RealSenseCamera:
             color = np.asanyarray(color_frame.get_data())
             depth = np.asanyarray(depth_frame.get_data())
 
-            intr = color_frame.profile.as_video_stream_profile().intrinsics
-            intrinsics = {
-                "fx": float(intr.fx),
-                "fy": float(intr.fy),
-                "ppx": float(intr.ppx),
-                "ppy": float(intr.ppy),
-                "width": int(intr.width),
-                "height": int(intr.height),
-                "depth_scale": float(self._depth_scale),
-            }
+            # Copy into a pooled slot so the librealsense frames go back to the SDK right away
+            frame = self._pool.acquire(color.shape, color.dtype, depth.shape, depth.dtype, timeout=self.pool_timeout_s)
+            np.copyto(frame.color, color)
+            np.copyto(frame.depth, depth)
+            frame.intrinsics = self._intrinsics
+            frame.timestamp_ms = float(frames.get_timestamp())
+            frame.frame_number = int(frames.get_frame_number())
+            frame.aligner = self._roi_aligner
+            del color, depth, color_frame, depth_frame, frames
 
-            yield FrameData(color=color, depth=depth, intrinsics=intrinsics)
+            yield frame
 
     @staticmethod
     def depth_to_xyz(
@@ -143,14 +185,14 @@ class RealSenseCamera:
         depth_value: float,
         intrinsics: dict,
     ) -> Tuple[float, float, float]:
-        fx = intrinsics["fx"]
-        fy = intrinsics["fy"]
-        ppx = intrinsics["ppx"]
-        ppy = intrinsics["ppy"]
         scale = intrinsics.get("depth_scale", 0.001)
         z = depth_value * scale
-        x = (u - ppx) / fx * z
-        y = (v - ppy) / fy * z
-        return x, y, z
+        table = get_ray_table(intrinsics)
+        if 0 <= u < table.width and 0 <= v < table.height:
+            rx, ry = table.rays[int(v), int(u)]
+        else:
+            rx = (u - intrinsics["ppx"]) / intrinsics["fx"]
+            ry = (v - intrinsics["ppy"]) / intrinsics["fy"]
+        return float(rx * z), float(ry * z), float(z)
 
 
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .realsense_camera import FrameData
+
+
+SESSION_FILE = "session.json"
+INDEX_FILE = "index.bin"
+INTRINSICS_FILE = "intrinsics.json"
+
+# One fixed-size record per frame; the reader memory-maps the whole file.
+INDEX_DTYPE = np.dtype(
+    [
+        ("frame_number", "<i8"),
+        ("timestamp_ms", "<f8"),
+        ("segment", "<i4"),
+        ("slot", "<i4"),
+        ("intrinsics_id", "<i4"),
+    ]
+)
+
+
+def _segment_path(root: Path, kind: str, segment: int) -> Path:
+    return root / f"{kind}_{segment:05d}.npy"
+
+
+class FrameRecorder:
+    """Records color + z16 depth into preallocated memory-mapped segment files.
+
+    Each segment holds ``frames_per_segment`` frames as one ``.npy`` array per
+    stream, created up front with ``open_memmap``. ``write()`` copies the
+    frame's numpy buffers straight into the mapped pages (no encoding or
+    intermediate buffers); creating the next segment, appending the index and
+    flushing run on a background thread so the realtime loop never waits on
+    disk I/O.
+    """
+
+    def __init__(self, path: str, frames_per_segment: int = 300, logger=None) -> None:
+        self.path = Path(path)
+        self.frames_per_segment = int(frames_per_segment)
+        self.logger = logger
+
+        self._color_seg: Optional[np.ndarray] = None
+        self._depth_seg: Optional[np.ndarray] = None
+        self._next: Optional[tuple] = None
+        self._next_ready = threading.Event()
+        self._segment = -1
+        self._slot = 0
+        self._count = 0
+        self._meta: Optional[dict] = None
+
+        self._intrinsics: List[dict] = []
+        self._last_intr: Optional[dict] = None
+        self._last_intr_id = -1
+        self._pending = np.zeros(64, dtype=INDEX_DTYPE)
+        self._pending_n = 0
+
+        self._tasks: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def frames_written(self) -> int:
+        return self._count
+
+    def start(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / INDEX_FILE).touch()
+        self._worker = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+        self._worker.start()
+        if self.logger:
+            self.logger.info(f"Recording to {self.path} ({self.frames_per_segment} frames/segment)")
+
+    def _run(self) -> None:
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            try:
+                task()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Recorder background task failed: {e}")
+
+    def _open_segment(self, segment: int) -> tuple:
+        assert self._meta is not None
+        n = self.frames_per_segment
+        color = np.lib.format.open_memmap(
+            _segment_path(self.path, "color", segment),
+            mode="w+",
+            dtype=np.dtype(self._meta["color_dtype"]),
+            shape=(n, *self._meta["color_shape"]),
+        )
+        depth = None
+        if self._meta["depth_shape"] is not None:
+            depth = np.lib.format.open_memmap(
+                _segment_path(self.path, "depth", segment),
+                mode="w+",
+                dtype=np.dtype(self._meta["depth_dtype"]),
+                shape=(n, *self._meta["depth_shape"]),
+            )
+        return color, depth
+
+    def _prepare_next(self, segment: int) -> None:
+        def task() -> None:
+            self._next = self._open_segment(segment)
+            self._next_ready.set()
+
+        self._next_ready.clear()
+        self._tasks.put(task)
+
+    def _init_session(self, frame: FrameData) -> None:
+        self._meta = {
+            "version": 1,
+            "frames_per_segment": self.frames_per_segment,
+            "color_shape": list(frame.color.shape),
+            "color_dtype": frame.color.dtype.str,
+            "depth_shape": None if frame.depth is None else list(frame.depth.shape),
+            "depth_dtype": None if frame.depth is None else frame.depth.dtype.str,
+            "created": time.time(),
+        }
+        (self.path / SESSION_FILE).write_text(json.dumps(self._meta, indent=2))
+        self._color_seg, self._depth_seg = self._open_segment(0)
+        self._segment = 0
+        self._prepare_next(1)
+
+    def _rollover(self) -> None:
+        old_color, old_depth = self._color_seg, self._depth_seg
+        self._tasks.put(lambda: (old_color.flush(), old_depth is not None and old_depth.flush()))
+        self._flush_index()
+        # Normally long done: the next segment was requested a whole segment ago
+        self._next_ready.wait()
+        assert self._next is not None
+        self._color_seg, self._depth_seg = self._next
+        self._next = None
+        self._segment += 1
+        self._slot = 0
+        self._prepare_next(self._segment + 1)
+
+    def _intrinsics_id(self, intr: Optional[dict]) -> int:
+        if intr is None:
+            return -1
+        if intr is self._last_intr:
+            return self._last_intr_id
+        try:
+            idx = self._intrinsics.index(intr)
+        except ValueError:
+            self._intrinsics.append(dict(intr))
+            idx = len(self._intrinsics) - 1
+            snapshot = json.dumps(self._intrinsics, indent=2)
+            self._tasks.put(lambda: (self.path / INTRINSICS_FILE).write_text(snapshot))
+        self._last_intr, self._last_intr_id = intr, idx
+        return idx
+
+    def _flush_index(self) -> None:
+        if self._pending_n == 0:
+            return
+        records = self._pending[: self._pending_n].copy()
+        self._pending_n = 0
+
+        def task() -> None:
+            with open(self.path / INDEX_FILE, "ab") as f:
+                records.tofile(f)
+
+        self._tasks.put(task)
+
+    def write(self, frame: FrameData) -> None:
+        if self._worker is None:
+            raise RuntimeError("Recorder not started")
+        if self._meta is None:
+            self._init_session(frame)
+        elif self._slot >= self.frames_per_segment:
+            self._rollover()
+
+        assert self._color_seg is not None
+        np.copyto(self._color_seg[self._slot], frame.color)
+        if self._depth_seg is not None and frame.depth is not None:
+            np.copyto(self._depth_seg[self._slot], frame.depth)
+
+        rec = self._pending[self._pending_n]
+        rec["frame_number"] = -1 if frame.frame_number is None else frame.frame_number
+        rec["timestamp_ms"] = time.time() * 1000.0 if frame.timestamp_ms is None else frame.timestamp_ms
+        rec["segment"] = self._segment
+        rec["slot"] = self._slot
+        rec["intrinsics_id"] = self._intrinsics_id(frame.intrinsics)
+        self._pending_n += 1
+        if self._pending_n == len(self._pending):
+            self._flush_index()
+
+        self._slot += 1
+        self._count += 1
+
+    def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._flush_index()
+        color, depth = self._color_seg, self._depth_seg
+        if color is not None:
+            self._tasks.put(lambda: (color.flush(), depth is not None and depth.flush()))
+        self._tasks.put(None)
+        self._worker.join()
+        self._worker = None
+        # Drop the spare segment that was preallocated but never used
+        if self._next is not None:
+            for kind in ("color", "depth"):
+                _segment_path(self.path, kind, self._segment + 1).unlink(missing_ok=True)
+            self._next = None
+        if self.logger:
+            self.logger.info(f"Recording stopped: {self._count} frames in {self.path}")
+
+
+class RecordingReader:
+    """Random access to a session written by :class:`FrameRecorder`.
+
+    Segment files are opened memory-mapped on first use, so reading frame
+    ``i`` touches only that frame's pages.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.meta = json.loads((self.path / SESSION_FILE).read_text())
+        index_path = self.path / INDEX_FILE
+        if index_path.stat().st_size:
+            self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode="r")
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        intr_path = self.path / INTRINSICS_FILE
+        self.intrinsics: List[dict] = json.loads(intr_path.read_text()) if intr_path.exists() else []
+        self._segments: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return int(self.index.shape[0])
+
+    @staticmethod
+    def is_session(path: str) -> bool:
+        return (Path(path) / SESSION_FILE).exists()
+
+    @property
+    def timestamps_ms(self) -> np.ndarray:
+        return np.asarray(self.index["timestamp_ms"])
+
+    def _segment(self, kind: str, segment: int) -> Optional[np.ndarray]:
+        key = (kind, segment)
+        arr = self._segments.get(key)
+        if arr is None:
+            p = _segment_path(self.path, kind, segment)
+            if not p.exists():
+                return None
+            arr = np.load(p, mmap_mode="r")
+            self._segments[key] = arr
+        return arr
+
+    def __getitem__(self, i: int) -> FrameData:
+        rec = self.index[i]
+        seg, slot = int(rec["segment"]), int(rec["slot"])
+        color = self._segment("color", seg)
+        assert color is not None
+        depth = self._segment("depth", seg)
+        intr_id = int(rec["intrinsics_id"])
+        return FrameData(
+            color=color[slot],
+            depth=None if depth is None else depth[slot],
+            intrinsics=self.intrinsics[intr_id] if 0 <= intr_id < len(self.intrinsics) else None,
+            timestamp_ms=float(rec["timestamp_ms"]),
+            frame_number=int(rec["frame_number"]),
+        )
+
+    def close(self) -> None:
+        self._segments.clear()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from .realsense_camera import FrameData
+from .recording import RecordingReader
+
+
+_INDEX_RE = re.compile(r"(\d+)")
+
+
+class ReplayCamera:
+    """Hardware-free camera source that replays recorded color+depth sequences.
+
+    Exposes the same ``start()/frames()/stop()`` contract and ``FrameData``
+    layout as :class:`RealSenseCamera`. Supported layouts under ``path``:
+
+    - a directory of pairs ``color_<n>.png|jpg`` + ``depth_<n>.npy|png``
+    - a memory-mapped container ``color.npy`` (N,H,W,3) + ``depth.npy`` (N,H,W)
+    - a session directory written by :class:`FrameRecorder`
+
+    The first two may carry a ``meta.json`` with ``intrinsics`` (same keys as the
+    RealSense dict) and ``timestamps_ms``. ``pacing="realtime"`` sleeps to
+    reproduce the recorded frame spacing; ``pacing="fast"`` replays as fast as
+    the consumer pulls.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        pacing: str = "realtime",
+        loop: bool = False,
+        fps: float = 30.0,
+        logger=None,
+    ) -> None:
+        self.path = Path(path)
+        self.pacing = pacing.strip().lower()
+        if self.pacing not in {"realtime", "fast"}:
+            raise ValueError(f"Unknown replay pacing: {pacing}")
+        self.loop = loop
+        self.fps = float(fps)
+        self.logger = logger
+
+        self._color_files: List[Path] = []
+        self._depth_files: List[Optional[Path]] = []
+        self._color_arr: Optional[np.ndarray] = None
+        self._depth_arr: Optional[np.ndarray] = None
+        self._reader: Optional[RecordingReader] = None
+        self._intrinsics: Optional[dict] = None
+        self._timestamps_ms: Optional[np.ndarray] = None
+        self._started = False
+
+    def __len__(self) -> int:
+        if self._reader is not None:
+            return len(self._reader)
+        if self._color_arr is not None:
+            return int(self._color_arr.shape[0])
+        return len(self._color_files)
+
+    def start(self) -> None:
+        if not self.path.is_dir():
+            raise FileNotFoundError(f"Replay path not found: {self.path}")
+
+        meta_path = self.path / "meta.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        self._intrinsics = meta.get("intrinsics")
+
+        if RecordingReader.is_session(str(self.path)):
+            self._reader = RecordingReader(str(self.path))
+            meta["timestamps_ms"] = self._reader.timestamps_ms
+            layout = "session"
+        elif (self.path / "color.npy").exists():
+            self._color_arr = np.load(self.path / "color.npy", mmap_mode="r")
+            depth_path = self.path / "depth.npy"
+            self._depth_arr = np.load(depth_path, mmap_mode="r") if depth_path.exists() else None
+            layout = "container"
+        else:
+            self._scan_pairs()
+            layout = "pairs"
+
+        n = len(self)
+        if n == 0:
+            raise RuntimeError(f"No frames found under {self.path}")
+
+        ts = meta.get("timestamps_ms")
+        if ts is not None and len(ts) >= n:
+            self._timestamps_ms = np.asarray(ts[:n], dtype=np.float64)
+        else:
+            self._timestamps_ms = np.arange(n, dtype=np.float64) * (1000.0 / self.fps)
+
+        self._started = True
+        if self.logger:
+            self.logger.info(f"Replay started ({layout}, {n} frames, pacing={self.pacing}) from {self.path}")
+
+    def _scan_pairs(self) -> None:
+        colors = {}
+        depths = {}
+        for p in self.path.iterdir():
+            m = _INDEX_RE.search(p.stem)
+            if m is None:
+                continue
+            idx = int(m.group(1))
+            if p.stem.startswith("color") and p.suffix.lower() in {".png", ".jpg", ".jpeg"}:
+                colors[idx] = p
+            elif p.stem.startswith("depth") and p.suffix.lower() in {".npy", ".png"}:
+                depths[idx] = p
+        order = sorted(colors)
+        self._color_files = [colors[i] for i in order]
+        self._depth_files = [depths.get(i) for i in order]
+
+    def stop(self) -> None:
+        self._started = False
+        self._color_arr = None
+        self._depth_arr = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _read(self, i: int) -> tuple[np.ndarray, Optional[np.ndarray], Optional[dict]]:
+        if self._reader is not None:
+            frame = self._reader[i]
+            return frame.color, frame.depth, frame.intrinsics
+        if self._color_arr is not None:
+            color = np.asarray(self._color_arr[i])
+            depth = None if self._depth_arr is None else np.asarray(self._depth_arr[i])
+            return color, depth, self._intrinsics
+
+        import cv2
+
+        color = cv2.imread(str(self._color_files[i]), cv2.IMREAD_COLOR)
+        if color is None:
+            raise RuntimeError(f"Failed to read {self._color_files[i]}")
+        depth_path = self._depth_files[i]
+        depth = None
+        if depth_path is not None:
+            if depth_path.suffix.lower() == ".npy":
+                depth = np.load(depth_path)
+            else:
+                depth = cv2.imread(str(depth_path), cv2.IMREAD_UNCHANGED)
+        return color, depth, self._intrinsics
+
+    def frames(self) -> Iterator[FrameData]:
+        if not self._started:
+            raise RuntimeError("Camera not started")
+
+        assert self._timestamps_ms is not None
+        n = len(self)
+        while True:
+            t0_wall = time.perf_counter()
+            t0_rec = float(self._timestamps_ms[0])
+            for i in range(n):
+                if not self._started:
+                    return
+                ts = float(self._timestamps_ms[i])
+                if self.pacing == "realtime":
+                    delay = (ts - t0_rec) / 1000.0 - (time.perf_counter() - t0_wall)
+                    if delay > 0:
+                        time.sleep(delay)
+                color, depth, intrinsics = self._read(i)
+                yield FrameData(
+                    color=color,
+                    depth=depth,
+                    intrinsics=intrinsics,
+                    timestamp_ms=ts,
+                    frame_number=i,
+                )
+            if not self.loop:
+                return
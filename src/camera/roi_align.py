@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .deprojection import get_ray_table, project_points
+
+
+# Largest color-pixel footprint a single depth pixel may cover; larger spans
+# only happen at depth discontinuities and are clipped like rs.align does.
+_MAX_SPAN = 4
+
+
+def extrinsics_to_dict(extr) -> dict:
+    """Convert a ``pyrealsense2.extrinsics`` (column-major rotation) into a dict."""
+    return {
+        "rotation": [float(r) for r in extr.rotation],
+        "translation": [float(t) for t in extr.translation],
+    }
+
+
+class RoiDepthAligner:
+    """Aligns raw depth into the color image only where it is needed.
+
+    Like ``rs.align(rs.stream.color)``, each depth pixel's footprint is
+    projected into color space and fills the color pixels whose centers it
+    covers; a z-buffer over all footprints keeps the nearest depth per pixel.
+    Only the depth pixels that can land inside the requested color ROIs are
+    processed. The result is
+    a color-sized z16 image that is valid inside the ROIs and zero elsewhere,
+    so callers keep indexing it like a fully aligned frame.
+    """
+
+    def __init__(
+        self,
+        depth_intrinsics: dict,
+        color_intrinsics: dict,
+        depth_to_color: dict,
+        depth_range_m: Tuple[float, float] = (0.1, 10.0),
+    ) -> None:
+        self.depth_intrinsics = depth_intrinsics
+        self.color_intrinsics = color_intrinsics
+        self.depth_scale = float(depth_intrinsics.get("depth_scale", 0.001))
+        self.depth_range_m = (float(depth_range_m[0]), float(depth_range_m[1]))
+
+        # rs extrinsics store the rotation column-major
+        self._R = np.asarray(depth_to_color["rotation"], dtype=np.float32).reshape(3, 3).T
+        self._t = np.asarray(depth_to_color["translation"], dtype=np.float32)
+        self._R_inv = self._R.T
+        self._t_inv = -self._R_inv @ self._t
+
+        self._depth_rays = get_ray_table(depth_intrinsics)
+        self._color_rays = get_ray_table(color_intrinsics)
+        self._out = np.zeros((int(color_intrinsics["height"]), int(color_intrinsics["width"])), dtype=np.uint16)
+        # align_full has its own buffer: the recorder may call it while another
+        # thread still reads the align_rois result
+        self._full_out: Optional[np.ndarray] = None
+        self._dirty: List[Tuple[int, int, int, int]] = []
+
+    def _clear(self) -> None:
+        for x0, y0, x1, y1 in self._dirty:
+            self._out[y0:y1, x0:x1] = 0
+        self._dirty.clear()
+
+    def _project_color(self, px: np.ndarray, py: np.ndarray, pz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return project_points(px, py, pz, self.color_intrinsics)
+
+    def _depth_window(self, x0: int, y0: int, x1: int, y1: int) -> Optional[Tuple[int, int, int, int]]:
+        """Depth-image window whose pixels can land inside color ROI [x0,x1) x [y0,y1)."""
+        us = np.array([x0, x1 - 1, x0, x1 - 1])
+        vs = np.array([y0, y0, y1 - 1, y1 - 1])
+        rays = self._color_rays.rays[vs, us]
+        di = self.depth_intrinsics
+        pts = []
+        for z in self.depth_range_m:
+            p = np.column_stack([rays * z, np.full(4, z, dtype=np.float32)])
+            pts.append(p @ self._R_inv.T + self._t_inv)
+        pts = np.concatenate(pts)
+        du, dv = project_points(pts[:, 0], pts[:, 1], pts[:, 2], di)
+        w, h = int(di["width"]), int(di["height"])
+        wx0 = max(int(np.floor(du.min())) - 2, 0)
+        wy0 = max(int(np.floor(dv.min())) - 2, 0)
+        wx1 = min(int(np.ceil(du.max())) + 3, w)
+        wy1 = min(int(np.ceil(dv.max())) + 3, h)
+        if wx0 >= wx1 or wy0 >= wy1:
+            return None
+        return wx0, wy0, wx1, wy1
+
+    def _splat(
+        self,
+        depth_raw: np.ndarray,
+        window: Tuple[int, int, int, int],
+        roi: Tuple[int, int, int, int],
+        out: np.ndarray,
+    ) -> None:
+        wx0, wy0, wx1, wy1 = window
+        rx0, ry0, rx1, ry1 = roi
+        d = depth_raw[wy0:wy1, wx0:wx1]
+        vs, us = np.nonzero(d)
+        if vs.size == 0:
+            return
+        raw = d[vs, us]
+        us = us + wx0
+        vs = vs + wy0
+        z = raw.astype(np.float32) * np.float32(self.depth_scale)
+
+        di = self.depth_intrinsics
+        ray = self._depth_rays.rays.reshape(-1, 2)[vs * depth_raw.shape[1] + us]
+        R, t = self._R, self._t
+        corners = []
+        for sign in (-0.5, 0.5):
+            x = (ray[:, 0] + np.float32(sign / di["fx"])) * z
+            y = (ray[:, 1] + np.float32(sign / di["fy"])) * z
+            px = R[0, 0] * x + R[0, 1] * y + R[0, 2] * z + t[0]
+            py = R[1, 0] * x + R[1, 1] * y + R[1, 2] * z + t[1]
+            pz = R[2, 0] * x + R[2, 1] * y + R[2, 2] * z + t[2]
+            cu, cv = self._project_color(px, py, pz)
+            corners.append((cu, cv))
+        # Cover the color pixels whose centers lie in the footprint [c0, c1)
+        (cu0, cv0), (cu1, cv1) = corners
+        cx0 = np.ceil(cu0).astype(np.int32)
+        cy0 = np.ceil(cv0).astype(np.int32)
+        cx1 = np.ceil(cu1).astype(np.int32) - 1
+        cy1 = np.ceil(cv1).astype(np.int32) - 1
+        cx0 = np.maximum(cx0, rx0)
+        cy0 = np.maximum(cy0, ry0)
+        cx1 = np.minimum(np.minimum(cx1, cx0 + _MAX_SPAN), rx1 - 1)
+        cy1 = np.minimum(np.minimum(cy1, cy0 + _MAX_SPAN), ry1 - 1)
+        keep = (cx0 <= cx1) & (cy0 <= cy1)
+        if not keep.any():
+            return
+
+        raw = raw[keep].astype(np.int64)
+        cx0, cy0, cx1, cy1 = (a[keep] for a in (cx0, cy0, cx1, cy1))
+        sx = cx1 - cx0
+        sy = cy1 - cy0
+        width = out.shape[1]
+        pix, vals = [], []
+        for dy in range(int(sy.max()) + 1):
+            for dx in range(int(sx.max()) + 1):
+                m = (dx <= sx) & (dy <= sy)
+                pix.append((cy0[m] + dy).astype(np.int64) * width + cx0[m] + dx)
+                vals.append(raw[m])
+
+        # Z-buffer over every footprint pixel: sort by (pixel, depth) and keep
+        # the first, i.e. nearest, depth per color pixel
+        key = np.sort((np.concatenate(pix) << 16) | np.concatenate(vals))
+        pixel = key >> 16
+        first = np.ones(key.size, dtype=bool)
+        first[1:] = pixel[1:] != pixel[:-1]
+        pixel = pixel[first]
+        nearest = (key[first] & 0xFFFF).astype(out.dtype)
+        # Overlapping ROIs splat into the same buffer; nearer depth wins there too
+        flat = out.reshape(-1)
+        current = flat[pixel]
+        flat[pixel] = np.where((current > 0) & (current < nearest), current, nearest)
+
+    def align_rois(self, depth_raw: np.ndarray, boxes: Iterable[Sequence[float]]) -> np.ndarray:
+        """Align depth inside each color-space box (x1, y1, x2, y2).
+
+        The returned array is reused across calls; copy it to keep it.
+        """
+        self._clear()
+        h, w = self._out.shape
+        for box in boxes:
+            x0 = max(int(box[0]), 0)
+            y0 = max(int(box[1]), 0)
+            x1 = min(int(box[2]) + 1, w)
+            y1 = min(int(box[3]) + 1, h)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            window = self._depth_window(x0, y0, x1, y1)
+            if window is None:
+                continue
+            roi = (x0, y0, x1, y1)
+            self._splat(depth_raw, window, roi, self._out)
+            self._dirty.append(roi)
+        return self._out
+
+    def align_full(self, depth_raw: np.ndarray) -> np.ndarray:
+        """Align the whole depth frame (for preview/recording).
+
+        Uses a buffer separate from :meth:`align_rois`, so a full-frame align
+        never overwrites ROI depth still in use; it is reused across calls.
+        """
+        if self._full_out is None:
+            self._full_out = np.zeros_like(self._out)
+        else:
+            self._full_out.fill(0)
+        h, w = self._full_out.shape
+        dh, dw = depth_raw.shape[:2]
+        self._splat(depth_raw, (0, 0, dw, dh), (0, 0, w, h), self._full_out)
+        return self._full_out
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from utils.detections import Detections
+
+
+class LatencyController:
+    """Picks a quality level from the rolling p95 of end-to-end latency against a budget.
+
+    Levels are ordered from highest quality (index 0) to cheapest. When the
+    p95 over the last ``window`` frames exceeds the budget, the controller
+    steps one level down; when it falls below ``up_ratio`` times the budget
+    it steps one level up. The gap between the two thresholds, a minimum of
+    ``hold_frames`` frames between changes and a fresh window after every
+    change keep it from oscillating.
+    """
+
+    def __init__(
+        self,
+        budget_ms: float,
+        num_levels: int,
+        window: int = 60,
+        up_ratio: float = 0.6,
+        hold_frames: int = 30,
+    ) -> None:
+        if num_levels < 1:
+            raise ValueError("LatencyController needs at least one level")
+        if not 0.0 < up_ratio < 1.0:
+            raise ValueError("up_ratio must be between 0 and 1")
+        self.budget_ms = float(budget_ms)
+        self.num_levels = int(num_levels)
+        self.up_ratio = float(up_ratio)
+        self.hold_frames = int(hold_frames)
+        self.level = 0
+        self._samples: deque = deque(maxlen=max(int(window), 2))
+        self._since_change = 0
+
+    @property
+    def p95_ms(self) -> float:
+        return float(np.percentile(self._samples, 95)) if self._samples else 0.0
+
+    def observe(self, latency_ms: float) -> int:
+        """Record one frame's latency; returns the level to use from now on."""
+        self._samples.append(float(latency_ms))
+        self._since_change += 1
+        if self._since_change < self.hold_frames or len(self._samples) < self._samples.maxlen // 2:
+            return self.level
+        p95 = self.p95_ms
+        if p95 > self.budget_ms and self.level < self.num_levels - 1:
+            self._change(self.level + 1)
+        elif p95 < self.up_ratio * self.budget_ms and self.level > 0:
+            self._change(self.level - 1)
+        return self.level
+
+    def _change(self, level: int) -> None:
+        self.level = level
+        self._since_change = 0
+        # Samples measured at the old level say nothing about the new one
+        self._samples.clear()
+
+
+class AdaptiveDetector:
+    """Switches between pre-loaded detector levels (input size and/or model) under a latency budget.
+
+    ``levels`` are ordered from highest quality to cheapest; every level is
+    loaded and warmed up in :meth:`load`, so a switch costs nothing at
+    runtime. The caller reports each frame's end-to-end latency to
+    :meth:`observe`. A job started with :meth:`begin` finishes on the level
+    it started on, so switching is safe with frames in flight.
+    """
+
+    def __init__(self, levels: Sequence, controller: LatencyController, labels: Optional[Sequence[str]] = None, logger=None) -> None:
+        if len(levels) != controller.num_levels:
+            raise ValueError("One controller level per detector level is required")
+        self.levels = list(levels)
+        self.labels = list(labels) if labels else [str(i) for i in range(len(levels))]
+        self.controller = controller
+        self.logger = logger
+
+    @property
+    def level(self) -> int:
+        return self.controller.level
+
+    def load(self) -> None:
+        for detector in self.levels:
+            detector.load()
+            blank = np.full((detector.imgsz, detector.imgsz, 3), 114, dtype=np.uint8)
+            for _ in range(2):
+                detector.infer(blank)
+
+    def observe(self, latency_ms: float) -> None:
+        before = self.controller.level
+        after = self.controller.observe(latency_ms)
+        if after != before and self.logger:
+            direction = "down" if after > before else "up"
+            self.logger.info(
+                f"Latency p95 vs {self.controller.budget_ms:.0f} ms budget: stepping {direction} "
+                f"to level {self.labels[after]}"
+            )
+
+    def infer(self, image_bgr: np.ndarray) -> Detections:
+        return self.levels[self.level].infer(image_bgr)
+
+    def infer_batch(self, images_bgr: List[np.ndarray], max_batch: Optional[int] = None) -> List[Detections]:
+        return self.levels[self.level].infer_batch(images_bgr, max_batch=max_batch)
+
+    def begin(self, images_bgr: List[np.ndarray], buffer: int = 0) -> tuple:
+        level = self.level
+        return level, self.levels[level].begin(images_bgr, buffer)
+
+    def forward(self, pending: tuple) -> tuple:
+        level, inner = pending
+        return level, self.levels[level].forward(inner)
+
+    def finish(self, pending: tuple) -> List[Detections]:
+        level, inner = pending
+        return self.levels[level].finish(inner)
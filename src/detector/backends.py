@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class InferenceBackend:
+    """Runs the network forward pass for :class:`DirectYoloEngine`.
+
+    The engine owns letterboxing and post-processing; a backend only maps a
+    preallocated NCHW input tensor (``dtype`` on ``device``, side a multiple
+    of ``stride``) to the raw ``(B, 4 + nc, anchors)`` prediction tensor.
+    ``max_batch`` is the largest batch it accepts (``None`` for no limit).
+    """
+
+    name = "base"
+    device: Any = None
+    dtype: Any = None
+    stride: int = 32
+    max_batch = None
+
+    def __call__(self, x):
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch forward of an ``nn.Module`` or a traced artifact (``model_cache.TracedModel``)."""
+
+    name = "torch"
+
+    def __init__(self, model, device, dtype=None, stride: int = 32) -> None:
+        self.model = model
+        self.device = device
+        self.dtype = dtype if dtype is not None else next(model.parameters()).dtype
+        self.stride = int(stride)
+
+    def __call__(self, x):
+        preds = self.model(x)
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        return preds
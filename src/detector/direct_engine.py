@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from utils.detections import Detections
+from .backends import InferenceBackend
+from .nms import batched_nms
+
+
+_PAD_VALUE = 114
+# Highest-scoring candidates kept ahead of NMS (same cap as Ultralytics' max_nms)
+_MAX_NMS = 30000
+
+
+class DirectYoloEngine:
+    """Lean YOLOv8 inference that calls the network forward directly.
+
+    Replaces ``YOLO.predict`` on the hot path: frames are letterboxed into a
+    preallocated host buffer at a fixed ``imgsz``, copied into a preallocated
+    input tensor, run once through an :class:`InferenceBackend` (PyTorch or
+    ONNX Runtime), and post-processed with
+    vectorized confidence filtering, one class-aware NMS call for the whole
+    batch and a single tensor op that maps boxes back to image coordinates.
+    No predictor, ``Results`` objects or per-box ``.item()`` calls are made.
+
+    :meth:`infer` runs the three steps back to back. A pipelined caller can
+    run :meth:`preprocess`, :meth:`forward` and :meth:`postprocess` on
+    different threads; ``buffers`` input buffer sets let the next batch be
+    letterboxed while the previous one is still in the forward pass.
+    """
+
+    def __init__(
+        self,
+        backend: InferenceBackend,
+        imgsz: int = 640,
+        max_batch: int = 1,
+        conf_threshold: float = 0.25,
+        iou_threshold: float = 0.45,
+        classes: Optional[Sequence[int]] = None,
+        max_det: int = 300,
+        names: Optional[Dict[int, str]] = None,
+        buffers: int = 1,
+    ) -> None:
+        import torch
+
+        stride = max(int(backend.stride), 32)
+        self.imgsz = int(np.ceil(imgsz / stride) * stride)
+        self.max_batch = max(1, int(max_batch))
+        if backend.max_batch is not None:
+            self.max_batch = min(self.max_batch, int(backend.max_batch))
+        self.conf_threshold = float(conf_threshold)
+        self.iou_threshold = float(iou_threshold)
+        self.max_det = int(max_det)
+        self.names = names or {}
+
+        self.backend = backend
+        self.device = device = backend.device
+        self.dtype = backend.dtype
+        self._classes = None if not classes else torch.tensor(list(classes), device=device)
+
+        self.buffers = max(1, int(buffers))
+        self._hosts: List[np.ndarray] = []
+        self._hosts_t = []
+        self._inputs = []
+        for _ in range(self.buffers):
+            host_t = torch.from_numpy(np.full((self.max_batch, self.imgsz, self.imgsz, 3), _PAD_VALUE, dtype=np.uint8))
+            if device.type == "cuda":
+                host_t = host_t.pin_memory()
+            self._hosts_t.append(host_t)
+            self._hosts.append(host_t.numpy())
+            self._inputs.append(torch.empty((self.max_batch, 3, self.imgsz, self.imgsz), dtype=self.dtype, device=device))
+        # Last letterbox geometry per buffer set and slot: (h, w, nh, nw, top, left)
+        self._geometry: List[List[Optional[Tuple[int, int, int, int, int, int]]]] = [
+            [None] * self.max_batch for _ in range(self.buffers)
+        ]
+        self._resized: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def _letterbox(self, buffer: int, slot: int, image: np.ndarray) -> Tuple[float, int, int]:
+        h, w = image.shape[:2]
+        gain = min(self.imgsz / h, self.imgsz / w)
+        nh, nw = int(round(h * gain)), int(round(w * gain))
+        top, left = (self.imgsz - nh) // 2, (self.imgsz - nw) // 2
+        geometry = (h, w, nh, nw, top, left)
+        dst = self._hosts[buffer][slot]
+        if self._geometry[buffer][slot] != geometry:
+            dst[...] = _PAD_VALUE
+            self._geometry[buffer][slot] = geometry
+        if (nh, nw) == (h, w):
+            np.copyto(dst[top:top + nh, left:left + nw], image)
+        else:
+            buf = self._resized.get((nh, nw))
+            if buf is None:
+                buf = self._resized[(nh, nw)] = np.empty((nh, nw, 3), dtype=np.uint8)
+            cv2.resize(image, (nw, nh), dst=buf, interpolation=cv2.INTER_LINEAR)
+            np.copyto(dst[top:top + nh, left:left + nw], buf)
+        return gain, left, top
+
+    def _preprocess(self, images: Sequence[np.ndarray], buffer: int = 0):
+        import torch
+
+        n = len(images)
+        params = np.empty((n, 5), dtype=np.float32)  # gain, left, top, w, h
+        for i, image in enumerate(images):
+            gain, left, top = self._letterbox(buffer, i, image)
+            params[i] = (gain, left, top, image.shape[1], image.shape[0])
+        src = self._hosts_t[buffer][:n].to(self.device, non_blocking=True)
+        # HWC BGR uint8 -> CHW RGB, scaled to [0, 1] in the model dtype
+        x = self._inputs[buffer][:n]
+        x.copy_(src.permute(0, 3, 1, 2).flip(1))
+        x.mul_(1.0 / 255.0)
+        return x, torch.from_numpy(params).to(self.device)
+
+    def _nms(self, preds, params, n: int):
+        import torch
+
+        preds = preds.transpose(1, 2).float()  # (B, anchors, 4 + nc)
+        scores, cls = preds[..., 4:].max(dim=-1)
+        mask = scores > self.conf_threshold
+        if self._classes is not None:
+            mask &= torch.isin(cls, self._classes)
+        batch_idx, anchor_idx = mask.nonzero(as_tuple=True)
+        if batch_idx.numel() == 0:
+            return None
+        if batch_idx.numel() > _MAX_NMS:
+            top = scores[batch_idx, anchor_idx].topk(_MAX_NMS).indices
+            batch_idx, anchor_idx = batch_idx[top], anchor_idx[top]
+
+        xywh = preds[batch_idx, anchor_idx, :4]
+        scores = scores[batch_idx, anchor_idx]
+        cls = cls[batch_idx, anchor_idx]
+        boxes = torch.cat((xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2), dim=1)
+
+        # One NMS call for every image and class
+        keep = batched_nms(boxes, scores, batch_idx * (preds.shape[-1] - 4) + cls, self.iou_threshold)
+        batch_idx, boxes, scores, cls = batch_idx[keep], boxes[keep], scores[keep], cls[keep]
+
+        # Cap per image, keeping score order inside each image
+        order = torch.sort(batch_idx, stable=True).indices
+        batch_idx, boxes, scores, cls = batch_idx[order], boxes[order], scores[order], cls[order]
+        counts = torch.bincount(batch_idx, minlength=n)
+        starts = torch.cumsum(counts, 0) - counts
+        rank = torch.arange(batch_idx.numel(), device=batch_idx.device) - starts[batch_idx]
+        capped = rank < self.max_det
+        batch_idx, boxes, scores, cls = batch_idx[capped], boxes[capped], scores[capped], cls[capped]
+
+        # Undo the letterbox for all boxes at once
+        p = params[batch_idx]
+        boxes = (boxes - p[:, [1, 2, 1, 2]]) / p[:, :1]
+        boxes = torch.minimum(boxes.clamp(min=0), (p[:, [3, 4, 3, 4]] - 1))
+        return batch_idx, boxes, scores, cls
+
+    def prepare(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """Letterboxed, normalized NCHW input for ``images`` exactly as the backend sees it (a copy)."""
+        import torch
+
+        if len(images) > self.max_batch:
+            raise ValueError(f"Batch of {len(images)} exceeds max_batch={self.max_batch}")
+        with torch.inference_mode():
+            x, _ = self._preprocess(images)
+            return x.float().cpu().numpy().copy()
+
+    def warmup(self, batch_sizes: Sequence[int], iterations: int = 2) -> None:
+        """Run blank frames through every batch size the pipeline will use."""
+        blank = np.full((self.imgsz, self.imgsz, 3), _PAD_VALUE, dtype=np.uint8)
+        for batch in batch_sizes:
+            for _ in range(iterations):
+                self.infer([blank] * min(int(batch), self.max_batch))
+
+    def preprocess(self, images: Sequence[np.ndarray], buffer: int = 0) -> tuple:
+        """Letterbox up to ``max_batch`` BGR images into input buffer set ``buffer``.
+
+        The buffer set must not be reused until :meth:`forward` has consumed
+        the returned batch.
+        """
+        import torch
+
+        n = len(images)
+        if n > self.max_batch:
+            raise ValueError(f"Batch of {n} exceeds max_batch={self.max_batch}")
+        with torch.inference_mode():
+            x, params = self._preprocess(images, buffer % self.buffers)
+        return x, params, n
+
+    def forward(self, batch: tuple) -> tuple:
+        """Run the network on a :meth:`preprocess` batch."""
+        import torch
+
+        x, params, n = batch
+        with torch.inference_mode():
+            return self.backend(x), params, n
+
+    def postprocess(self, batch: tuple) -> List[Detections]:
+        """NMS and unletterbox a :meth:`forward` result; one detection set per image."""
+        import torch
+
+        preds, params, n = batch
+        with torch.inference_mode():
+            out = self._nms(preds, params, n)
+        if out is None:
+            return [Detections.empty(self.names) for _ in range(n)]
+
+        batch_idx, boxes, scores, cls = (t.cpu().numpy() for t in out)
+        # Rows are grouped by image, so each image is a contiguous slice
+        bounds = np.searchsorted(batch_idx, np.arange(n + 1))
+        return [
+            Detections(boxes[a:b], scores[a:b], cls[a:b], names=self.names)
+            for a, b in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def infer(self, images: Sequence[np.ndarray]) -> List[Detections]:
+        """Detect on up to ``max_batch`` BGR images; one detection set per image."""
+        if len(images) == 0:
+            return []
+        return self.postprocess(self.forward(self.preprocess(images)))
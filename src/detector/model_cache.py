@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+_META = "meta.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def round_imgsz(imgsz: int, stride: int = 32) -> int:
+    """Round ``imgsz`` up to a multiple of the model stride (at least 32), as the direct engine does."""
+    stride = max(int(stride), 32)
+    return -(-int(imgsz) // stride) * stride
+
+
+def artifact_key(model_path: str, device, precision: str, imgsz: int, batch_sizes: Sequence[int]) -> Dict[str, Any]:
+    """Everything a traced artifact depends on; a change in any field is a cache miss.
+
+    ``imgsz`` is stored rounded up to the minimum stride of 32, so sizes the
+    engine rounds to the same input share an entry.
+    """
+    import torch
+
+    device_name = str(device)
+    if device.type == "cuda":
+        device_name += f" ({torch.cuda.get_device_name(device)})"
+    return {
+        "model_sha256": file_sha256(model_path),
+        "torch": torch.__version__,
+        "device": device_name,
+        "precision": precision,
+        "imgsz": round_imgsz(imgsz),
+        "batch_sizes": sorted(set(int(b) for b in batch_sizes)),
+    }
+
+
+class TracedModel:
+    """Calls the module traced for the smallest batch size that fits the input.
+
+    Inputs smaller than every traced batch are zero-padded and the extra
+    outputs dropped, so callers see a model that accepts any batch up to the
+    largest traced size.
+    """
+
+    def __init__(self, modules: Dict[int, Any]) -> None:
+        self.modules = dict(sorted(modules.items()))
+
+    def __call__(self, x):
+        import torch
+
+        n = x.shape[0]
+        for batch, module in self.modules.items():
+            if batch >= n:
+                break
+        else:
+            raise ValueError(f"Batch of {n} exceeds the largest traced batch {batch}")
+        if batch > n:
+            x = torch.cat((x, x.new_zeros((batch - n, *x.shape[1:]))))
+        preds = module(x)
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        return preds[:n]
+
+
+class ModelArtifactCache:
+    """On-disk cache of fused, traced and frozen TorchScript detectors.
+
+    Each entry lives in ``root/<key hash>/`` with one ``model_b<N>.pt`` per
+    warm-up batch size and a ``meta.json`` holding the key, class names,
+    stride, input dtype and warm-up shapes. Loading an entry needs neither
+    Ultralytics nor unpickling the original checkpoint.
+    """
+
+    def __init__(self, root: str, logger=None) -> None:
+        self.root = Path(root)
+        self.logger = logger
+
+    def _entry(self, key: Dict[str, Any]) -> Path:
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+        return self.root / digest
+
+    def load(self, key: Dict[str, Any], device) -> Optional[tuple[TracedModel, Dict[str, Any]]]:
+        import torch
+
+        entry = self._entry(key)
+        meta_path = entry / _META
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+            if meta.get("key") != key:
+                return None
+            modules = {
+                int(b): torch.jit.load(str(entry / f"model_b{b}.pt"), map_location=device).eval()
+                for b in meta["batch_sizes"]
+            }
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"Ignoring unreadable model artifact {entry}: {e}")
+            return None
+        meta["names"] = {int(k): v for k, v in meta.get("names", {}).items()}
+        return TracedModel(modules), meta
+
+    def save(self, key: Dict[str, Any], model, names: Dict[int, str], stride: int, dtype) -> tuple[TracedModel, Dict[str, Any]]:
+        """Trace ``model`` at every key batch size, store the entry and return it ready to run."""
+        import torch
+
+        entry = self._entry(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        # Trace at the input size the engine will feed, which is rounded to the model stride
+        imgsz = round_imgsz(key["imgsz"], stride)
+        device = next(model.parameters()).device
+        modules = {}
+        shapes: List[List[int]] = []
+        with torch.inference_mode(False), torch.no_grad():
+            for batch in key["batch_sizes"]:
+                example = torch.zeros((batch, 3, imgsz, imgsz), dtype=dtype, device=device)
+                traced = torch.jit.freeze(torch.jit.trace(model, example, strict=False).eval())
+                tmp = entry / f"model_b{batch}.pt.tmp"
+                torch.jit.save(traced, str(tmp))
+                tmp.replace(entry / f"model_b{batch}.pt")
+                modules[batch] = traced
+                shapes.append(list(example.shape))
+        meta = {
+            "key": key,
+            "batch_sizes": key["batch_sizes"],
+            "names": {str(k): v for k, v in names.items()},
+            "stride": int(stride),
+            "dtype": str(dtype).replace("torch.", ""),
+            "warmup_shapes": shapes,
+        }
+        # meta.json is written last, so a half-written entry is never loaded
+        (entry / _META).write_text(json.dumps(meta, indent=2))
+        if self.logger:
+            self.logger.info(f"Stored traced model artifact in {entry}")
+        meta["names"] = dict(names)
+        return TracedModel(modules), meta
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import torch
+
+
+# Sorted candidates are suppressed in blocks of this many boxes so the IoU
+# matrices stay small (block x block and kept x block) even for 10k+ boxes;
+# smaller blocks let the kept-box check discard more before the block matrix.
+_BLOCK = 512
+
+
+def box_iou(a: torch.Tensor, b: torch.Tensor) -> torch.Tensor:
+    """Pairwise IoU matrix (len(a) x len(b)) of xyxy boxes."""
+    ax1, ay1, ax2, ay2 = a.unbind(1)
+    bx1, by1, bx2, by2 = b.unbind(1)
+    area_a = (ax2 - ax1).clamp(min=0) * (ay2 - ay1).clamp(min=0)
+    area_b = (bx2 - bx1).clamp(min=0) * (by2 - by1).clamp(min=0)
+    # Per-axis 2-D intermediates instead of (len(a), len(b), 2) stacks, updated in place
+    iw = (torch.minimum(ax2[:, None], bx2[None, :]) - torch.maximum(ax1[:, None], bx1[None, :])).clamp_(min=0)
+    ih = (torch.minimum(ay2[:, None], by2[None, :]) - torch.maximum(ay1[:, None], by1[None, :])).clamp_(min=0)
+    inter = iw.mul_(ih)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-6)
+
+
+def _greedy_scan(overlap: np.ndarray, limit: Optional[int]) -> np.ndarray:
+    """Greedy NMS over a score-sorted block, given its boolean overlap matrix.
+
+    Like the sequential pass of torchvision's CUDA kernel: the matrix is
+    built in one shot and only kept boxes cost a row OR, so chains of
+    suppression need no repeated matrix passes. Entries before the diagonal
+    only mark boxes that are already decided, so the matrix needs no triu.
+    """
+    removed = np.zeros(overlap.shape[0], dtype=bool)
+    keep = []
+    for i in range(overlap.shape[0]):
+        if removed[i]:
+            continue
+        keep.append(i)
+        if limit is not None and len(keep) >= limit:
+            break
+        removed |= overlap[i]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def nms(
+    boxes: torch.Tensor,
+    scores: torch.Tensor,
+    iou_threshold: float,
+    max_det: Optional[int] = None,
+) -> torch.Tensor:
+    """Greedy NMS with the ``torchvision.ops.nms`` contract.
+
+    Returns indices of the kept boxes sorted by decreasing score. A box is
+    dropped when its IoU with a kept, higher-scoring box exceeds
+    ``iou_threshold``. Each block of sorted candidates is first checked
+    against all boxes kept so far in one IoU matrix; only the survivors get
+    a block x block matrix, and blocks with no survivors are skipped. With
+    ``max_det`` the search stops once that many boxes are kept, which gives
+    the same first ``max_det`` indices.
+    """
+    if boxes.numel() == 0 or (max_det is not None and max_det <= 0):
+        return torch.empty((0,), dtype=torch.int64, device=boxes.device)
+    order = scores.argsort(descending=True)
+    sorted_boxes = boxes[order].float()
+    positions = torch.arange(sorted_boxes.shape[0], device=boxes.device)
+    kept_idx = []
+    kept_boxes = sorted_boxes[:0]
+    n_kept = 0
+    for start in range(0, sorted_boxes.shape[0], _BLOCK):
+        block = sorted_boxes[start:start + _BLOCK]
+        cand = positions[start:start + _BLOCK]
+        if n_kept:
+            alive = ~(box_iou(kept_boxes, block) > iou_threshold).any(dim=0)
+            if not bool(alive.any()):
+                continue
+            block, cand = block[alive], cand[alive]
+        overlap = (box_iou(block, block) > iou_threshold).cpu().numpy()
+        limit = None if max_det is None else max_det - n_kept
+        keep = torch.from_numpy(_greedy_scan(overlap, limit)).to(boxes.device)
+        kept_idx.append(cand[keep])
+        kept_boxes = torch.cat((kept_boxes, block[keep]))
+        n_kept += keep.numel()
+        if max_det is not None and n_kept >= max_det:
+            break
+    return order[torch.cat(kept_idx)]
+
+
+def batched_nms(
+    boxes: torch.Tensor,
+    scores: torch.Tensor,
+    idxs: torch.Tensor,
+    iou_threshold: float,
+    max_det: Optional[int] = None,
+) -> torch.Tensor:
+    """Class-aware NMS in one call: boxes with different ``idxs`` never suppress each other.
+
+    Each group is shifted by its index times the largest coordinate so
+    groups cannot overlap, then a single :func:`nms` runs on the lot.
+    """
+    if boxes.numel() == 0:
+        return torch.empty((0,), dtype=torch.int64, device=boxes.device)
+    offsets = idxs.to(boxes.dtype) * (boxes.max() + 1)
+    return nms(boxes + offsets[:, None], scores, iou_threshold, max_det=max_det)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .backends import InferenceBackend
+
+
+_GRAPH_OPT_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+def export_onnx(model, path: str, imgsz: int, names: Dict[int, str], stride: int, opset: int = 17) -> str:
+    """Export a fused FP32 ``DetectionModel`` to ONNX with a dynamic batch axis.
+
+    Class names and stride go into the model metadata, so the file can be
+    served without Ultralytics or the ``.pt`` checkpoint.
+    """
+    import onnx
+    import torch
+
+    path_obj = Path(path)
+    path_obj.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path_obj.with_name(path_obj.name + ".tmp")
+    model = model.float().eval()
+    example = torch.zeros((1, 3, imgsz, imgsz), dtype=torch.float32, device=next(model.parameters()).device)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            example,
+            str(tmp),
+            opset_version=opset,
+            input_names=["images"],
+            output_names=["output0"],
+            dynamic_axes={"images": {0: "batch"}, "output0": {0: "batch"}},
+        )
+    proto = onnx.load(str(tmp))
+    for key, value in (("names", json.dumps({str(k): v for k, v in names.items()})), ("stride", str(int(stride)))):
+        entry = proto.metadata_props.add()
+        entry.key, entry.value = key, value
+    onnx.save(proto, str(tmp))
+    tmp.replace(path_obj)
+    return str(path_obj)
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU forward with IO binding into preallocated buffers.
+
+    The engine's preallocated float32 input tensor is bound zero-copy and the
+    output is written straight into a preallocated array per batch size, so
+    a steady-state call allocates nothing on the Python side.
+    """
+
+    name = "onnxruntime"
+
+    def __init__(
+        self,
+        path: str,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        graph_optimization: str = "all",
+        logger=None,
+    ) -> None:
+        import onnxruntime as ort
+        import torch
+
+        level = graph_optimization.strip().lower()
+        if level not in _GRAPH_OPT_LEVELS:
+            raise ValueError(f"Unknown ONNX Runtime graph optimization level: {graph_optimization}")
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _GRAPH_OPT_LEVELS[level])
+        opts.intra_op_num_threads = int(intra_op_threads)
+        opts.inter_op_num_threads = int(inter_op_threads)
+        if int(inter_op_threads) > 1:
+            opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self._ort = ort
+        self.session = ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self.logger = logger
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        # Ultralytics exports store names as a Python dict literal, ours as JSON
+        names = meta.get("names", "{}")
+        try:
+            parsed = json.loads(names)
+        except ValueError:
+            import ast
+
+            parsed = ast.literal_eval(names)
+        self.names = {int(k): v for k, v in parsed.items()}
+        self.stride = int(meta.get("stride", 32))
+        self.device = torch.device("cpu")
+        self.dtype = torch.float32
+
+        inp = self.session.get_inputs()[0]
+        out = self.session.get_outputs()[0]
+        self._input_name = inp.name
+        self._output_name = out.name
+        self._output_tail = tuple(out.shape[1:])
+        if isinstance(inp.shape[0], int):
+            self.max_batch = inp.shape[0]
+        # One binding + output buffer per (batch size, input buffer address)
+        self._bindings: Dict[Tuple[int, int], tuple] = {}
+
+    def _binding(self, x_np: np.ndarray):
+        key = (x_np.shape[0], x_np.ctypes.data)
+        bound = self._bindings.get(key)
+        if bound is None:
+            tail = self._output_tail
+            if not all(isinstance(d, int) for d in tail):
+                # Symbolic output dims: resolve them once with a plain run
+                tail = self.session.run([self._output_name], {self._input_name: x_np})[0].shape[1:]
+                self._output_tail = tuple(tail)
+            out = np.empty((x_np.shape[0], *tail), dtype=np.float32)
+            io = self.session.io_binding()
+            io.bind_ortvalue_input(self._input_name, self._ort.OrtValue.ortvalue_from_numpy(x_np))
+            io.bind_output(self._output_name, "cpu", 0, np.float32, list(out.shape), out.ctypes.data)
+            bound = self._bindings[key] = (io, out, x_np)
+        return bound
+
+    def __call__(self, x):
+        import torch
+
+        x_np = x.numpy()
+        io, out, _ = self._binding(x_np)
+        self.session.run_with_iobinding(io)
+        return torch.from_numpy(out)
+
+
+def resolve_onnx_path(model_path: str, onnx_path: Optional[str], cache_dir: Optional[str], imgsz: int) -> Path:
+    """Explicit ``onnx_path``, else a file keyed by the weights hash in the cache dir, else next to the weights."""
+    if onnx_path:
+        return Path(onnx_path)
+    if cache_dir:
+        from .model_cache import file_sha256
+
+        return Path(cache_dir) / f"{Path(model_path).stem}-{file_sha256(model_path)[:16]}-{int(imgsz)}.onnx"
+    return Path(model_path).with_suffix(f".{int(imgsz)}.onnx")
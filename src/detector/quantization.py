@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from utils.detections import Detections
+
+
+def int8_path(onnx_path: str, mode: str) -> Path:
+    """Where the INT8 variant of an FP32 ONNX file lives (``<stem>.int8-<mode>.onnx``)."""
+    p = Path(onnx_path)
+    return p.with_name(f"{p.stem}.int8-{mode}.onnx")
+
+
+class FrameCalibrationReader:
+    """``onnxruntime.quantization.CalibrationDataReader`` over preprocessed frames.
+
+    ``inputs`` are NCHW float32 batches produced by
+    :meth:`DirectYoloEngine.prepare`, so calibration sees exactly the
+    letterboxing and scaling used at runtime.
+    """
+
+    def __init__(self, input_name: str, inputs: Sequence[np.ndarray]) -> None:
+        self.input_name = input_name
+        self._inputs = list(inputs)
+        self._it = iter(self._inputs)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        x = next(self._it, None)
+        return None if x is None else {self.input_name: x}
+
+    def rewind(self) -> None:
+        self._it = iter(self._inputs)
+
+
+def _head_nodes(model_path: str) -> List[str]:
+    """Non-conv nodes of the detection head (box decoding, DFL, concat).
+
+    They mix box coordinates and class scores with very different ranges,
+    which is where INT8 loses most accuracy; the convolutions stay quantized.
+    """
+    import onnx
+
+    graph = onnx.load(model_path).graph
+    pattern = re.compile(r"/model\.(\d+)/")
+    indices = [int(m.group(1)) for node in graph.node for m in [pattern.match(node.name)] if m]
+    if not indices:
+        return []
+    head = f"/model.{max(indices)}/"
+    return [node.name for node in graph.node if node.name.startswith(head) and node.op_type != "Conv"]
+
+
+def quantize_onnx(
+    fp32_path: str,
+    out_path: str,
+    mode: str = "static",
+    calibration: Optional[FrameCalibrationReader] = None,
+    per_channel: bool = True,
+    exclude_head: bool = True,
+) -> str:
+    """Write an INT8 model: ``dynamic`` (weights only, no data needed) or ``static`` (QDQ, calibrated activations)."""
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    exclude = _head_nodes(fp32_path) if exclude_head else []
+    if mode == "dynamic":
+        quantize_dynamic(
+            fp32_path,
+            out_path,
+            weight_type=QuantType.QUInt8,
+            per_channel=per_channel,
+            nodes_to_exclude=exclude,
+        )
+    elif mode == "static":
+        if calibration is None:
+            raise ValueError("Static quantization needs calibration frames")
+        quantize_static(
+            fp32_path,
+            out_path,
+            calibration,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=exclude,
+        )
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    # Keep the names/stride metadata so the INT8 file loads on its own
+    import onnx
+
+    src = onnx.load(fp32_path, load_external_data=False)
+    dst = onnx.load(out_path)
+    present = {p.key for p in dst.metadata_props}
+    for prop in src.metadata_props:
+        if prop.key not in present:
+            entry = dst.metadata_props.add()
+            entry.key, entry.value = prop.key, prop.value
+    onnx.save(dst, out_path)
+    return out_path
+
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=-1)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _average_precision(tp: np.ndarray, scores: np.ndarray, num_gt: int) -> float:
+    if num_gt == 0:
+        return float("nan")
+    if tp.size == 0:
+        return 0.0
+    order = np.argsort(-scores, kind="stable")
+    tp = tp[order]
+    ctp = np.cumsum(tp)
+    recall = ctp / num_gt
+    precision = ctp / np.arange(1, tp.size + 1)
+    # All-point interpolation (COCO/VOC2010+)
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    idx = np.nonzero(mrec[1:] != mrec[:-1])[0]
+    return float(np.sum((mrec[idx + 1] - mrec[idx]) * mpre[idx + 1]))
+
+
+def compare_detections(
+    reference: Iterable[Detections],
+    candidate: Iterable[Detections],
+    iou_thresholds: Sequence[float] = tuple(np.arange(0.5, 0.96, 0.05)),
+) -> Dict[str, float]:
+    """Score ``candidate`` (e.g. INT8) against ``reference`` (FP32) used as ground truth.
+
+    Returns mAP@0.5, mAP@0.5:0.95 (mean over classes present in the
+    reference) and ``agreement``: the fraction of reference boxes matched by a
+    same-class candidate box with IoU >= 0.5.
+    """
+    thresholds = np.asarray(iou_thresholds, dtype=np.float64)
+    per_class: Dict[int, dict] = {}
+    matched_total = 0
+    ref_total = 0
+    for ref, cand in zip(reference, candidate):
+        ref_total += len(ref)
+        iou = _iou_matrix(cand.boxes, ref.boxes) if len(ref) and len(cand) else np.zeros((len(cand), len(ref)))
+        same = cand.class_ids[:, None] == ref.class_ids[None, :]
+        if len(ref):
+            matched_total += int(((iou >= 0.5) & same).any(axis=0).sum())
+        for cls_id in set(ref.class_ids.tolist()) | set(cand.class_ids.tolist()):
+            stats = per_class.setdefault(cls_id, {"tp": [], "scores": [], "num_gt": 0})
+            ref_idx = np.nonzero(ref.class_ids == cls_id)[0]
+            cand_idx = np.nonzero(cand.class_ids == cls_id)[0]
+            stats["num_gt"] += ref_idx.size
+            cand_idx = cand_idx[np.argsort(-cand.scores[cand_idx], kind="stable")]
+            tp = np.zeros((cand_idx.size, thresholds.size), dtype=bool)
+            sub = iou[np.ix_(cand_idx, ref_idx)]
+            for t, thr in enumerate(thresholds):
+                taken = np.zeros(ref_idx.size, dtype=bool)
+                for i in range(cand_idx.size):
+                    if ref_idx.size == 0:
+                        break
+                    ious = np.where(taken, -1.0, sub[i])
+                    j = int(np.argmax(ious))
+                    if ious[j] >= thr:
+                        taken[j] = True
+                        tp[i, t] = True
+            stats["tp"].append(tp)
+            stats["scores"].append(cand.scores[cand_idx])
+
+    aps = []
+    for stats in per_class.values():
+        if stats["num_gt"] == 0:
+            continue
+        tp = np.concatenate(stats["tp"]) if stats["tp"] else np.zeros((0, thresholds.size), dtype=bool)
+        scores = np.concatenate(stats["scores"]) if stats["scores"] else np.zeros(0)
+        aps.append([_average_precision(tp[:, t], scores, stats["num_gt"]) for t in range(thresholds.size)])
+    ap = np.asarray(aps) if aps else np.zeros((0, thresholds.size))
+    return {
+        "map50": float(ap[:, 0].mean()) if len(ap) else float("nan"),
+        "map50_95": float(ap.mean()) if len(ap) else float("nan"),
+        "agreement": matched_total / ref_total if ref_total else float("nan"),
+        "reference_boxes": float(ref_total),
+    }
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.detections import Detections
+
+
+def _tile_starts(length: int, size: int, overlap: int) -> List[int]:
+    if length <= size:
+        return [0]
+    step = max(size - overlap, 1)
+    starts = list(range(0, length - size, step))
+    starts.append(length - size)
+    return starts
+
+
+class TiledDetector:
+    """Runs a detector only on static ROIs, optionally split into overlapping tiles.
+
+    Every crop of every input image goes through one ``infer_batch`` call,
+    boxes are shifted back to full-frame coordinates and a class-aware NMS
+    across crops removes the duplicates that overlapping tiles produce.
+    Exposes the same ``infer``/``infer_batch`` and split
+    ``begin``/``forward``/``finish`` interface as the detector it wraps.
+    Without ROIs the whole frame is the region.
+    """
+
+    def __init__(
+        self,
+        detector,
+        rois: Optional[Sequence[Sequence[int]]] = None,
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 64,
+        nms_iou: float = 0.5,
+    ) -> None:
+        self.detector = detector
+        self.rois = [tuple(int(v) for v in roi) for roi in (rois or [])]
+        self.tile_size = int(tile_size) if tile_size else None
+        self.tile_overlap = int(tile_overlap)
+        self.nms_iou = float(nms_iou)
+        if self.tile_size is not None and self.tile_overlap >= self.tile_size:
+            raise ValueError("tile_overlap must be smaller than tile_size")
+
+    def load(self) -> None:
+        self.detector.load()
+
+    def crops(self, shape: Tuple[int, ...]) -> List[Tuple[int, int, int, int]]:
+        """Crop rectangles (x0, y0, x1, y1) for an image of ``shape``."""
+        h, w = shape[:2]
+        regions = []
+        for x0, y0, x1, y1 in self.rois or [(0, 0, w, h)]:
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1, w), min(y1, h)
+            if x0 < x1 and y0 < y1:
+                regions.append((x0, y0, x1, y1))
+        if self.tile_size is None:
+            return regions
+        tiles = []
+        for x0, y0, x1, y1 in regions:
+            tw = min(self.tile_size, x1 - x0)
+            th = min(self.tile_size, y1 - y0)
+            for ty in _tile_starts(y1 - y0, th, self.tile_overlap):
+                for tx in _tile_starts(x1 - x0, tw, self.tile_overlap):
+                    tiles.append((x0 + tx, y0 + ty, x0 + tx + tw, y0 + ty + th))
+        return tiles
+
+    def infer(self, image_bgr: np.ndarray) -> Detections:
+        return self.infer_batch([image_bgr])[0]
+
+    def infer_batch(self, images_bgr: List[np.ndarray], max_batch: Optional[int] = None) -> List[Detections]:
+        layout, views = self._split(images_bgr)
+        return self._merge(layout, self.detector.infer_batch(views, max_batch=max_batch))
+
+    def begin(self, images_bgr: List[np.ndarray], buffer: int = 0) -> tuple:
+        layout, views = self._split(images_bgr)
+        return layout, self.detector.begin(views, buffer)
+
+    def forward(self, pending: tuple) -> tuple:
+        layout, inner = pending
+        return layout, self.detector.forward(inner)
+
+    def finish(self, pending: tuple) -> List[Detections]:
+        layout, inner = pending
+        return self._merge(layout, self.detector.finish(inner))
+
+    def _split(self, images_bgr: List[np.ndarray]):
+        layout = [self.crops(img.shape) for img in images_bgr]
+        views = [img[y0:y1, x0:x1] for img, rects in zip(images_bgr, layout) for x0, y0, x1, y1 in rects]
+        return layout, views
+
+    def _merge(self, layout, crop_detections: List[Detections]) -> List[Detections]:
+        per_crop = iter(crop_detections)
+        results = []
+        for rects in layout:
+            parts = []
+            for x0, y0, _, _ in rects:
+                dets = next(per_crop)
+                dets.boxes += np.array([x0, y0, x0, y0], dtype=dets.boxes.dtype)
+                parts.append(dets)
+            merged = Detections.concatenate(parts)
+            if len(parts) > 1 and len(merged) > 1:
+                merged = merged[self._cross_crop_nms(merged)]
+            results.append(merged.sort_by_score())
+        return results
+
+    def _cross_crop_nms(self, dets: Detections) -> np.ndarray:
+        import torch
+
+        from .nms import batched_nms
+
+        keep = batched_nms(
+            torch.from_numpy(dets.boxes.astype(np.float32)),
+            torch.from_numpy(dets.scores),
+            torch.from_numpy(dets.class_ids.astype(np.int64)),
+            self.nms_iou,
+        )
+        return keep.numpy()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import itertools
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.detections import Detections
+
+# Process noise relative to the box size (ByteTrack's Kalman weights)
+_STD_POS = 1.0 / 20.0
+_STD_VEL = 1.0 / 160.0
+
+# Constant-velocity model over [cx, cy, w, h, vcx, vcy, vw, vh], one frame per step
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+
+
+def _xyxy_to_xywh(boxes: np.ndarray) -> np.ndarray:
+    boxes = boxes.astype(np.float64)
+    wh = boxes[:, 2:] - boxes[:, :2]
+    return np.concatenate([boxes[:, :2] + wh / 2.0, wh], axis=1)
+
+
+def _xywh_to_xyxy(xywh: np.ndarray) -> np.ndarray:
+    half = xywh[:, 2:4] / 2.0
+    return np.concatenate([xywh[:, :2] - half, xywh[:, :2] + half], axis=1)
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=-1)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _greedy_match(iou: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Match rows to columns by descending IoU; returns matched (row, col) index arrays."""
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r = np.zeros(iou.shape[0], dtype=bool)
+    used_c = np.zeros(iou.shape[1], dtype=bool)
+    out_r, out_c = [], []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if not used_r[r] and not used_c[c]:
+            used_r[r] = used_c[c] = True
+            out_r.append(r)
+            out_c.append(c)
+    return np.asarray(out_r, dtype=np.intp), np.asarray(out_c, dtype=np.intp)
+
+
+class ByteTracker:
+    """ByteTrack-style multi-object tracker with a constant-velocity Kalman filter per track.
+
+    Tracks are stored column-wise (one row per track) and predicted/updated
+    as a batch. Each :meth:`update` associates high-score detections with all
+    tracks first, then low-score detections with the tracks still unmatched,
+    always within the same class. Unmatched high-score detections start new
+    tracks; tracks without a match for ``max_age`` detection frames are
+    dropped. Only tracks seen in ``min_hits`` frames are reported.
+
+    Between detector runs :meth:`predict` advances the tracks and reports the
+    predicted boxes. With ``flow`` enabled the prediction is corrected by the
+    median sparse optical flow (pyramidal Lucas-Kanade) inside each box.
+    ``id_source`` can be shared between trackers (one per camera) so track
+    IDs stay unique across cameras.
+    """
+
+    def __init__(
+        self,
+        high_threshold: float = 0.5,
+        new_track_threshold: float = 0.6,
+        match_iou: float = 0.2,
+        low_match_iou: float = 0.5,
+        max_age: int = 30,
+        min_hits: int = 2,
+        flow: bool = True,
+        id_source: Optional[Iterator[int]] = None,
+    ) -> None:
+        self.high_threshold = float(high_threshold)
+        self.new_track_threshold = float(new_track_threshold)
+        self.match_iou = float(match_iou)
+        self.low_match_iou = float(low_match_iou)
+        self.max_age = int(max_age)
+        self.min_hits = int(min_hits)
+        self.flow = flow
+        self._ids = id_source if id_source is not None else itertools.count(1)
+        self.names: dict = {}
+
+        self.track_ids = np.empty(0, dtype=np.int32)
+        self.class_ids = np.empty(0, dtype=np.int32)
+        self.scores = np.empty(0, dtype=np.float32)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.misses = np.empty(0, dtype=np.int32)
+        self.mean = np.empty((0, 8))
+        self.cov = np.empty((0, 8, 8))
+        self._prev_gray: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    # Kalman filter, batched over tracks
+    def _predict(self) -> None:
+        if not len(self):
+            return
+        wh = self.mean[:, 2:4]
+        std = np.concatenate([_STD_POS * wh, _STD_POS * wh, _STD_VEL * wh, _STD_VEL * wh], axis=1)
+        q = np.zeros_like(self.cov)
+        q[:, np.arange(8), np.arange(8)] = np.square(std)
+        self.mean = self.mean @ _F.T
+        self.cov = _F @ self.cov @ _F.T + q
+        # Boxes cannot shrink through zero while coasting
+        np.maximum(self.mean[:, 2:4], 1.0, out=self.mean[:, 2:4])
+
+    def _update(self, idx: np.ndarray, xywh: np.ndarray) -> None:
+        if not len(idx):
+            return
+        mean, cov = self.mean[idx], self.cov[idx]
+        r = np.zeros((len(idx), 4, 4))
+        r[:, np.arange(4), np.arange(4)] = np.square(_STD_POS * np.repeat(mean[:, 2:4], 2, axis=1))
+        s = cov[:, :4, :4] + r
+        k = cov[:, :, :4] @ np.linalg.inv(s)
+        innovation = xywh - mean[:, :4]
+        self.mean[idx] = mean + (k @ innovation[:, :, None])[:, :, 0]
+        self.cov[idx] = cov - k @ cov[:, :4, :]
+
+    def _add(self, dets: Detections) -> None:
+        n = len(dets)
+        if not n:
+            return
+        xywh = _xyxy_to_xywh(dets.boxes)
+        mean = np.concatenate([xywh, np.zeros((n, 4))], axis=1)
+        wh = xywh[:, 2:4]
+        std = np.concatenate([2 * _STD_POS * wh, 2 * _STD_POS * wh, 10 * _STD_VEL * wh, 10 * _STD_VEL * wh], axis=1)
+        cov = np.zeros((n, 8, 8))
+        cov[:, np.arange(8), np.arange(8)] = np.square(std)
+        ids = np.fromiter(itertools.islice(self._ids, n), dtype=np.int32, count=n)
+        self.track_ids = np.concatenate([self.track_ids, ids])
+        self.class_ids = np.concatenate([self.class_ids, dets.class_ids])
+        self.scores = np.concatenate([self.scores, dets.scores])
+        self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int32)])
+        self.misses = np.concatenate([self.misses, np.zeros(n, dtype=np.int32)])
+        self.mean = np.concatenate([self.mean, mean])
+        self.cov = np.concatenate([self.cov, cov])
+
+    def _keep(self, mask: np.ndarray) -> None:
+        for name in ("track_ids", "class_ids", "scores", "hits", "misses", "mean", "cov"):
+            setattr(self, name, getattr(self, name)[mask])
+
+    def _associate(self, dets: Detections, det_idx: np.ndarray, trk_idx: np.ndarray, threshold: float):
+        if not len(det_idx) or not len(trk_idx):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        iou = _iou(_xywh_to_xyxy(self.mean[trk_idx, :4]), dets.boxes[det_idx].astype(np.float64))
+        iou[self.class_ids[trk_idx][:, None] != dets.class_ids[det_idx][None, :]] = 0.0
+        r, c = _greedy_match(iou, threshold)
+        return trk_idx[r], det_idx[c]
+
+    def _gray(self, image: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if not self.flow or image is None:
+            return None
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    def update(self, dets: Detections, image: Optional[np.ndarray] = None) -> Detections:
+        """Associate a detector result with the tracks; returns the reported detections with ``track_id`` set."""
+        self.names = dets.names
+        self._prev_gray = self._gray(image)
+        self._predict()
+
+        scores = dets.scores
+        high = np.nonzero(scores >= self.high_threshold)[0]
+        low = np.nonzero(scores < self.high_threshold)[0]
+        all_tracks = np.arange(len(self))
+
+        t1, d1 = self._associate(dets, high, all_tracks, self.match_iou)
+        # Low-score boxes only extend tracks that are currently being seen
+        left = np.setdiff1d(all_tracks, t1)
+        left = left[self.misses[left] == 0]
+        t2, d2 = self._associate(dets, low, left, self.low_match_iou)
+
+        t = np.concatenate([t1, t2])
+        d = np.concatenate([d1, d2])
+        self._update(t, _xyxy_to_xywh(dets.boxes[d]))
+        self.scores[t] = scores[d]
+        self.hits[t] += 1
+        self.misses += 1
+        self.misses[t] = 0
+        dets.track_id[d] = self.track_ids[t]
+
+        n_old = len(self)
+        new = np.setdiff1d(high, d1)
+        new = new[scores[new] >= self.new_track_threshold]
+        self._add(dets[new])
+        dets.track_id[new] = self.track_ids[n_old:]
+
+        self._keep(self.misses <= self.max_age)
+
+        tracked = dets.track_id >= 0
+        confirmed = np.isin(dets.track_id, self.track_ids[self.hits >= self.min_hits])
+        return dets[tracked & confirmed]
+
+    def predict(self, image: Optional[np.ndarray] = None) -> Detections:
+        """Advance the tracks one frame without a detector result and report the predicted boxes.
+
+        Like a detector result, the boxes are ordered by score (highest
+        first), so ``max_det`` cuts and first-detection consumers keep the
+        most confident tracks.
+        """
+        prev_xywh = self.mean[:, :4].copy()
+        self._predict()
+        gray = self._gray(image)
+        if gray is not None and self._prev_gray is not None and len(self):
+            shift, valid = self._flow_shift(self._prev_gray, gray, prev_xywh)
+            measured = prev_xywh.copy()
+            measured[:, :2] += shift
+            idx = np.nonzero(valid)[0]
+            self._update(idx, measured[idx])
+        if gray is not None:
+            self._prev_gray = gray
+
+        report = (self.misses == 0) & (self.hits >= self.min_hits)
+        boxes = _xywh_to_xyxy(self.mean[report, :4])
+        if image is not None:
+            h, w = image.shape[:2]
+            np.clip(boxes, 0, [w - 1, h - 1, w - 1, h - 1], out=boxes)
+        return Detections(
+            np.rint(boxes),
+            self.scores[report],
+            self.class_ids[report],
+            track_id=self.track_ids[report],
+            names=self.names,
+        ).sort_by_score()
+
+    @staticmethod
+    def _flow_shift(prev: np.ndarray, cur: np.ndarray, xywh: np.ndarray, grid: int = 3):
+        """Median Lucas-Kanade displacement of a point grid in the inner half of each box."""
+        offsets = (np.arange(grid) + 0.5) / grid - 0.5  # inner half: +-0.25 of the box size
+        gx, gy = np.meshgrid(offsets, offsets)
+        pts = xywh[:, None, :2] + np.stack([gx.ravel(), gy.ravel()], axis=1)[None] * xywh[:, None, 2:4]
+        pts = pts.reshape(-1, 1, 2).astype(np.float32)
+        nxt, status, _ = cv2.calcOpticalFlowPyrLK(prev, cur, pts, None, winSize=(15, 15), maxLevel=3)
+        disp = (nxt - pts).reshape(len(xywh), grid * grid, 2)
+        ok = status.reshape(len(xywh), grid * grid).astype(bool)
+        disp[~ok] = np.nan
+        valid = ok.sum(axis=1) >= (grid * grid + 1) // 2
+        shift = np.zeros((len(xywh), 2))
+        if valid.any():
+            shift[valid] = np.nanmedian(disp[valid], axis=1)
+        return shift, valid
+
+
+class TrackingSchedule:
+    """Runs the detector every ``detect_every`` frames and tracks in between.
+
+    ``step`` returns True when the detector should run on this frame. The
+    detector also runs whenever no track is alive, so new objects are never
+    waited out for a full interval on an empty scene.
+    """
+
+    def __init__(self, trackers: List[ByteTracker], detect_every: int = 1) -> None:
+        self.trackers = trackers
+        self.detect_every = max(int(detect_every), 1)
+        self._since_detect = 0
+
+    def step(self) -> bool:
+        self._since_detect += 1
+        if self._since_detect >= self.detect_every or not any(len(t) for t in self.trackers):
+            self._since_detect = 0
+            return True
+        return False
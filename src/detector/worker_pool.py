@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.detections import Detections
+
+_READY = "ready"
+
+
+def _worker_main(index: int, detector_kwargs: dict, threads: int, tasks, results) -> None:
+    """Worker process: load one detector, then run jobs whose frames sit in shared memory."""
+    try:
+        if threads > 0:
+            import torch
+
+            torch.set_num_threads(threads)
+        from .yolo_detector import YoloV8Detector
+
+        detector = YoloV8Detector(**detector_kwargs)
+        detector.load()
+    except Exception as e:
+        results.put((_READY, index, f"{type(e).__name__}: {e}"))
+        return
+    results.put((_READY, index, None))
+
+    # One mapping per slot; a slot whose segment was regrown arrives under a new name
+    attached: Dict[int, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, name, layout = task
+            try:
+                shm = attached.get(slot)
+                if shm is None or shm.name != name:
+                    if shm is not None:
+                        # Drop the stale mapping so the unlinked segment is freed
+                        del attached[slot]
+                        shm.close()
+                    shm = attached[slot] = shared_memory.SharedMemory(name=name)
+                images = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset) for offset, shape in layout]
+                out = detector.infer_batch(images)
+                del images
+                results.put((seq, slot, out))
+            except Exception as e:
+                results.put((seq, slot, f"{type(e).__name__}: {e}"))
+    finally:
+        for shm in attached.values():
+            shm.close()
+
+
+class ProcessPoolDetector:
+    """Runs ``workers`` detector processes, each with its own loaded model.
+
+    Frames go to the workers through ``multiprocessing.shared_memory`` slots
+    (one copy into the slot, no pickled arrays); only the small detection
+    arrays come back through a queue. Jobs may finish out of order, results
+    are handed back by sequence number. Exposes the detector interface
+    (``infer``/``infer_batch`` and the split ``begin``/``forward``/``finish``):
+    ``begin`` submits a job and ``finish`` waits for it, so a caller that
+    keeps several frames in flight (``runtime.pipeline``) keeps all workers
+    busy. Each worker gets ``threads`` intra-op threads (default: the CPU
+    count split evenly) so the processes do not oversubscribe the cores.
+    """
+
+    def __init__(
+        self,
+        detector_kwargs: dict,
+        workers: int = 2,
+        slots: Optional[int] = None,
+        threads: Optional[int] = None,
+        start_timeout_s: float = 300.0,
+        logger=None,
+    ) -> None:
+        self.workers = max(1, int(workers))
+        self.num_slots = int(slots) if slots else 2 * self.workers
+        self.threads = int(threads) if threads else max(1, (os.cpu_count() or 1) // self.workers)
+        self.start_timeout_s = float(start_timeout_s)
+        self.logger = logger
+
+        kwargs = dict(detector_kwargs)
+        kwargs["logger"] = None  # loggers do not cross process boundaries
+        onnx_options = dict(kwargs.get("onnx_options") or {})
+        if not onnx_options.get("intra_op_threads"):
+            onnx_options["intra_op_threads"] = self.threads
+        kwargs["onnx_options"] = onnx_options
+        self._kwargs = kwargs
+
+        self._ctx = mp.get_context("spawn")  # CUDA and torch thread pools do not survive fork
+        self._tasks = None
+        self._results = None
+        self._procs: List = []
+        self._shms: List[Optional[shared_memory.SharedMemory]] = [None] * self.num_slots
+        self._free: List[int] = list(range(self.num_slots))
+        self._done: Dict[int, object] = {}
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._collector: Optional[threading.Thread] = None
+        self._closed = False
+
+    def load(self) -> None:
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        for i in range(self.workers):
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(i, self._kwargs, self.threads, self._tasks, self._results),
+                name=f"detector-{i}",
+                daemon=True,
+            )
+            p.start()
+            self._procs.append(p)
+        deadline = time.monotonic() + self.start_timeout_s
+        pending = self.workers
+        while pending:
+            try:
+                _, index, error = self._results.get(timeout=1.0)
+            except queue.Empty:
+                # A worker that dies before reporting (e.g. killed while importing) never sends READY
+                dead = [p.name for p in self._procs if not p.is_alive()]
+                if dead or time.monotonic() > deadline:
+                    self.close()
+                    reason = f"{', '.join(dead)} exited" if dead else f"not ready after {self.start_timeout_s:.0f} s"
+                    raise RuntimeError(f"Detector workers failed to start: {reason}") from None
+                continue
+            if error is not None:
+                self.close()
+                raise RuntimeError(f"Detector worker {index} failed to load: {error}")
+            pending -= 1
+        self._collector = threading.Thread(target=self._collect, name="detector-pool-results", daemon=True)
+        self._collector.start()
+        if self.logger:
+            self.logger.info(f"Started {self.workers} detector worker processes ({self.threads} threads each)")
+
+    def _collect(self) -> None:
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            seq, slot, out = item
+            with self._cond:
+                self._done[seq] = out
+                self._free.append(slot)
+                self._cond.notify_all()
+
+    def _wait(self, predicate) -> None:
+        """Wait on the condition (held by the caller) until ``predicate``, failing if a worker died."""
+        while not predicate():
+            if not all(p.is_alive() for p in self._procs):
+                raise RuntimeError("A detector worker process exited")
+            self._cond.wait(timeout=1.0)
+
+    def _slot_buffer(self, slot: int, nbytes: int) -> shared_memory.SharedMemory:
+        shm = self._shms[slot]
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                # Unlinking drops the name; workers close their mapping when the slot's name changes
+                shm.close()
+                shm.unlink()
+            shm = self._shms[slot] = shared_memory.SharedMemory(create=True, size=nbytes)
+        return shm
+
+    def submit(self, images: Sequence[np.ndarray]) -> int:
+        """Copy ``images`` into a free shared-memory slot and queue them; returns the job sequence number."""
+        if self._collector is None:
+            raise RuntimeError("Detector not loaded")
+        with self._cond:
+            self._wait(lambda: bool(self._free))
+            slot = self._free.pop()
+            seq = self._seq
+            self._seq += 1
+
+        layout: List[Tuple[int, Tuple[int, ...]]] = []
+        offset = 0
+        for image in images:
+            layout.append((offset, tuple(image.shape)))
+            offset += (image.nbytes + 63) // 64 * 64
+        shm = self._slot_buffer(slot, max(offset, 1))
+        for image, (off, shape) in zip(images, layout):
+            np.copyto(np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=off), image)
+        self._tasks.put((seq, slot, shm.name, layout))
+        return seq
+
+    def result(self, seq: int) -> List[Detections]:
+        """Wait for job ``seq``; results of other jobs stay buffered until asked for."""
+        with self._cond:
+            self._wait(lambda: seq in self._done)
+            out = self._done.pop(seq)
+        if isinstance(out, str):
+            raise RuntimeError(f"Detector worker failed: {out}")
+        return out
+
+    def begin(self, images_bgr: List[np.ndarray], buffer: int = 0) -> int:
+        return self.submit(images_bgr)
+
+    def forward(self, pending: int) -> int:
+        return pending
+
+    def finish(self, pending: int) -> List[Detections]:
+        return self.result(pending)
+
+    def infer(self, image_bgr: np.ndarray) -> Detections:
+        return self.result(self.submit([image_bgr]))[0]
+
+    def infer_batch(self, images_bgr: List[np.ndarray], max_batch: Optional[int] = None) -> List[Detections]:
+        if not images_bgr:
+            return []
+        return self.result(self.submit(images_bgr))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._tasks is not None:
+            for _ in self._procs:
+                self._tasks.put(None)
+        for p in self._procs:
+            p.join(timeout=5.0)
+            if p.is_alive():
+                p.terminate()
+        if self._collector is not None:
+            self._results.put(None)
+            self._collector.join(timeout=5.0)
+        for shm in self._shms:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._shms = [None] * self.num_slots
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import time
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
 import numpy as np
 
+from utils.detections import Detections
+from .backends import TorchBackend
+
 
 def _ensure_torchvision_stub() -> None:
     try:
@@ -17,36 +20,15 @@ def _ensure_torchvision_stub() -> None:
     # Create a minimal torchvision stub with ops.nms at runtime
     import sys
     import types
-    import torch
-
-    def nms(boxes: torch.Tensor, scores: torch.Tensor, iou_threshold: float) -> torch.Tensor:
-        if boxes.numel() == 0:
-            return torch.empty((0,), dtype=torch.int64, device=boxes.device)
-        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
-        areas = (x2 - x1).clamp(min=0) * (y2 - y1).clamp(min=0)
-        order = scores.argsort(descending=True)
-        keep = []
-        while order.numel() > 0:
-            i = order[0]
-            keep.append(i)
-            if order.numel() == 1:
-                break
-            xx1 = torch.maximum(x1[i], x1[order[1:]])
-            yy1 = torch.maximum(y1[i], y1[order[1:]])
-            xx2 = torch.minimum(x2[i], x2[order[1:]])
-            yy2 = torch.minimum(y2[i], y2[order[1:]])
-            w = (xx2 - xx1).clamp(min=0)
-            h = (yy2 - yy1).clamp(min=0)
-            inter = w * h
-            iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
-            inds = (iou <= iou_threshold).nonzero(as_tuple=False).squeeze(1)
-            order = order[inds + 1]
-        return torch.stack(keep) if len(keep) else torch.empty((0,), dtype=torch.int64, device=boxes.device)
+
+    from .nms import batched_nms, box_iou, nms
 
     tv = types.ModuleType("torchvision")
     tv.__dict__["__version__"] = "0.9.0"
     ops = types.ModuleType("torchvision.ops")
     ops.nms = nms
+    ops.batched_nms = batched_nms
+    ops.box_iou = box_iou
     tv.ops = ops
     sys.modules["torchvision"] = tv
     sys.modules["torchvision.ops"] = ops
@@ -61,6 +43,16 @@ class YoloV8Detector:
         conf_threshold: float = 0.25,
         iou_threshold: float = 0.45,
         classes: Optional[list[int]] = None,
+        engine: str = "ultralytics",
+        imgsz: int = 640,
+        max_batch: int = 4,
+        max_det: int = 300,
+        artifact_cache: Optional[str] = None,
+        backend: str = "torch",
+        onnx_path: Optional[str] = None,
+        onnx_options: Optional[dict] = None,
+        input_buffers: int = 1,
+        fixed_imgsz: bool = False,
         logger=None,
     ) -> None:
         self.model_path = model_path
@@ -69,13 +61,130 @@ class YoloV8Detector:
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
         self.classes = classes
+        self.engine = engine.strip().lower()
+        if self.engine not in {"ultralytics", "direct"}:
+            raise ValueError(f"Unknown detector engine: {engine}")
+        self.backend = backend.strip().lower()
+        if self.backend not in {"torch", "onnxruntime"}:
+            raise ValueError(f"Unknown detector backend: {backend}")
+        if self.backend != "torch":
+            # Non-torch backends only plug into the direct engine's pre/post-processing
+            self.engine = "direct"
+        self.onnx_path = onnx_path or None
+        self.onnx_options = dict(onnx_options or {})
+        self.imgsz = int(imgsz)
+        self.max_batch = int(max_batch)
+        self.max_det = int(max_det)
+        self.artifact_cache = artifact_cache or None
+        # Input buffer sets of the direct engine, one per frame a pipelined caller keeps in flight
+        self.input_buffers = max(1, int(input_buffers))
+        # Ultralytics engine: predict at ``imgsz`` instead of the frame's long side
+        self.fixed_imgsz = fixed_imgsz
         self.logger = logger
 
         self._model = None
         self._class_names = None
+        self._device = None
+        self._predict_device = None
+        self._engine = None
 
     def load(self) -> None:
         import torch
+
+        if self.backend == "onnxruntime":
+            self._load_onnxruntime()
+            return
+
+        device = self._resolve_device()
+        self._device = device
+        self._predict_device = 0 if device.type == "cuda" else "cpu"
+
+        cache = None
+        cache_key = None
+        if self.engine == "direct" and self.artifact_cache:
+            from .model_cache import ModelArtifactCache, artifact_key
+
+            cache = ModelArtifactCache(self.artifact_cache, logger=self.logger)
+            precision = "fp16" if device.type == "cuda" and self.half else "fp32"
+            cache_key = artifact_key(self.model_path, device, precision, self.imgsz, [1, self.max_batch])
+            hit = cache.load(cache_key, device)
+            if hit is not None:
+                traced, meta = hit
+                self._class_names = meta["names"]
+                self._build_engine(TorchBackend(traced, device, dtype=getattr(torch, meta["dtype"]), stride=meta["stride"]))
+                if self.logger:
+                    self.logger.info(f"Loaded cached YOLO artifact for {self.model_path} on {device} (engine=direct)")
+                return
+
+        self._load_ultralytics(device)
+        self._class_names = self._model.model.names
+
+        if self.engine == "direct":
+            model = self._fused_model().to(device)
+            stride = int(max(model.stride.max().item(), 32))
+            dtype = next(model.parameters()).dtype
+            if cache is not None:
+                try:
+                    model, _ = cache.save(cache_key, model, self._class_names, stride, dtype)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.warning(f"Model tracing failed, running eager: {e}")
+            self._build_engine(TorchBackend(model, device, dtype=dtype, stride=stride))
+
+        if self.logger:
+            self.logger.info(f"Loaded YOLO model: {self.model_path} on {device} (engine={self.engine})")
+
+    def _load_onnxruntime(self) -> None:
+        import torch
+
+        from .model_cache import round_imgsz
+        from .onnx_backend import OnnxRuntimeBackend, export_onnx, resolve_onnx_path
+
+        # ONNX Runtime runs on the CPU execution provider; pre/post-processing follows it
+        self._device = torch.device("cpu")
+        self._predict_device = "cpu"
+        path = resolve_onnx_path(self.model_path, self.onnx_path, self.artifact_cache, self.imgsz)
+        opts = self.onnx_options
+        int8 = str(opts.get("int8") or "").strip().lower()
+        if int8:
+            from .quantization import int8_path
+
+            path = int8_path(str(path), int8)
+            if not path.exists():
+                raise FileNotFoundError(
+                    f"INT8 model {path} not found; create it with scripts/quantize_model.py --mode {int8}"
+                )
+        elif not path.exists():
+            self._load_ultralytics(self._device)
+            model = self._fused_model().float()
+            stride = int(max(model.stride.max().item(), 32))
+            export_onnx(model, str(path), round_imgsz(self.imgsz, stride), self._model.model.names, stride)
+            self._model = None
+            if self.logger:
+                self.logger.info(f"Exported ONNX model to {path}")
+        backend = OnnxRuntimeBackend(
+            str(path),
+            intra_op_threads=int(opts.get("intra_op_threads", 0)),
+            inter_op_threads=int(opts.get("inter_op_threads", 0)),
+            graph_optimization=str(opts.get("graph_optimization", "all")),
+            logger=self.logger,
+        )
+        self._class_names = backend.names
+        self._build_engine(backend)
+        if self.logger:
+            self.logger.info(f"Loaded ONNX model: {path} (backend=onnxruntime, engine=direct)")
+
+    def _fused_model(self):
+        model = self._model.model
+        try:
+            model = model.fuse(verbose=False)
+        except Exception:
+            pass
+        return model.eval()
+
+    def _load_ultralytics(self, device) -> None:
+        import torch
+
         _ensure_torchvision_stub()
         from ultralytics import YOLO
 
@@ -103,7 +212,6 @@ class YoloV8Detector:
         except Exception:
             pass
 
-        device = self._resolve_device()
         self._model = YOLO(self.model_path)
 
         if device.type == "cuda":
@@ -120,9 +228,22 @@ class YoloV8Detector:
                 if self.logger:
                     self.logger.warning("FP16 not supported; continuing in FP32")
 
-        self._class_names = self._model.model.names
-        if self.logger:
-            self.logger.info(f"Loaded YOLO model: {self.model_path} on {device}")
+    def _build_engine(self, backend) -> None:
+        from .direct_engine import DirectYoloEngine
+
+        self._engine = DirectYoloEngine(
+            backend,
+            imgsz=self.imgsz,
+            max_batch=self.max_batch,
+            conf_threshold=self.conf_threshold,
+            iou_threshold=self.iou_threshold,
+            classes=self.classes,
+            max_det=self.max_det,
+            names=self._class_names,
+            buffers=self.input_buffers,
+        )
+        # First calls pay for allocator growth and JIT profiling; do it before capture starts
+        self._engine.warmup(sorted({1, self.max_batch}))
 
     def _resolve_device(self):
         import torch
@@ -135,45 +256,94 @@ class YoloV8Detector:
             device = torch.device(f"cuda:{self.device}")
         return device
 
-    def infer(self, image_bgr: np.ndarray) -> List[Dict[str, Any]]:
-        if self._model is None:
+    def infer(self, image_bgr: np.ndarray) -> Detections:
+        if self._model is None and self._engine is None:
             raise RuntimeError("Detector not loaded")
+        if self._engine is not None:
+            return self._engine.infer([image_bgr])[0]
 
         results = self._model.predict(
             source=image_bgr,
             conf=self.conf_threshold,
             iou=self.iou_threshold,
-            imgsz=max(image_bgr.shape[0], image_bgr.shape[1]),
+            imgsz=self.imgsz if self.fixed_imgsz else max(image_bgr.shape[0], image_bgr.shape[1]),
             classes=self.classes,
             verbose=False,
-            device=0 if self._resolve_device().type == "cuda" else "cpu",
+            device=self._predict_device,
         )
 
-        detections: List[Dict[str, Any]] = []
-        r = results[0]
-        if r.boxes is None or len(r.boxes) == 0:
-            return detections
+        return self._to_detections(results[0])
 
-        for b in r.boxes:
-            xyxy = b.xyxy[0].tolist()
-            x1, y1, x2, y2 = [int(v) for v in xyxy]
-            conf = float(b.conf[0].item()) if hasattr(b, "conf") else float(b.confidence)
-            cls_id = int(b.cls[0].item()) if hasattr(b, "cls") else int(b.class_id)
+    def begin(self, images_bgr: List[np.ndarray], buffer: int = 0) -> tuple:
+        """First step of a split :meth:`infer_batch`: ``begin`` -> :meth:`forward` -> :meth:`finish`.
 
-            class_name = (
-                self._class_names[cls_id]
-                if self._class_names and cls_id in self._class_names
-                else str(cls_id)
-            )
+        With the direct engine the steps are preprocessing (into input buffer
+        set ``buffer``), the forward pass and postprocessing, so a pipelined
+        caller can overlap them across frames on different threads. Otherwise
+        (Ultralytics engine, or more images than one preallocated batch) the
+        whole inference happens in :meth:`forward`.
+        """
+        if self._model is None and self._engine is None:
+            raise RuntimeError("Detector not loaded")
+        if self._engine is not None and 0 < len(images_bgr) <= self._engine.max_batch:
+            return ("staged", self._engine.preprocess(images_bgr, buffer))
+        return ("eager", list(images_bgr))
+
+    def forward(self, pending: tuple) -> tuple:
+        kind, data = pending
+        if kind == "staged":
+            return ("staged", self._engine.forward(data))
+        return ("done", self.infer_batch(data))
+
+    def finish(self, pending: tuple) -> List[Detections]:
+        kind, data = pending
+        if kind == "staged":
+            return self._engine.postprocess(data)
+        return data
+
+    def infer_batch(self, images_bgr: List[np.ndarray], max_batch: Optional[int] = None) -> List[Detections]:
+        """Run batched forward passes over several BGR images or crops.
+
+        Images may differ in size; each is letterboxed to a common ``imgsz``.
+        ``max_batch`` caps how many go through one forward pass (all at once by
+        default, at most the preallocated batch with the direct engine).
+        Returns one detection list per input image, in input order.
+        """
+        if self._model is None and self._engine is None:
+            raise RuntimeError("Detector not loaded")
+        if not images_bgr:
+            return []
 
-            detections.append(
-                {
-                    "bbox": [x1, y1, x2, y2],
-                    "score": conf,
-                    "class_id": cls_id,
-                    "class_name": class_name,
-                }
+        images = list(images_bgr)
+        step = len(images) if not max_batch or max_batch <= 0 else int(max_batch)
+        detections: List[Detections] = []
+        if self._engine is not None:
+            step = min(step, self._engine.max_batch)
+            for start in range(0, len(images), step):
+                detections.extend(self._engine.infer(images[start:start + step]))
+            return detections
+
+        imgsz = self.imgsz if self.fixed_imgsz else max(max(img.shape[0], img.shape[1]) for img in images)
+        for start in range(0, len(images), step):
+            results = self._model.predict(
+                source=images[start:start + step],
+                conf=self.conf_threshold,
+                iou=self.iou_threshold,
+                imgsz=imgsz,
+                classes=self.classes,
+                verbose=False,
+                device=self._predict_device,
             )
+            detections.extend(self._to_detections(r) for r in results)
         return detections
 
-
+    def _to_detections(self, r) -> Detections:
+        if r.boxes is None or len(r.boxes) == 0:
+            return Detections.empty(self._class_names)
+        boxes = r.boxes
+        return Detections(
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy(),
+            names=self._class_names,
+        )
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import os
 import json
 import signal
 import sys
 import time
+from dataclasses import dataclass, field, replace
+from typing import Any, List, Optional
 from pathlib import Path
 
 import cv2
@@ -15,11 +18,30 @@ import yaml
 from utils.logger import setup_logger
 from utils.draw import draw_detections
 from camera.realsense_camera import RealSenseCamera
+from camera.frame_ring import ThreadedCamera
+from camera.replay_camera import ReplayCamera
+from camera.box_depth import BoxDepthEstimator
+from camera.deprojection import deproject_and_transform
+from camera.point_cloud import PointCloudExtractor
+from camera.recording import FrameRecorder
+from camera.multi_camera import MultiCameraRig
+from camera.frame_pool import FramePool
+from camera.realsense_camera import FrameData
 from detector.yolo_detector import YoloV8Detector
+from detector.tiling import TiledDetector
+from detector.tracker import ByteTracker, TrackingSchedule
+from detector.worker_pool import ProcessPoolDetector
+from detector.adaptive import AdaptiveDetector, LatencyController
 from output.udp_sender import UdpSender
 from output.tcp_sender import TcpSender
 from output.eki_sender import EkiXmlSender
-from utils.geometry import transform_point_homogeneous
+from utils.geometry import RigidTransform
+from utils.fusion import merge_camera_detections
+from utils.depth_filter import RoiDepthFilter
+from utils.detections import json_default
+from utils.motion_gate import GateMetrics, MotionGate
+from utils.pipeline import StagePipeline
+from utils.tuning import apply_thread_settings, apply_tuned_profile
 
 
 def load_config(path: str) -> dict:
@@ -27,6 +49,146 @@ def load_config(path: str) -> dict:
         return yaml.safe_load(f)
 
 
+def build_camera(cam_cfg: dict, logger):
+    source = str(cam_cfg.get("source", "realsense")).strip().lower()
+    if source == "replay":
+        replay_cfg = cam_cfg.get("replay", {})
+        camera = ReplayCamera(
+            path=replay_cfg["path"],
+            pacing=replay_cfg.get("pacing", "realtime"),
+            loop=bool(replay_cfg.get("loop", False)),
+            fps=float(replay_cfg.get("fps", cam_cfg["color"]["fps"])),
+            logger=logger,
+        )
+    elif source == "realsense":
+        camera = RealSenseCamera(
+            serial=cam_cfg.get("serial") or None,
+            color_width=cam_cfg["color"]["width"],
+            color_height=cam_cfg["color"]["height"],
+            color_fps=cam_cfg["color"]["fps"],
+            depth_width=cam_cfg["depth"]["width"],
+            depth_height=cam_cfg["depth"]["height"],
+            depth_fps=cam_cfg["depth"]["fps"],
+            align_to_color=cam_cfg.get("align_to_color", True),
+            align_mode=cam_cfg.get("align_mode", "full"),
+            pool_size=int(cam_cfg.get("pool_size", 4)),
+            logger=logger,
+        )
+    else:
+        raise ValueError(f"Unknown camera.source: {source}")
+
+    if cam_cfg.get("threaded", False):
+        camera = ThreadedCamera(camera, ring_size=int(cam_cfg.get("ring_size", 4)), logger=logger)
+    return camera
+
+
+def record_frame(recorder: FrameRecorder, frame: FrameData) -> None:
+    if frame.aligner is not None and frame.depth is not None:
+        # Recording is the one consumer that needs the whole frame aligned
+        frame = replace(frame, depth=frame.aligner.align_full(frame.depth), aligner=None, release_fn=None)
+    recorder.write(frame)
+
+
+def build_depth_filter(filt_cfg: dict) -> RoiDepthFilter:
+    return RoiDepthFilter(
+        spatial=bool(filt_cfg.get("spatial", True)),
+        spatial_radius=int(filt_cfg.get("spatial_radius", 2)),
+        spatial_delta=float(filt_cfg.get("spatial_delta", 20.0)),
+        spatial_iterations=int(filt_cfg.get("spatial_iterations", 1)),
+        temporal=bool(filt_cfg.get("temporal", True)),
+        temporal_alpha=float(filt_cfg.get("temporal_alpha", 0.4)),
+        temporal_delta=float(filt_cfg.get("temporal_delta", 20.0)),
+        temporal_persistence=int(filt_cfg.get("temporal_persistence", 3)),
+        hole_fill=bool(filt_cfg.get("hole_fill", True)),
+        hole_fill_mode=str(filt_cfg.get("hole_fill_mode", "nearest")),
+        hole_fill_iterations=int(filt_cfg.get("hole_fill_iterations", 2)),
+    )
+
+
+def build_depth_estimator(est_cfg: dict) -> BoxDepthEstimator:
+    return BoxDepthEstimator(
+        method=str(est_cfg.get("method", "center")),
+        samples=int(est_cfg.get("samples", 16)),
+        shrink=float(est_cfg.get("shrink", 0.5)),
+        percentile=float(est_cfg.get("percentile", 50.0)),
+        trim=float(est_cfg.get("trim", 0.2)),
+        bin_size=float(est_cfg.get("bin_size", 10.0)),
+        min_valid=float(est_cfg.get("min_valid", 0.1)),
+    )
+
+
+def build_point_cloud(cloud_cfg: dict) -> PointCloudExtractor:
+    return PointCloudExtractor(
+        voxel_size=float(cloud_cfg.get("voxel_size", 0.005)),
+        stride=int(cloud_cfg.get("stride", 2)),
+        depth_band_m=float(cloud_cfg.get("depth_band_m", 0.05)),
+        min_points=int(cloud_cfg.get("min_points", 10)),
+    )
+
+
+def build_motion_gate(gate_cfg: dict) -> MotionGate:
+    return MotionGate(
+        size=tuple(gate_cfg.get("size", [160, 120])),
+        pixel_delta=int(gate_cfg.get("pixel_delta", 12)),
+        changed_fraction=float(gate_cfg.get("changed_fraction", 0.01)),
+        depth_delta=int(gate_cfg.get("depth_delta", 20)),
+        depth_changed_fraction=float(gate_cfg.get("depth_changed_fraction", 0.01)),
+        use_depth=bool(gate_cfg.get("use_depth", True)),
+        refresh_interval_s=float(gate_cfg.get("refresh_interval_s", 1.0)),
+    )
+
+
+@dataclass
+class FrameJob:
+    """One captured frame set on its way through the processing stages."""
+
+    seq: int
+    frames: List[FrameData]
+    colors: List[np.ndarray]
+    run_detector: bool
+    detect: bool
+    t_start: float = 0.0
+    pending: Any = None
+    cpu_s: float = 0.0
+    payload: Optional[dict] = None
+    canvas: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+def snapshot_frame(pool: FramePool, frame: FrameData) -> FrameData:
+    """Copy a frame whose buffers will be reused by the camera into a pooled slot."""
+    depth = frame.depth
+    slot = pool.acquire(
+        frame.color.shape,
+        frame.color.dtype,
+        None if depth is None else depth.shape,
+        np.uint16 if depth is None else depth.dtype,
+    )
+    np.copyto(slot.color, frame.color)
+    if depth is not None:
+        np.copyto(slot.depth, depth)
+    return replace(frame, color=slot.color, depth=slot.depth, release_fn=slot.release_fn)
+
+
+def render_views(colors: list, per_camera: list, draw_overlay: bool, show_depth: bool, canvas: np.ndarray | None = None) -> np.ndarray:
+    """Draw the views side by side into ``canvas``, reallocating it only when the layout changes."""
+    height = colors[0].shape[0]
+    widths = [c.shape[1] if c.shape[0] == height else int(c.shape[1] * height / c.shape[0]) for c in colors]
+    shape = (height, sum(widths), 3)
+    if canvas is None or canvas.shape != shape:
+        canvas = np.empty(shape, dtype=np.uint8)
+    x = 0
+    for color, detections, width in zip(colors, per_camera, widths):
+        view = canvas[:, x:x + width]
+        if color.shape[:2] == view.shape[:2]:
+            np.copyto(view, color)
+        else:
+            np.copyto(view, cv2.resize(color, (width, height)))
+        if draw_overlay:
+            draw_detections(view, detections, show_depth=show_depth)
+        x += width
+    return canvas
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", default=str(Path(__file__).resolve().parents[1] / "config" / "config.yaml"))
@@ -41,34 +203,195 @@ def main():
         logfile=config.get("logging", {}).get("file"),
     )
 
-    # Camera setup
-    cam_cfg = config["camera"]
-    camera = RealSenseCamera(
-        serial=cam_cfg.get("serial") or None,
-        color_width=cam_cfg["color"]["width"],
-        color_height=cam_cfg["color"]["height"],
-        color_fps=cam_cfg["color"]["fps"],
-        depth_width=cam_cfg["depth"]["width"],
-        depth_height=cam_cfg["depth"]["height"],
-        depth_fps=cam_cfg["depth"]["fps"],
-        align_to_color=cam_cfg.get("align_to_color", True),
-        logger=logger,
+    # Per-host profile from scripts/autotune.py, then thread counts before any model loads
+    config = apply_tuned_profile(config, logger)
+    apply_thread_settings(
+        torch_threads=int(config["runtime"].get("torch_threads", 0)),
+        opencv_threads=int(config["runtime"].get("opencv_threads", -1)),
     )
 
+    # Camera setup: a single camera, or a rig when camera.cameras lists several
+    cam_cfg = config["camera"]
+    T_default = config.get("calibration", {}).get("T_cam_to_robot")
+    camera_entries = cam_cfg.get("cameras") or []
+    if camera_entries:
+        base_cfg = {k: v for k, v in cam_cfg.items() if k != "cameras"}
+        rig_cameras = [build_camera({**base_cfg, **entry, "threaded": False}, logger) for entry in camera_entries]
+        camera = MultiCameraRig(
+            rig_cameras,
+            sync_tolerance_ms=float(cam_cfg.get("sync_tolerance_ms", 20.0)),
+            ring_size=int(cam_cfg.get("ring_size", 4)),
+            logger=logger,
+        )
+        T_per_camera = [entry.get("T_cam_to_robot", T_default) for entry in camera_entries]
+    else:
+        camera = build_camera(cam_cfg, logger)
+        T_per_camera = [T_default]
+    num_cameras = len(T_per_camera)
+    # Parse and validate the camera->robot transforms once; a malformed matrix stops startup
+    cam_to_robot = []
+    for cam_idx, T in enumerate(T_per_camera):
+        try:
+            transform = None if T is None else RigidTransform(T)
+        except ValueError as e:
+            raise SystemExit(f"Invalid T_cam_to_robot for camera {cam_idx}: {e}")
+        if transform is not None and not transform.is_rigid:
+            logger.warning(
+                f"T_cam_to_robot for camera {cam_idx} is not a rigid transform "
+                "(rotation block not orthonormal with det +1); applying it as given, e.g. with a unit scale"
+            )
+        cam_to_robot.append(transform)
+    merge_radius_m = float(cam_cfg.get("merge_radius_m", 0.05))
+
+    # ROI depth filters (one per camera, the temporal state is per pixel)
+    filt_cfg = config.get("depth_filter", {})
+    depth_filters = [build_depth_filter(filt_cfg) for _ in range(num_cameras)] if filt_cfg.get("enabled", False) else []
+
+    # Per-box depth estimator (stateless, shared by all cameras)
+    try:
+        depth_estimator = build_depth_estimator(config.get("depth_estimation", {}))
+    except ValueError as e:
+        raise SystemExit(f"Invalid depth_estimation config: {e}")
+
+    # Per-detection point clouds for grasp planning (stateless, shared by all cameras)
+    cloud_cfg = config.get("point_cloud", {})
+    try:
+        point_clouds = build_point_cloud(cloud_cfg) if cloud_cfg.get("enabled", False) else None
+    except ValueError as e:
+        raise SystemExit(f"Invalid point_cloud config: {e}")
+
+    # Motion gate: skip inference while the scene is static (one per camera)
+    gate_cfg = config.get("motion_gate", {})
+    gates = [build_motion_gate(gate_cfg) for _ in range(num_cameras)] if gate_cfg.get("enabled", False) else []
+    gate_metrics = GateMetrics()
+    gate_log_interval_s = float(gate_cfg.get("log_interval_s", 30.0))
+
     # Detector setup
     det_cfg = config["model"]
     run_cfg = config["runtime"]
     mode = (args.mode or run_cfg.get("mode", "realtime")).strip().lower()
     warmup_frames = int(run_cfg.get("warmup_frames", 3))
-    detector = YoloV8Detector(
+    pipe_cfg = run_cfg.get("pipeline", {})
+    pipelined = bool(pipe_cfg.get("enabled", False)) and mode == "realtime"
+    # model.workers > 0: that many detector processes fed through shared memory
+    workers = int(det_cfg.get("workers", 0))
+    in_flight = 1
+    if pipelined:
+        # 0 (auto): one frame per worker plus the one being published
+        in_flight = max(0, int(pipe_cfg.get("max_in_flight", 0))) or (workers + 1 if workers > 0 else 2)
+        if workers > 0 and in_flight < workers + 1:
+            logger.warning(
+                f"runtime.pipeline.max_in_flight={in_flight} keeps at most {max(in_flight - 1, 1)} of "
+                f"{workers} detector workers busy; set it to {workers + 1} or more (or 0 for auto)"
+            )
+        pool_size = int(cam_cfg.get("pool_size", 4))
+        if cam_cfg.get("source", "realsense") == "realsense" and pool_size < in_flight + 2:
+            logger.warning(
+                f"camera.pool_size={pool_size} is below max_in_flight + 2 = {in_flight + 2}; "
+                "capture will wait for buffers"
+            )
+    # ROIs/tiles: every crop of every camera frame goes through one infer_batch call
+    tile_cfg = det_cfg.get("tiles", {})
+    tiling = None
+    if det_cfg.get("rois") or tile_cfg.get("enabled", False):
+        tiling = dict(
+            rois=det_cfg.get("rois") or None,
+            tile_size=int(tile_cfg.get("size", det_cfg.get("imgsz", 640))) if tile_cfg.get("enabled", False) else None,
+            tile_overlap=int(tile_cfg.get("overlap", 64)),
+            nms_iou=float(tile_cfg.get("nms_iou", 0.5)),
+        )
+    batch_needed = max(num_cameras, 1)
+    if tiling is not None:
+        color_cfgs = [{**cam_cfg["color"], **entry.get("color", {})} for entry in camera_entries] or [cam_cfg["color"]]
+        tiler = TiledDetector(None, **tiling)
+        batch_needed = sum(max(len(tiler.crops((int(c["height"]), int(c["width"])))), 1) for c in color_cfgs)
+    # 0 (auto): one forward pass per frame set; a smaller batch splits it into several passes
+    max_batch = int(det_cfg.get("max_batch", 0)) or batch_needed
+    if max_batch < batch_needed:
+        logger.warning(
+            f"model.max_batch={max_batch} is below the {batch_needed} crops per frame set (cameras x ROIs/tiles); "
+            f"each frame takes {-(-batch_needed // max_batch)} forward passes. Set it to {batch_needed} (or 0 for auto)"
+        )
+    detector_kwargs = dict(
         model_path=det_cfg["path"],
         device=run_cfg.get("device", "auto"),
         half=run_cfg.get("half", True),
         conf_threshold=det_cfg.get("conf_threshold", 0.25),
         iou_threshold=det_cfg.get("iou_threshold", 0.45),
         classes=det_cfg.get("classes") or None,
+        engine=det_cfg.get("engine", "ultralytics"),
+        imgsz=int(det_cfg.get("imgsz", 640)),
+        max_batch=max_batch,
+        max_det=int(det_cfg.get("max_det", 300)),
+        artifact_cache=det_cfg.get("artifact_cache") or None,
+        backend=det_cfg.get("backend", "torch"),
+        onnx_path=det_cfg.get("onnx_path") or None,
+        onnx_options=det_cfg.get("onnxruntime", {}),
+        input_buffers=in_flight,
         logger=logger,
     )
+    worker_pool = None
+    if workers > 0:
+        if not pipelined:
+            logger.warning("model.workers only runs frames in parallel with runtime.pipeline.enabled")
+        detector_kwargs["input_buffers"] = 1
+        detector = worker_pool = ProcessPoolDetector(
+            detector_kwargs,
+            workers=workers,
+            threads=int(det_cfg.get("worker_threads", 0)) or None,
+            logger=logger,
+        )
+    # runtime.latency_budget: pre-loaded resolution/model levels picked from the rolling p95 latency
+    lat_cfg = run_cfg.get("latency_budget", {})
+    adaptive = None
+    if lat_cfg.get("enabled", False) and workers > 0:
+        logger.warning("runtime.latency_budget is not supported with model.workers; using fixed model.imgsz")
+    elif lat_cfg.get("enabled", False):
+        levels = [lvl if isinstance(lvl, dict) else {"imgsz": lvl} for lvl in lat_cfg.get("levels", [640, 480, 320])]
+        level_detectors = [
+            YoloV8Detector(
+                **{
+                    **detector_kwargs,
+                    "model_path": lvl.get("model", det_cfg["path"]),
+                    "imgsz": int(lvl.get("imgsz", det_cfg.get("imgsz", 640))),
+                    "fixed_imgsz": True,
+                }
+            )
+            for lvl in levels
+        ]
+        labels = [f"{Path(lvl.get('model', det_cfg['path'])).stem}@{lvl.get('imgsz', det_cfg.get('imgsz', 640))}" for lvl in levels]
+        controller = LatencyController(
+            budget_ms=float(lat_cfg.get("budget_ms", 50.0)),
+            num_levels=len(levels),
+            window=int(lat_cfg.get("window", 60)),
+            up_ratio=float(lat_cfg.get("up_ratio", 0.6)),
+            hold_frames=int(lat_cfg.get("hold_frames", 30)),
+        )
+        detector = adaptive = AdaptiveDetector(level_detectors, controller, labels=labels, logger=logger)
+    if worker_pool is None and adaptive is None:
+        detector = YoloV8Detector(**detector_kwargs)
+    if tiling is not None:
+        detector = TiledDetector(detector, **tiling)
+
+    # Tracking: stable IDs, and optionally detect every N frames and track in between
+    track_cfg = config.get("tracking", {})
+    trackers = []
+    if track_cfg.get("enabled", False):
+        track_ids = itertools.count(1)
+        trackers = [
+            ByteTracker(
+                high_threshold=float(track_cfg.get("high_threshold", 0.5)),
+                new_track_threshold=float(track_cfg.get("new_track_threshold", 0.6)),
+                match_iou=float(track_cfg.get("match_iou", 0.2)),
+                low_match_iou=float(track_cfg.get("low_match_iou", 0.5)),
+                max_age=int(track_cfg.get("max_age", 30)),
+                min_hits=int(track_cfg.get("min_hits", 2)),
+                flow=bool(track_cfg.get("optical_flow", True)),
+                id_source=track_ids,
+            )
+            for _ in range(num_cameras)
+        ]
+    schedule = TrackingSchedule(trackers, detect_every=int(track_cfg.get("detect_every", 1)))
 
     # UDP setup
     udp_cfg = config["output"]["udp"]
@@ -107,7 +430,6 @@ def main():
         preview_window = False
     draw_overlay = run_cfg.get("draw", True)
     send_xyz = udp_cfg.get("send_depth_xyz", True)
-    T_cam_to_robot = config.get("calibration", {}).get("T_cam_to_robot")
     max_det = int(udp_cfg.get("max_detections", 20))
     max_fps = float(run_cfg.get("max_fps", 30))
 
@@ -117,106 +439,237 @@ def main():
     latest_path = str(latest_jpeg_cfg.get("path", Path(__file__).resolve().parents[1] / "output" / "latest.jpg"))
     os.makedirs(os.path.dirname(latest_path), exist_ok=True)
 
+    # Session recorder (memory-mapped segments + index) for offline tuning
+    rec_cfg = config.get("recording", {})
+    recorders = []
+    if rec_cfg.get("enabled", False):
+        session_dir = Path(rec_cfg.get("path", Path(__file__).resolve().parents[1] / "recordings")) / time.strftime("%Y%m%d-%H%M%S")
+        for cam_idx in range(num_cameras):
+            recorders.append(
+                FrameRecorder(
+                    str(session_dir / f"cam{cam_idx}" if num_cameras > 1 else session_dir),
+                    frames_per_segment=int(rec_cfg.get("frames_per_segment", 300)),
+                    logger=logger,
+                )
+            )
+
     def handle_sigint(signum, frame):
         raise KeyboardInterrupt
 
     signal.signal(signal.SIGINT, handle_sigint)
 
-    camera.start()
+    # Threaded capture records every captured frame from its capture thread;
+    # the main loop only sees the freshest ones
+    capture_threads = camera.cameras if isinstance(camera, MultiCameraRig) else [camera]
+    record_in_loop = bool(recorders) and not all(isinstance(cam, ThreadedCamera) for cam in capture_threads)
+    if recorders and not record_in_loop:
+        for cam, recorder in zip(capture_threads, recorders):
+            cam.on_frame = lambda frame, recorder=recorder: record_frame(recorder, frame)
+
+    # Load the model first so threaded capture does not fill up while it loads;
+    # recorders start before capture so the capture hook can write right away
     detector.load()
+    for recorder in recorders:
+        recorder.start()
+    camera.start()
+
+    # Per-frame work as three stages: detector preprocessing, forward pass, and
+    # postprocessing + depth/XYZ + publishing. Pipelined mode runs each stage on
+    # its own thread; otherwise they run back to back on this thread.
+    last_per_camera = None
+    last_detections = None
+    last_gate_log = time.monotonic()
+    canvases = [None] * (in_flight + 1 if pipelined else 1)
+
+    def stage_preprocess(job: FrameJob) -> FrameJob:
+        t0 = time.thread_time()
+        if job.run_detector and job.detect:
+            job.pending = detector.begin(job.colors, buffer=job.seq)
+        job.cpu_s += time.thread_time() - t0
+        return job
+
+    def stage_forward(job: FrameJob) -> FrameJob:
+        t0 = time.thread_time()
+        if job.pending is not None:
+            job.pending = detector.forward(job.pending)
+        job.cpu_s += time.thread_time() - t0
+        return job
+
+    def stage_publish(job: FrameJob) -> FrameJob:
+        nonlocal last_per_camera, last_detections, last_gate_log
+        t0 = time.thread_time()
+        frames, colors = job.frames, job.colors
+        if job.run_detector:
+            if job.detect:
+                per_camera = detector.finish(job.pending)
+                job.pending = None
+                if trackers:
+                    per_camera = [tracker.update(dets, color) for tracker, dets, color in zip(trackers, per_camera, colors)]
+            else:
+                per_camera = [tracker.predict(color) for tracker, color in zip(trackers, colors)]
 
+            # depth + XYZ
+            for cam_idx, (frame, detections, transform) in enumerate(zip(frames, per_camera, cam_to_robot)):
+                if not send_xyz or frame.depth is None or frame.intrinsics is None:
+                    continue
+                boxes = detections.boxes
+                cx, cy = detections.centers.T
+                depth = frame.depth
+                if frame.aligner is not None:
+                    depth = frame.aligner.align_rois(depth, boxes)
+                if depth_filters:
+                    depth = depth_filters[cam_idx].filter_rois(depth, boxes)
+                raw_z, detections.depth_conf[:] = depth_estimator.estimate(depth, boxes)
+                detections.xyz[:], detections.xyz_robot[:] = deproject_and_transform(
+                    depth, cx, cy, frame.intrinsics, transform, raw_depth=raw_z
+                )
+                if point_clouds is not None:
+                    clouds = point_clouds.extract(depth, boxes, frame.intrinsics, transform, ref_z=detections.xyz[:, 2])
+                    detections.centroid[:] = clouds.centroid
+                    detections.obb_center[:] = clouds.obb_center
+                    detections.obb_axes[:] = clouds.obb_axes
+                    detections.obb_extent[:] = clouds.obb_extent
+
+            if len(per_camera) > 1:
+                detections = merge_camera_detections(per_camera, radius_m=merge_radius_m)
+            else:
+                detections = per_camera[0]
+            gate_metrics.record_inference(job.cpu_s + time.thread_time() - t0)
+            last_per_camera, last_detections = per_camera, detections
+        else:
+            # Static scene: re-emit the previous detections (the payload gets a fresh ts)
+            per_camera, detections = last_per_camera, last_detections
+            gate_metrics.record_skip()
+        color = colors[0]
+
+        if gates and time.monotonic() - last_gate_log >= gate_log_interval_s:
+            logger.info(gate_metrics.summary())
+            last_gate_log = time.monotonic()
+
+        # build payload once and send over enabled outputs
+        if udp_sender is not None or tcp_sender is not None or eki_sender is not None:
+            job.payload = {
+                "ts": time.time(),
+                "detections": detections[:max_det],
+                "frame": {
+                    "w": int(color.shape[1]),
+                    "h": int(color.shape[0]),
+                },
+            }
+            if udp_sender is not None:
+                udp_sender.send(job.payload)
+            if tcp_sender is not None:
+                tcp_sender.send(job.payload)
+            if eki_sender is not None:
+                eki_sender.send(job.payload)
+
+        # render once into a reused canvas for both the UI JPEG and the preview
+        # (one per in-flight frame when pipelined, so drawing does not overwrite the previewed one)
+        if save_latest or preview_window:
+            slot = job.seq % len(canvases)
+            canvases[slot] = render_views(colors, per_camera, draw_overlay, show_depth=send_xyz, canvas=canvases[slot])
+            job.canvas = canvases[slot]
+
+        # save latest jpeg for UI
+        if save_latest:
+            try:
+                cv2.imwrite(latest_path, job.canvas)
+            except Exception:
+                pass
+
+        # Pooled frames are no longer referenced
+        for frame in frames:
+            frame.release()
+
+        # Only detector frames say anything about the cost of the current level
+        if adaptive is not None and job.run_detector and job.detect:
+            adaptive.observe((time.monotonic() - job.t_start) * 1000.0)
+        return job
+
+    stages = [stage_preprocess, stage_forward, stage_publish]
+    pipeline = StagePipeline(stages, max_in_flight=in_flight, name="frame") if pipelined else None
+    snapshot_pools = [FramePool(in_flight + 1) for _ in range(num_cameras)] if pipelined else []
+
+    def show(job: FrameJob) -> bool:
+        """Preview a finished frame (on this thread, as HighGUI requires); False when ESC was pressed."""
+        nonlocal preview_window
+        if preview_window and job.canvas is not None:
+            try:
+                cv2.imshow("YOLOv8 + RealSense", job.canvas)
+                if cv2.waitKey(1) & 0xFF == 27:
+                    return False
+            except cv2.error:
+                logger.warning("OpenCV GUI not available; disabling preview window")
+                preview_window = False
+        return True
+
+    frames = []
     try:
         last_time = 0.0
         warm_count = 0
-        for frame in camera.frames():
+        seq = 0
+        for item in camera.frames():
+            t_start = time.monotonic()
+            frames = item if isinstance(item, list) else [item]
+
             # Warm-up for single-shot mode to let auto-exposure/streams stabilize
             if mode == "single" and warm_count < warmup_frames:
                 warm_count += 1
+                for frame in frames:
+                    frame.release()
                 continue
 
+            if record_in_loop:
+                for recorder, frame in zip(recorders, frames):
+                    record_frame(recorder, frame)
+
             # Throttle only in realtime mode
             if mode == "realtime" and max_fps > 0:
                 now = time.time()
                 if now - last_time < 1.0 / max_fps:
+                    for frame in frames:
+                        frame.release()
                     continue
                 last_time = now
 
-            color = frame.color
-            detections = detector.infer(color)
-
-            # depth + XYZ
-            if send_xyz and frame.depth is not None and frame.intrinsics is not None:
-                depth = frame.depth
-                intr = frame.intrinsics
-                for det in detections:
-                    x1, y1, x2, y2 = det["bbox"]
-                    cx = int((x1 + x2) / 2)
-                    cy = int((y1 + y2) / 2)
-                    depth_value = float(depth[cy, cx]) if 0 <= cy < depth.shape[0] and 0 <= cx < depth.shape[1] else 0.0
-                    xyz_cam = RealSenseCamera.depth_to_xyz(cx, cy, depth_value, intr)
-                    det["xyz"] = xyz_cam
-                    if T_cam_to_robot is not None:
-                        try:
-                            det["xyz_robot"] = transform_point_homogeneous(T_cam_to_robot, xyz_cam)
-                        except Exception:
-                            det["xyz_robot"] = None
-
-            # build payload once and send over enabled outputs
-            payload = None
-            if udp_sender is not None or tcp_sender is not None or eki_sender is not None:
-                payload = {
-                    "ts": time.time(),
-                    "detections": [
-                        {
-                            "bbox": d["bbox"],
-                            "score": d["score"],
-                            "class_id": d["class_id"],
-                            "class_name": d.get("class_name"),
-                            "xyz": d.get("xyz"),
-                            "xyz_robot": d.get("xyz_robot"),
-                        }
-                        for d in detections[:max_det]
-                    ],
-                    "frame": {
-                        "w": int(color.shape[1]),
-                        "h": int(color.shape[0]),
-                    },
-                }
-                if udp_sender is not None:
-                    udp_sender.send(payload)
-                if tcp_sender is not None:
-                    tcp_sender.send(payload)
-                if eki_sender is not None:
-                    eki_sender.send(payload)
-
-            # save latest jpeg for UI
-            if save_latest:
-                try:
-                    vis = color.copy()
-                    if draw_overlay:
-                        vis = draw_detections(vis, detections, show_depth=send_xyz)
-                    cv2.imwrite(latest_path, vis)
-                except Exception:
-                    pass
-
-            # preview
-            if preview_window:
-                try:
-                    vis = color.copy()
-                    if draw_overlay:
-                        vis = draw_detections(vis, detections, show_depth=send_xyz)
-                    cv2.imshow("YOLOv8 + RealSense", vis)
-                    if cv2.waitKey(1) & 0xFF == 27:
-                        break
-                except cv2.error:
-                    logger.warning("OpenCV GUI not available; disabling preview window")
-                    preview_window = False
+            # Evaluate every gate so each one keeps its downscaled frame current
+            run_detector = True
+            if gates and mode == "realtime":
+                t_gate = time.thread_time()
+                changed = [gate.changed(frame.color, frame.depth) for gate, frame in zip(gates, frames)]
+                gate_metrics.record_gate(time.thread_time() - t_gate)
+                run_detector = any(changed) or last_per_camera is None
+                if run_detector:
+                    for gate in gates:
+                        gate.commit()
+            detect = run_detector and (not trackers or schedule.step())
+
+            if pipelined:
+                # Ring slots and replay frames are only valid until the next capture; keep a pooled copy
+                frames = [
+                    frame if frame.release_fn is not None else snapshot_frame(pool, frame)
+                    for pool, frame in zip(snapshot_pools, frames)
+                ]
+            job = FrameJob(seq, frames, [frame.color for frame in frames], run_detector, detect, t_start)
+            seq += 1
+            frames = []
+
+            if pipeline is not None:
+                pipeline.submit(job)
+                finished = pipeline.results()
+            else:
+                for stage in stages:
+                    job = stage(job)
+                finished = [job]
+
+            if not all([show(done) for done in finished]):
+                break
 
             # In single-shot mode, process once and exit
             if mode == "single":
-                if payload is not None:
+                if job.payload is not None:
                     try:
-                        print(json.dumps(payload))
+                        print(json.dumps(job.payload, default=json_default))
                     except Exception:
                         pass
                 break
@@ -224,7 +677,20 @@ def main():
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     finally:
+        if pipeline is not None:
+            try:
+                pipeline.close(timeout=5.0)
+            except Exception as e:
+                logger.warning(f"Pipeline stage failed during shutdown: {e}")
+        if worker_pool is not None:
+            worker_pool.close()
+        if gates:
+            logger.info(gate_metrics.summary())
+        for frame in frames:
+            frame.release()
         camera.stop()
+        for recorder in recorders:
+            recorder.stop()
         cv2.destroyAllWindows()
 
 
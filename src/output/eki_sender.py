@@ -3,6 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
+from utils.detections import Detections
 from .tcp_sender import TcpSender
 
 
@@ -39,26 +42,42 @@ class EkiXmlSender:
         ET.SubElement(root, "FrameW").text = str(frame.get("w", 0))
         ET.SubElement(root, "FrameH").text = str(frame.get("h", 0))
 
-        detections = payload.get("detections", [])
+        detections = payload.get("detections")
+        if detections is None:
+            detections = Detections.empty()
+        elif not isinstance(detections, Detections):
+            # List of per-detection dicts (the JSON payload layout)
+            detections = Detections.from_dicts(detections)
         ET.SubElement(root, "NumDet").text = str(len(detections))
 
-        if self.only_first_detection and detections:
-            detections = [detections[0]]
+        if self.only_first_detection and len(detections):
+            detections = detections[:1]
 
         dets_el = ET.SubElement(root, "Detections")
-        for i, det in enumerate(detections):
+        xyz_all = detections.xyz
+        if self.use_robot_xyz:
+            robot_valid = ~np.isnan(detections.xyz_robot).any(axis=1)
+            xyz_all = np.where(robot_valid[:, None], detections.xyz_robot, detections.xyz)
+        for i, (cls_id, score, bbox, xyz, tid, conf) in enumerate(
+            zip(
+                detections.class_ids.tolist(),
+                detections.scores.tolist(),
+                detections.boxes.tolist(),
+                xyz_all.tolist(),
+                detections.track_id.tolist(),
+                detections.depth_conf.tolist(),
+            )
+        ):
             d_el = ET.SubElement(dets_el, f"Det{i}")
-            ET.SubElement(d_el, "Cls").text = str(det.get("class_id", -1))
-            ET.SubElement(d_el, "Score").text = f"{det.get('score', 0.0):.4f}"
-            bbox = det.get("bbox", [0, 0, 0, 0])
+            ET.SubElement(d_el, "Cls").text = str(cls_id)
+            ET.SubElement(d_el, "Id").text = str(tid)
+            ET.SubElement(d_el, "Score").text = f"{score:.4f}"
             ET.SubElement(d_el, "X1").text = str(bbox[0])
             ET.SubElement(d_el, "Y1").text = str(bbox[1])
             ET.SubElement(d_el, "X2").text = str(bbox[2])
             ET.SubElement(d_el, "Y2").text = str(bbox[3])
 
-            xyz_key = "xyz_robot" if self.use_robot_xyz and det.get("xyz_robot") is not None else "xyz"
-            xyz = det.get(xyz_key)
-            if xyz is not None:
+            if xyz[0] == xyz[0]:  # NaN rows have no depth
                 ET.SubElement(d_el, "X").text = f"{xyz[0]:.6f}"
                 ET.SubElement(d_el, "Y").text = f"{xyz[1]:.6f}"
                 ET.SubElement(d_el, "Z").text = f"{xyz[2]:.6f}"
@@ -66,6 +85,7 @@ class EkiXmlSender:
                 ET.SubElement(d_el, "X").text = "NaN"
                 ET.SubElement(d_el, "Y").text = "NaN"
                 ET.SubElement(d_el, "Z").text = "NaN"
+            ET.SubElement(d_el, "DepthConf").text = f"{conf:.3f}" if conf == conf else "NaN"
 
         xml_bytes = ET.tostring(root, encoding="utf-8")
         xml_str = xml_bytes.decode("utf-8")
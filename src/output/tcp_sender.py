@@ -4,6 +4,8 @@ import json
 import socket
 from typing import Any
 
+from utils.detections import json_default
+
 
 class TcpSender:
     def __init__(
@@ -44,7 +46,7 @@ class TcpSender:
     def send(self, payload: Any) -> None:
         data_bytes: bytes
         if isinstance(payload, (dict, list)):
-            text = json.dumps(payload)
+            text = json.dumps(payload, default=json_default)
             if self.send_newline:
                 text += "\n"
             data_bytes = text.encode("utf-8")
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import json
 import socket
-from typing import Any, Dict, List
+from typing import Any, Dict
+
+from utils.detections import json_default
 
 
 class UdpSender:
@@ -13,7 +15,7 @@ class UdpSender:
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
     def send(self, payload: Dict[str, Any]) -> None:
-        data = json.dumps(payload).encode("utf-8")
+        data = json.dumps(payload, default=json_default).encode("utf-8")
         self._sock.sendto(data, (self.host, self.port))
         if self.logger:
             self.logger.debug(f"UDP sent {len(data)} bytes to {self.host}:{self.port}")
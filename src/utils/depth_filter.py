@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_HOLE_FILL_MODES = {"nearest", "farthest", "left"}
+_NEIGHBORS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+
+def _shifted(a: np.ndarray, dy: int, dx: int, pad: int) -> np.ndarray:
+    """View of the padded array ``a`` shifted by (dy, dx) over its interior."""
+    h = a.shape[0] - 2 * pad
+    w = a.shape[1] - 2 * pad
+    return a[pad + dy: pad + dy + h, pad + dx: pad + dx + w]
+
+
+def spatial_filter(patch: np.ndarray, radius: int = 2, delta: float = 20.0, iterations: int = 1) -> np.ndarray:
+    """Edge-preserving smoothing of a z16 patch.
+
+    Each valid pixel becomes the mean of the valid neighbours within
+    ``radius`` whose depth differs from it by at most ``delta`` depth units,
+    so averaging never crosses a depth edge. Holes (0) are left untouched.
+    """
+    out = patch.astype(np.float32)
+    if radius <= 0:
+        return out
+    for _ in range(max(1, iterations)):
+        padded = np.pad(out, radius, mode="constant")
+        acc = np.zeros_like(out)
+        cnt = np.zeros_like(out)
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                nb = _shifted(padded, dy, dx, radius)
+                w = (nb > 0) & (np.abs(nb - out) <= delta)
+                acc += np.where(w, nb, 0.0)
+                cnt += w
+        valid = out > 0
+        out = np.where(valid, acc / np.maximum(cnt, 1.0), 0.0).astype(np.float32)
+    return out
+
+
+def fill_holes(patch: np.ndarray, mode: str = "nearest", iterations: int = 1) -> np.ndarray:
+    """Fill zero pixels from their 8-neighbourhood.
+
+    ``nearest`` takes the closest valid neighbour (smallest depth), ``farthest``
+    the largest, ``left`` the nearest valid pixel to the left on the same row.
+    Each iteration grows the filled region by one pixel (``left`` fills the
+    whole row in one pass).
+    """
+    if mode not in _HOLE_FILL_MODES:
+        raise ValueError(f"Unknown hole fill mode: {mode}")
+    out = patch.astype(np.float32, copy=True)
+
+    if mode == "left":
+        h, w = out.shape
+        idx = np.where(out > 0, np.arange(w)[None, :], 0)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        filled = out[np.arange(h)[:, None], idx]
+        return np.where(out > 0, out, filled)
+
+    sentinel = np.float32(np.inf if mode == "nearest" else -np.inf)
+    for _ in range(max(1, iterations)):
+        holes = out == 0
+        if not holes.any():
+            break
+        padded = np.pad(np.where(out > 0, out, sentinel), 1, mode="constant", constant_values=sentinel)
+        best = np.full(out.shape, sentinel, dtype=np.float32)
+        for dy, dx in _NEIGHBORS:
+            nb = _shifted(padded, dy, dx, 1)
+            best = np.minimum(best, nb) if mode == "nearest" else np.maximum(best, nb)
+        fill = holes & np.isfinite(best)
+        out[fill] = best[fill]
+    return out
+
+
+class TemporalFilter:
+    """Per-pixel exponential smoothing with persistence, state kept across frames.
+
+    Mirrors librealsense's temporal filter: a valid pixel close to its
+    previous value (``delta``) is blended with weight ``alpha``; a missing
+    pixel keeps its last value if it was valid in at least ``persistence`` of
+    the last 8 frames. Only the pixels passed to :meth:`apply` are touched, so
+    the cost follows the ROI area rather than the frame size. Each pixel
+    remembers the call that last updated it; a pixel that was outside the
+    previous call's ROIs starts over instead of blending with stale depth.
+    """
+
+    def __init__(self, alpha: float = 0.4, delta: float = 20.0, persistence: int = 3) -> None:
+        self.alpha = float(alpha)
+        self.delta = float(delta)
+        self.persistence = int(persistence)
+        self._prev: Optional[np.ndarray] = None
+        self._history: Optional[np.ndarray] = None
+        self._updated: Optional[np.ndarray] = None
+        self._frame = 0
+
+    def reset(self) -> None:
+        self._prev = None
+        self._history = None
+        self._updated = None
+        self._frame = 0
+
+    def apply(self, values: np.ndarray, flat_idx: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        if self._prev is None or self._prev.shape[0] != shape[0] * shape[1]:
+            self._prev = np.zeros(shape[0] * shape[1], dtype=np.float32)
+            self._history = np.zeros(shape[0] * shape[1], dtype=np.uint8)
+            self._updated = np.full(shape[0] * shape[1], -1, dtype=np.int64)
+        assert self._history is not None and self._updated is not None
+        self._frame += 1
+
+        # State is only current for pixels updated by the previous call
+        fresh = self._updated[flat_idx] == self._frame - 1
+        prev = np.where(fresh, self._prev[flat_idx], np.float32(0.0))
+        hist = np.where(fresh, self._history[flat_idx], np.uint8(0))
+        cur_valid = values > 0
+        prev_valid = prev > 0
+
+        blend = cur_valid & prev_valid & (np.abs(values - prev) <= self.delta)
+        out = np.where(blend, self.alpha * values + (1.0 - self.alpha) * prev, values)
+        if self.persistence > 0:
+            valid_count = np.unpackbits(hist[:, None], axis=1).sum(axis=1)
+            keep = ~cur_valid & prev_valid & (valid_count >= self.persistence)
+            out = np.where(keep, prev, out)
+
+        self._history[flat_idx] = (hist << 1) | cur_valid.astype(np.uint8)
+        self._prev[flat_idx] = np.where(out > 0, out, prev)
+        self._updated[flat_idx] = self._frame
+        return out.astype(np.float32)
+
+
+class RoiDepthFilter:
+    """Spatial, temporal and hole-filling depth filters applied only inside ROIs.
+
+    Order follows the librealsense recommendation (spatial, temporal, holes).
+    ``filter_rois`` returns a reused z16 frame that holds filtered depth
+    inside the boxes and zero elsewhere. One instance per camera, since the
+    temporal state is per pixel.
+    """
+
+    def __init__(
+        self,
+        spatial: bool = True,
+        spatial_radius: int = 2,
+        spatial_delta: float = 20.0,
+        spatial_iterations: int = 1,
+        temporal: bool = True,
+        temporal_alpha: float = 0.4,
+        temporal_delta: float = 20.0,
+        temporal_persistence: int = 3,
+        hole_fill: bool = True,
+        hole_fill_mode: str = "nearest",
+        hole_fill_iterations: int = 2,
+    ) -> None:
+        if hole_fill_mode not in _HOLE_FILL_MODES:
+            raise ValueError(f"Unknown hole fill mode: {hole_fill_mode}")
+        self.spatial = spatial
+        self.spatial_radius = int(spatial_radius)
+        self.spatial_delta = float(spatial_delta)
+        self.spatial_iterations = int(spatial_iterations)
+        self.hole_fill = hole_fill
+        self.hole_fill_mode = hole_fill_mode
+        self.hole_fill_iterations = int(hole_fill_iterations)
+        self.temporal = TemporalFilter(temporal_alpha, temporal_delta, temporal_persistence) if temporal else None
+
+        self._out: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._stage: Optional[np.ndarray] = None
+        self._dirty: List[Tuple[int, int, int, int]] = []
+
+    def _rois(self, boxes: Iterable[Sequence[float]], shape: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+        h, w = shape
+        rois = []
+        for box in boxes:
+            x0 = max(int(box[0]), 0)
+            y0 = max(int(box[1]), 0)
+            x1 = min(int(box[2]) + 1, w)
+            y1 = min(int(box[3]) + 1, h)
+            if x0 < x1 and y0 < y1:
+                rois.append((x0, y0, x1, y1))
+        return rois
+
+    def filter_rois(self, depth: np.ndarray, boxes: Iterable[Sequence[float]]) -> np.ndarray:
+        shape = depth.shape[:2]
+        if self._out is None or self._out.shape != shape:
+            self._out = np.zeros(shape, dtype=depth.dtype)
+            self._mask = np.zeros(shape, dtype=bool)
+            self._stage = np.zeros(shape, dtype=np.float32)
+            self._dirty = []
+        assert self._mask is not None and self._stage is not None
+        out = self._out
+        for x0, y0, x1, y1 in self._dirty:
+            out[y0:y1, x0:x1] = 0
+        rois = self._rois(boxes, shape)
+        self._dirty = rois
+        if not rois:
+            return out
+
+        patches = []
+        r = self.spatial_radius if self.spatial else 0
+        for x0, y0, x1, y1 in rois:
+            # Pad the patch with real context so the filter sees across the ROI border
+            px0, py0 = max(x0 - r, 0), max(y0 - r, 0)
+            px1, py1 = min(x1 + r, shape[1]), min(y1 + r, shape[0])
+            patch = depth[py0:py1, px0:px1]
+            if self.spatial:
+                patch = spatial_filter(patch, self.spatial_radius, self.spatial_delta, self.spatial_iterations)
+            else:
+                patch = patch.astype(np.float32)
+            patches.append(patch[y0 - py0: y1 - py0, x0 - px0: x1 - px0])
+
+        if self.temporal is not None:
+            # Union of the ROIs, so overlapping boxes update the state once
+            for x0, y0, x1, y1 in rois:
+                self._mask[y0:y1, x0:x1] = True
+            stage = self._stage
+            for (x0, y0, x1, y1), patch in zip(rois, patches):
+                stage[y0:y1, x0:x1] = patch
+            flat_idx = np.flatnonzero(self._mask)
+            stage.reshape(-1)[flat_idx] = self.temporal.apply(stage.reshape(-1)[flat_idx], flat_idx, shape)
+            for x0, y0, x1, y1 in rois:
+                self._mask[y0:y1, x0:x1] = False
+            patches = [stage[y0:y1, x0:x1] for x0, y0, x1, y1 in rois]
+
+        for (x0, y0, x1, y1), patch in zip(rois, patches):
+            if self.hole_fill:
+                patch = fill_holes(patch, self.hole_fill_mode, self.hole_fill_iterations)
+            out[y0:y1, x0:x1] = np.rint(patch) if out.dtype.kind in "ui" else patch
+        return out
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+class Detections:
+    """Columnar detection set backed by contiguous NumPy arrays.
+
+    Row ``i`` of every column describes one detection: ``boxes`` (N x 4
+    int32 xyxy pixels), ``scores`` (float32), ``class_ids`` (int32), ``xyz``
+    and ``xyz_robot`` (N x 3 float64 metres, NaN rows when unknown) and
+    ``camera`` (int16, -1 when the set comes from a single camera),
+    ``track_id`` (int32, -1 when the detection is not tracked) and
+    ``depth_conf`` (float32 fraction of valid depth samples behind the XYZ,
+    NaN when no depth was read). When point clouds are extracted,
+    ``centroid``, ``obb_center``, ``obb_extent`` (N x 3) and ``obb_axes``
+    (N x 3 x 3, columns major, middle and normal axis) describe each
+    object in the robot frame (NaN rows otherwise). Class
+    names live in one shared ``names`` mapping instead of on every row.
+    Indexing with a slice, index array or boolean mask returns a new set.
+    """
+
+    __slots__ = ("boxes", "scores", "class_ids", "xyz", "xyz_robot", "camera", "track_id", "depth_conf",
+                 "centroid", "obb_center", "obb_axes", "obb_extent", "names")
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        class_ids: np.ndarray,
+        xyz: Optional[np.ndarray] = None,
+        xyz_robot: Optional[np.ndarray] = None,
+        camera: Optional[np.ndarray] = None,
+        track_id: Optional[np.ndarray] = None,
+        depth_conf: Optional[np.ndarray] = None,
+        centroid: Optional[np.ndarray] = None,
+        obb_center: Optional[np.ndarray] = None,
+        obb_axes: Optional[np.ndarray] = None,
+        obb_extent: Optional[np.ndarray] = None,
+        names: Optional[Mapping[int, str]] = None,
+    ) -> None:
+        n = len(scores)
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(n, 4)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(n)
+        self.class_ids = np.asarray(class_ids, dtype=np.int32).reshape(n)
+        self.xyz = np.full((n, 3), np.nan) if xyz is None else np.asarray(xyz, dtype=np.float64).reshape(n, 3)
+        self.xyz_robot = (
+            np.full((n, 3), np.nan) if xyz_robot is None else np.asarray(xyz_robot, dtype=np.float64).reshape(n, 3)
+        )
+        self.camera = np.full(n, -1, dtype=np.int16) if camera is None else np.asarray(camera, dtype=np.int16).reshape(n)
+        self.track_id = (
+            np.full(n, -1, dtype=np.int32) if track_id is None else np.asarray(track_id, dtype=np.int32).reshape(n)
+        )
+        self.depth_conf = (
+            np.full(n, np.nan, dtype=np.float32)
+            if depth_conf is None
+            else np.asarray(depth_conf, dtype=np.float32).reshape(n)
+        )
+        self.centroid = _float_column(centroid, (n, 3))
+        self.obb_center = _float_column(obb_center, (n, 3))
+        self.obb_axes = _float_column(obb_axes, (n, 3, 3))
+        self.obb_extent = _float_column(obb_extent, (n, 3))
+        self.names = names or {}
+
+    @classmethod
+    def empty(cls, names: Optional[Mapping[int, str]] = None) -> "Detections":
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), names=names)
+
+    @classmethod
+    def from_dicts(cls, dets: Sequence[Mapping[str, Any]]) -> "Detections":
+        """Build a set from per-detection dicts in the :meth:`to_dicts` layout (missing keys stay unknown)."""
+        n = len(dets)
+        out = cls(
+            [d["bbox"] for d in dets] if n else np.empty((0, 4)),
+            [d["score"] for d in dets],
+            [d["class_id"] for d in dets],
+            names={int(d["class_id"]): d["class_name"] for d in dets if "class_name" in d},
+        )
+        for i, d in enumerate(dets):
+            if d.get("xyz") is not None:
+                out.xyz[i] = d["xyz"]
+            if d.get("xyz_robot") is not None:
+                out.xyz_robot[i] = d["xyz_robot"]
+            out.camera[i] = d.get("camera", -1)
+            out.track_id[i] = d.get("track_id", -1)
+            out.depth_conf[i] = d.get("depth_conf", np.nan)
+            cloud = d.get("cloud")
+            if cloud:
+                out.centroid[i] = cloud["centroid"]
+                out.obb_center[i] = cloud["obb_center"]
+                out.obb_axes[i] = np.asarray(cloud["obb_axes"]).T
+                out.obb_extent[i] = cloud["obb_extent"]
+        return out
+
+    @classmethod
+    def concatenate(cls, parts: Sequence["Detections"]) -> "Detections":
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([p.boxes for p in parts]),
+            np.concatenate([p.scores for p in parts]),
+            np.concatenate([p.class_ids for p in parts]),
+            xyz=np.concatenate([p.xyz for p in parts]),
+            xyz_robot=np.concatenate([p.xyz_robot for p in parts]),
+            camera=np.concatenate([p.camera for p in parts]),
+            track_id=np.concatenate([p.track_id for p in parts]),
+            depth_conf=np.concatenate([p.depth_conf for p in parts]),
+            centroid=np.concatenate([p.centroid for p in parts]),
+            obb_center=np.concatenate([p.obb_center for p in parts]),
+            obb_axes=np.concatenate([p.obb_axes for p in parts]),
+            obb_extent=np.concatenate([p.obb_extent for p in parts]),
+            names=parts[0].names,
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, idx) -> "Detections":
+        if isinstance(idx, (int, np.integer)):
+            idx = slice(idx, idx + 1 if idx != -1 else None)
+        return Detections(
+            self.boxes[idx],
+            self.scores[idx],
+            self.class_ids[idx],
+            xyz=self.xyz[idx],
+            xyz_robot=self.xyz_robot[idx],
+            camera=self.camera[idx],
+            track_id=self.track_id[idx],
+            depth_conf=self.depth_conf[idx],
+            centroid=self.centroid[idx],
+            obb_center=self.obb_center[idx],
+            obb_axes=self.obb_axes[idx],
+            obb_extent=self.obb_extent[idx],
+            names=self.names,
+        )
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Integer box centers as an (N, 2) array of (cx, cy)."""
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) // 2
+
+    def class_name(self, i: int) -> str:
+        cls_id = int(self.class_ids[i])
+        return self.names.get(cls_id, str(cls_id))
+
+    def sort_by_score(self) -> "Detections":
+        return self[np.argsort(-self.scores, kind="stable")]
+
+    def topk(self, k: int) -> "Detections":
+        """The ``k`` highest-scoring detections, highest first."""
+        if k >= len(self):
+            return self.sort_by_score()
+        part = np.argpartition(-self.scores, k)[:k]
+        return self[part[np.argsort(-self.scores[part], kind="stable")]]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Per-detection dicts in the JSON payload layout (``None`` for unknown XYZ)."""
+        xyz_valid = ~np.isnan(self.xyz).any(axis=1)
+        robot_valid = ~np.isnan(self.xyz_robot).any(axis=1)
+        cloud_valid = ~np.isnan(self.centroid).any(axis=1)
+        out = []
+        for i, (box, score, cls_id, xyz, xyz_r, cam, tid, conf) in enumerate(
+            zip(
+                self.boxes.tolist(),
+                self.scores.tolist(),
+                self.class_ids.tolist(),
+                self.xyz.tolist(),
+                self.xyz_robot.tolist(),
+                self.camera.tolist(),
+                self.track_id.tolist(),
+                self.depth_conf.tolist(),
+            )
+        ):
+            det = {
+                "bbox": box,
+                "score": score,
+                "class_id": cls_id,
+                "class_name": self.names.get(cls_id, str(cls_id)),
+                "xyz": xyz if xyz_valid[i] else None,
+                "xyz_robot": xyz_r if robot_valid[i] else None,
+            }
+            if cam >= 0:
+                det["camera"] = cam
+            if tid >= 0:
+                det["track_id"] = tid
+            if conf == conf:  # NaN when no depth was read
+                det["depth_conf"] = round(conf, 3)
+            if cloud_valid[i]:
+                axes = self.obb_axes[i]
+                det["cloud"] = {
+                    "centroid": self.centroid[i].tolist(),
+                    "normal": axes[:, 2].tolist(),
+                    "obb_center": self.obb_center[i].tolist(),
+                    "obb_axes": axes.T.tolist(),
+                    "obb_extent": self.obb_extent[i].tolist(),
+                }
+            out.append(det)
+        return out
+
+
+def _float_column(values: Optional[np.ndarray], shape: tuple) -> np.ndarray:
+    if values is None:
+        return np.full(shape, np.nan)
+    return np.asarray(values, dtype=np.float64).reshape(shape)
+
+
+def json_default(obj: Any) -> Any:
+    """``json.dumps(default=...)`` hook that serializes :class:`Detections` payloads."""
+    if isinstance(obj, Detections):
+        return obj.to_dicts()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -3,24 +3,30 @@ from __future__ import annotations
 import cv2
 import numpy as np
 
+from .detections import Detections
+
 
 def draw_detections(
     image: np.ndarray,
-    detections: list[dict],
+    detections: Detections,
     color: tuple[int, int, int] = (0, 255, 0),
     thickness: int = 2,
     show_depth: bool = True,
 ) -> np.ndarray:
-    for det in detections:
-        x1, y1, x2, y2 = det["bbox"]
-        cls = det.get("class_name", str(det.get("class_id", "?")))
-        conf = det.get("score", 0.0)
-        xyz = det.get("xyz")
-
+    names = detections.names
+    for (x1, y1, x2, y2), conf, cls_id, z, tid in zip(
+        detections.boxes.tolist(),
+        detections.scores.tolist(),
+        detections.class_ids.tolist(),
+        detections.xyz[:, 2].tolist(),
+        detections.track_id.tolist(),
+    ):
         cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
-        label = f"{cls} {conf:.2f}"
-        if show_depth and xyz is not None:
-            label += f" z={xyz[2]:.2f}m"
+        label = f"{names.get(cls_id, str(cls_id))} {conf:.2f}"
+        if tid >= 0:
+            label = f"#{tid} {label}"
+        if show_depth and z == z:  # NaN when no depth was computed
+            label += f" z={z:.2f}m"
         (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
         cv2.rectangle(image, (x1, y1 - th - 6), (x1 + tw + 4, y1), color, -1)
         cv2.putText(
@@ -34,5 +40,3 @@ def draw_detections(
             cv2.LINE_AA,
         )
     return image
-
-
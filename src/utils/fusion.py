@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from .detections import Detections
+
+
+def merge_camera_detections(
+    per_camera: List[Detections],
+    radius_m: float = 0.05,
+) -> Detections:
+    """Merge detections from several cameras into one set in the robot frame.
+
+    Each detection is tagged with its ``camera`` index. Detections of the same
+    class from different cameras whose ``xyz_robot`` points lie within
+    ``radius_m`` of each other are treated as the same object and only the
+    highest-scoring one is kept. Detections without a valid ``xyz_robot``
+    are never suppressed. The result is sorted by score, highest first.
+    """
+    for cam_idx, dets in enumerate(per_camera):
+        dets.camera[:] = cam_idx
+    merged = Detections.concatenate(per_camera).sort_by_score()
+    n = len(merged)
+    if len(per_camera) < 2 or n < 2:
+        return merged
+
+    xyz = merged.xyz_robot.copy()
+    # A zero camera-frame depth means "no depth", not a point at the origin
+    xyz[~(merged.xyz[:, 2] > 0)] = np.nan
+    cls = merged.class_ids
+    cam = merged.camera
+
+    dist = np.linalg.norm(xyz[:, None, :] - xyz[None, :, :], axis=-1)
+    dup = (dist <= radius_m) & (cls[:, None] == cls[None, :]) & (cam[:, None] != cam[None, :])
+    # Only a higher-scoring (earlier) detection may suppress a later one
+    dup = np.triu(dup, k=1)
+
+    keep = np.ones(n, dtype=bool)
+    for i in range(n):
+        if keep[i]:
+            keep[dup[i]] = False
+    return merged[keep]
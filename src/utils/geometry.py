@@ -1,14 +1,62 @@
 from __future__ import annotations
 
-from typing import Iterable, Tuple
+from typing import Iterable, Tuple, Union
 
 import numpy as np
 
 
-def transform_point_homogeneous(T_4x4: Iterable[Iterable[float]], xyz_m: Iterable[float]) -> Tuple[float, float, float]:
-    T = np.asarray(T_4x4, dtype=float).reshape(4, 4)
-    p = np.array([xyz_m[0], xyz_m[1], xyz_m[2], 1.0], dtype=float)
-    pr = T @ p
+class RigidTransform:
+    """A 4x4 homogeneous transform parsed and validated once, applied to point arrays in one product.
+
+    Raises ``ValueError`` for a matrix that cannot be applied as an affine
+    transform: wrong shape, non-finite entries or a bottom row other than
+    ``[0, 0, 0, 1]``. ``is_rigid`` tells whether the 3x3 block is a proper
+    rotation (orthonormal, determinant +1, within ``atol``, loose enough for
+    calibration output printed with a few decimals). Calibrations with a
+    folded-in scale (e.g. metres to millimetres) are not rigid but still
+    valid; pass ``strict=True`` to reject them.
+    """
+
+    __slots__ = ("matrix", "R", "t", "is_rigid")
+
+    def __init__(self, T_4x4: Iterable[Iterable[float]], atol: float = 1e-3, strict: bool = False) -> None:
+        try:
+            T = np.asarray(T_4x4, dtype=np.float64).reshape(4, 4)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Transform must be a 4x4 matrix: {e}") from None
+        if not np.isfinite(T).all():
+            raise ValueError("Transform has non-finite entries")
+        if not np.allclose(T[3], (0.0, 0.0, 0.0, 1.0), atol=atol):
+            raise ValueError(f"Transform bottom row must be [0, 0, 0, 1], got {T[3].tolist()}")
+        R = T[:3, :3]
+        self.is_rigid = bool(np.allclose(R.T @ R, np.eye(3), atol=atol) and abs(np.linalg.det(R) - 1.0) <= atol)
+        if strict and not self.is_rigid:
+            raise ValueError("Transform rotation block is not a proper rotation (orthonormal, det +1)")
+        self.matrix = T
+        self.R = np.ascontiguousarray(R)
+        self.t = T[:3, 3].copy()
+
+    def apply(self, xyz_m: np.ndarray) -> np.ndarray:
+        """Transform an (..., 3) array of points."""
+        return np.asarray(xyz_m, dtype=np.float64) @ self.R.T + self.t
+
+
+TransformLike = Union[RigidTransform, Iterable[Iterable[float]]]
+
+
+def _as_transform(T: TransformLike) -> RigidTransform:
+    return T if isinstance(T, RigidTransform) else RigidTransform(T)
+
+
+def transform_point_homogeneous(T_4x4: TransformLike, xyz_m: Iterable[float]) -> Tuple[float, float, float]:
+    pr = _as_transform(T_4x4).apply(np.array([xyz_m[0], xyz_m[1], xyz_m[2]], dtype=float))
     return float(pr[0]), float(pr[1]), float(pr[2])
 
 
+def transform_points_homogeneous(T_4x4: TransformLike, xyz_m: np.ndarray) -> np.ndarray:
+    """Apply a 4x4 homogeneous transform to an (N, 3) array of points in one product.
+
+    Pass a :class:`RigidTransform` built at startup to skip parsing the
+    matrix on every call.
+    """
+    return _as_transform(T_4x4).apply(np.asarray(xyz_m, dtype=float).reshape(-1, 3))
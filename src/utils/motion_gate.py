@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides whether a frame differs enough from the last inferred one to re-run detection.
+
+    Color is compared as a downscaled grayscale frame difference, depth (if
+    given) as the fraction of pixels whose raw value moved by more than
+    ``depth_delta``. The reference is the frame of the last inference
+    (:meth:`commit`), so slow drift still adds up to a trigger. A refresh is
+    forced after ``refresh_interval_s`` even on a static scene. All buffers
+    are preallocated at the first frame.
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int] = (160, 120),
+        pixel_delta: int = 12,
+        changed_fraction: float = 0.01,
+        depth_delta: int = 20,
+        depth_changed_fraction: float = 0.01,
+        use_depth: bool = True,
+        refresh_interval_s: float = 1.0,
+    ) -> None:
+        self.size = (int(size[0]), int(size[1]))
+        self.pixel_delta = int(pixel_delta)
+        self.changed_fraction = float(changed_fraction)
+        self.depth_delta = int(depth_delta)
+        self.depth_changed_fraction = float(depth_changed_fraction)
+        self.use_depth = use_depth
+        self.refresh_interval_s = float(refresh_interval_s)
+
+        w, h = self.size
+        self._small = np.empty((h, w, 3), dtype=np.uint8)
+        self._gray = np.empty((h, w), dtype=np.uint8)
+        self._ref_gray = np.empty((h, w), dtype=np.uint8)
+        self._diff = np.empty((h, w), dtype=np.uint8)
+        self._depth: Optional[np.ndarray] = None
+        self._ref_depth: Optional[np.ndarray] = None
+        self._has_ref = False
+        self._has_depth = False
+        self._last_commit = 0.0
+
+    def changed(self, color: np.ndarray, depth: Optional[np.ndarray] = None) -> bool:
+        """Downscale the frame and report whether it needs a new inference."""
+        cv2.resize(color, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        self._has_depth = self.use_depth and depth is not None
+        if self._has_depth:
+            if self._depth is None or self._depth.dtype != depth.dtype:
+                self._depth = np.empty(self._gray.shape, dtype=depth.dtype)
+                self._ref_depth = np.empty_like(self._depth)
+                self._has_ref = False
+            cv2.resize(depth, self.size, dst=self._depth, interpolation=cv2.INTER_NEAREST)
+
+        if not self._has_ref or time.monotonic() - self._last_commit >= self.refresh_interval_s:
+            return True
+
+        cv2.absdiff(self._gray, self._ref_gray, dst=self._diff)
+        cv2.threshold(self._diff, self.pixel_delta, 255, cv2.THRESH_BINARY, dst=self._diff)
+        if cv2.countNonZero(self._diff) > self.changed_fraction * self._diff.size:
+            return True
+
+        if self._has_depth:
+            cur = self._depth.astype(np.int32)
+            ref = self._ref_depth.astype(np.int32)
+            # Holes flicker on their own; only compare pixels valid in both frames
+            moved = (cur > 0) & (ref > 0) & (np.abs(cur - ref) > self.depth_delta)
+            if np.count_nonzero(moved) > self.depth_changed_fraction * moved.size:
+                return True
+        return False
+
+    def commit(self) -> None:
+        """Make the frame last passed to :meth:`changed` the reference (call after inferring on it)."""
+        self._ref_gray, self._gray = self._gray, self._ref_gray
+        if self._has_depth:
+            self._ref_depth, self._depth = self._depth, self._ref_depth
+        self._has_ref = True
+        self._last_commit = time.monotonic()
+
+
+class GateMetrics:
+    """Skip ratio and CPU time saved by motion gating, for periodic logging."""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.infer_cpu_s = 0.0
+        self.gate_cpu_s = 0.0
+
+    def record_gate(self, cpu_s: float) -> None:
+        self.gate_cpu_s += cpu_s
+
+    def record_inference(self, cpu_s: float) -> None:
+        self.frames += 1
+        self.inferred += 1
+        self.infer_cpu_s += cpu_s
+
+    def record_skip(self) -> None:
+        self.frames += 1
+        self.skipped += 1
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    @property
+    def cpu_saved_s(self) -> float:
+        """Estimated CPU seconds saved: skipped frames at the mean inference cost, minus the gate's own cost."""
+        if not self.inferred:
+            return 0.0
+        return self.skipped * self.infer_cpu_s / self.inferred - self.gate_cpu_s
+
+    def summary(self) -> str:
+        return (
+            f"motion gate: {self.skipped}/{self.frames} frames skipped ({self.skip_ratio:.0%}), "
+            f"~{self.cpu_saved_s:.1f} s CPU saved"
+        )
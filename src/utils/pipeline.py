@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Callable, List, Optional, Sequence
+
+_STOP = object()
+
+
+class StagePipeline:
+    """Runs items through a fixed chain of stage functions, one worker thread per stage.
+
+    Each stage hands its result to the next through a FIFO queue, so items
+    finish in submission order while different stages work on different
+    items at the same time (e.g. preprocessing frame N+1 during the forward
+    pass of frame N). At most ``max_in_flight`` items are inside the chain;
+    :meth:`submit` blocks until one finishes, which bounds both memory and
+    added latency. An exception in a stage drops that item and is re-raised
+    from the next :meth:`submit` or :meth:`results` call.
+    """
+
+    def __init__(self, stages: Sequence[Callable[[Any], Any]], max_in_flight: int = 2, name: str = "pipeline") -> None:
+        if not stages:
+            raise ValueError("StagePipeline needs at least one stage")
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._queues: List[queue.Queue] = [queue.Queue() for _ in stages]
+        self._done: queue.Queue = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._threads = []
+        for i, stage in enumerate(stages):
+            out = self._queues[i + 1] if i + 1 < len(stages) else None
+            t = threading.Thread(target=self._run, args=(stage, self._queues[i], out), name=f"{name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _run(self, stage: Callable[[Any], Any], inq: queue.Queue, outq: Optional[queue.Queue]) -> None:
+        while True:
+            item = inq.get()
+            if item is _STOP:
+                if outq is not None:
+                    outq.put(_STOP)
+                return
+            try:
+                item = stage(item)
+            except BaseException as e:  # surfaced to the submitting thread
+                self._error = e
+                self._slots.release()
+                continue
+            if outq is not None:
+                outq.put(item)
+            else:
+                self._done.put(item)
+                self._slots.release()
+
+    def _raise_pending(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> None:
+        """Queue ``item`` for the first stage, waiting while ``max_in_flight`` items are in the chain."""
+        self._raise_pending()
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Pipeline stages did not finish an item in time")
+        self._queues[0].put(item)
+
+    def results(self) -> List[Any]:
+        """Items that came out of the last stage since the previous call, in order."""
+        self._raise_pending()
+        done = []
+        while True:
+            try:
+                done.append(self._done.get_nowait())
+            except queue.Empty:
+                return done
+
+    def close(self, timeout: Optional[float] = None) -> List[Any]:
+        """Let the queued items finish, stop the workers and return the remaining results."""
+        self._queues[0].put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+        return self.results()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import copy
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+
+def host_name() -> str:
+    """Name tuned profiles are stored under (the machine's hostname)."""
+    return socket.gethostname().split(".")[0] or "default"
+
+
+def profile_path(profile_dir: str, host: Optional[str] = None) -> Path:
+    return Path(profile_dir) / f"{host or host_name()}.yaml"
+
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of ``base`` with ``override`` merged in; nested dicts merge, everything else replaces."""
+    out = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = deep_merge(out[key], value)
+        else:
+            out[key] = copy.deepcopy(value)
+    return out
+
+
+def apply_tuned_profile(config: Dict[str, Any], logger=None) -> Dict[str, Any]:
+    """Merge this host's tuned profile (written by ``scripts/autotune.py``) into ``config``.
+
+    The profile's ``settings`` mapping uses the config.yaml layout. Returns
+    ``config`` unchanged when ``autotune.apply`` is off or the host has no
+    profile yet.
+    """
+    tune_cfg = config.get("autotune", {})
+    if not tune_cfg.get("apply", True) or not tune_cfg.get("profile_dir"):
+        return config
+    path = profile_path(tune_cfg["profile_dir"])
+    if not path.exists():
+        return config
+    with open(path, "r") as f:
+        profile = yaml.safe_load(f) or {}
+    settings = profile.get("settings") or {}
+    if logger:
+        logger.info(f"Applying tuned profile {path} (tuned {profile.get('created', '?')})")
+    return deep_merge(config, settings)
+
+
+def apply_thread_settings(torch_threads: int = 0, opencv_threads: int = -1) -> None:
+    """Set torch intra-op and OpenCV thread counts; ``0``/``-1`` keep the library defaults."""
+    import cv2
+
+    if torch_threads > 0:
+        import torch
+
+        torch.set_num_threads(int(torch_threads))
+    if opencv_threads >= 0:
+        cv2.setNumThreads(int(opencv_threads))